@@ -1,20 +1,67 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify
+from flask import Flask, render_template, stream_template, request, redirect, url_for, flash, jsonify, abort
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
-from models import db, User, Project, ContactMessage, Review
+from models import db, User, Project, Technology, ProjectTechnology, ContactMessage, Review
 import os
 import requests
 import re
+import json
+import time
+import hmac
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import func, case
+from sqlalchemy.exc import SQLAlchemyError
 from email_validator import validate_email, EmailNotValidError
+import email_check
+from github_cache import create_cache_from_env
+import github_client
+from pagination import keyset_paginate, parse_limit, InvalidCursor, MAX_LIMIT
+from page_cache import create_page_cache_from_env
+from http_cache import conditional, FALLBACK_HEADER
+import search
+import moderation
+from rate_limit import create_write_limiter_from_env, WriteBusy
+from highlight import Highlighter
+from metrics import create_metrics_from_env
+from profiler import create_profiler_from_env
+from assets import create_assets_from_env
+from compression import create_compressor_from_env
+import images
+import server_config
+from werkzeug.middleware.proxy_fix import ProxyFix
 
 app = Flask(__name__)
 app.secret_key = os.environ.get('SECRET_KEY', 'your-secret-key-here-change-in-production')
 
+# Dietro un proxy (es. Render) l'IP del client arriva da X-Forwarded-For:
+# TRUSTED_PROXIES indica quanti proxy fidati ci sono davanti all'app
+TRUSTED_PROXIES = int(os.environ.get('TRUSTED_PROXIES', 0))
+if TRUSTED_PROXIES:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXIES, x_proto=TRUSTED_PROXIES)
+
+# Senza TRUSTED_PROXIES dietro un proxy tutti i client hanno l'IP del proxy e
+# i limiti per IP del form contatti diventano un unico contatore per tutto il sito
+_proxy_warning = {'shown': False}
+
+@app.before_request
+def warn_untrusted_proxy():
+    if not TRUSTED_PROXIES and not _proxy_warning['shown'] and 'X-Forwarded-For' in request.headers:
+        _proxy_warning['shown'] = True
+        print("⚠️ Richiesta con X-Forwarded-For ma TRUSTED_PROXIES=0: i limiti per IP "
+              "valgono per il proxy, non per i client. Imposta TRUSTED_PROXIES (es. 1 su Render)")
+
+# Compressione gzip/Brotli delle risposte: registrata per prima perché Flask esegue
+# gli after_request in ordine inverso e deve comprimere il corpo definitivo
+compressor = create_compressor_from_env()
+compressor.init_app(app)
+
 # Configurazione Database
 app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///portfolio.db')
 if app.config['SQLALCHEMY_DATABASE_URI'].startswith('postgres://'):
     app.config['SQLALCHEMY_DATABASE_URI'] = app.config['SQLALCHEMY_DATABASE_URI'].replace('postgres://', 'postgresql://', 1)
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Pool di connessioni dimensionato sui thread del worker (vedi server_config)
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = server_config.engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
 app.config['TEMPLATES_AUTO_RELOAD'] = True
 
 # Inizializzazione Database e Login Manager
@@ -24,21 +71,245 @@ login_manager.init_app(app)
 login_manager.login_view = 'admin_login'
 login_manager.login_message = 'Per favore effettua il login per accedere a questa pagina.'
 
+# CSS e JS minificati, con hash nel nome e precompressi, serviti con cache immutabile
+assets = create_assets_from_env(app)
+
+# Varianti ridimensionate delle immagini dei progetti, servite con cache immutabile
+images.init_app(app)
+
+# Cache persistente per i file recuperati da GitHub
+github_cache = create_cache_from_env(os.path.join(app.instance_path, 'github_cache.db'))
+
+# HTML colorato dei file di codice, salvato nella stessa cache per hash del contenuto
+highlighter = Highlighter(github_cache)
+
+# Cache delle pagine pubbliche, invalidata dalle route admin che modificano i dati
+page_cache = create_page_cache_from_env(os.path.join(app.instance_path, 'page_cache.db'))
+
+# Limiti per client e di concorrenza sui form pubblici (contatti, recensioni)
+write_limiter = create_write_limiter_from_env(os.path.join(app.instance_path, 'rate_limit.db'))
+
+# Metriche Prometheus per endpoint, query SQL e richieste a GitHub (vedi /metrics)
+metrics = create_metrics_from_env(os.path.join(app.instance_path, 'metrics'))
+metrics.init_app(app)
+github_client.request_observers.append(metrics.record_github_request)
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+# Profilatore delle query SQL per richiesta, solo per il debug (SQL_PROFILER=header|panel)
+sql_profiler = create_profiler_from_env()
+sql_profiler.init_app(app)
+
+# Stato del database, verificato all'avvio e da /readyz (vedi check_database)
+database_status = {'ready': False, 'error': None, 'checked_at': None}
+READINESS_CACHE_SECONDS = 5
+
+# Ultima versione valida delle pagine pubbliche, usata se il database non risponde
+_fallback_pages = {}
+
+# Pool di thread per le richieste parallele a GitHub (vedi get_github_executor)
+_github_executor = None
+_github_executor_pid = None
+
 @login_manager.user_loader
 def load_user(user_id):
     return User.query.get(int(user_id))
 
-def validate_email_address(email):
+def check_database():
     """
-    Verifica se l'email è valida e se il dominio esiste
+    Verifica che il database risponda e aggiorna database_status.
+    Usata una volta all'avvio e dall'endpoint /readyz, mai dalle pagine pubbliche.
     """
     try:
-        # Verifica formato email e dominio
-        valid = validate_email(email, check_deliverability=True)
-        return True, valid.email
+        with db.engine.connect() as conn:
+            conn.execute(db.text('SELECT 1'))
+        database_status.update(ready=True, error=None)
+    except SQLAlchemyError as e:
+        database_status.update(ready=False, error=str(e))
+    database_status['checked_at'] = time.time()
+    return database_status['ready']
+
+def remember_page(key, html):
+    """
+    Salva l'ultima versione renderizzata con successo di una pagina pubblica,
+    da servire come fallback se il database non è raggiungibile
+    """
+    _fallback_pages[key] = html
+    return html
+
+def database_error_page(key, error, template, **context):
+    """
+    Risposta rapida per le pagine pubbliche quando il database non risponde:
+    l'ultima versione valida della pagina se disponibile, altrimenti la pagina vuota con 503
+    """
+    print(f"Errore database nella pagina {key}: {error}")
+    db.session.rollback()
+    database_status.update(ready=False, error=str(error), checked_at=time.time())
+
+    if key in _fallback_pages:
+        return _fallback_pages[key], 200, {FALLBACK_HEADER: 'stale'}
+    return render_template(template, **context), 503, {'Retry-After': '30'}
+
+def invalid_technologies_message(tech_list):
+    """Messaggio di errore per i tag più lunghi della colonna Technology.name, oppure None"""
+    too_long = [tech for tech in tech_list if len(tech) > Technology.MAX_LENGTH]
+    if not too_long:
+        return None
+    return f"Tecnologie troppo lunghe (massimo {Technology.MAX_LENGTH} caratteri): {', '.join(too_long)}"
+
+def get_keyset_page(query, model):
+    """
+    Pagina query (ordinata per created_at, id) usando i parametri
+    cursor e limit della richiesta corrente
+    """
+    return keyset_paginate(
+        query,
+        model,
+        cursor=request.args.get('cursor'),
+        limit=parse_limit(request.args.get('limit'))
+    )
+
+def get_search_page(query, kind):
+    """Pagina di risultati della ricerca admin per un tipo, come oggetti del modello"""
+    page = search.search(
+        query,
+        kinds=[kind],
+        public_only=False,
+        cursor=request.args.get('cursor'),
+        limit=parse_limit(request.args.get('limit'))
+    )
+    page.items = [result.item for result in page.items]
+    return page
+
+def keyset_page_to_dict(page):
+    """Serializza una pagina keyset per le API JSON"""
+    return {
+        'items': [item.to_dict() for item in page.items],
+        'next_cursor': page.next_cursor,
+        'limit': page.limit
+    }
+
+def get_review_summary():
+    """
+    Media, numero e distribuzione per stelle delle recensioni approvate,
+    calcolati dal database con una sola query aggregata
+    """
+    rows = db.session.query(Review.rating, func.count(Review.id)) \
+        .filter(Review.approved == True) \
+        .group_by(Review.rating) \
+        .all()
+
+    histogram = {stars: 0 for stars in range(5, 0, -1)}
+    for rating, count in rows:
+        if rating in histogram:
+            histogram[rating] = count
+
+    count = sum(histogram.values())
+    average = round(sum(stars * n for stars, n in histogram.items()) / count, 1) if count else 0
+    return {'average': average, 'count': count, 'histogram': histogram}
+
+# Etichette delle categorie dei progetti (stesse del form admin)
+CATEGORY_LABELS = {'web': 'Web App', 'mobile': 'Mobile', 'design': 'Design', 'other': 'Altro'}
+
+# Conteggi per la barra dei filtri, ricalcolati solo dopo una modifica ai progetti
+_filter_counts = {'changed': None, 'technologies': [], 'categories': []}
+
+def get_project_filters():
+    """Filtri ?tech= e ?category= della richiesta corrente, normalizzati in minuscolo"""
+    tech = request.args.get('tech', '').strip().lower()
+    category = request.args.get('category', '').strip().lower()
+    return tech, category
+
+def filter_projects(query, tech=None, category=None):
+    """Applica i filtri per tag e categoria, risolti in SQL sugli indici"""
+    if category:
+        query = query.filter(Project.category == category)
+    if tech:
+        query = query.filter(Project.id.in_(
+            db.select(ProjectTechnology.project_id)
+            .join(Technology, Technology.id == ProjectTechnology.technology_id)
+            .where(Technology.slug == tech)
+        ))
+    return query
+
+def get_filter_counts():
+    """
+    Numero di progetti per tag e per categoria. Le due GROUP BY vengono
+    eseguite solo quando il gruppo 'projects' della cache è stato invalidato
+    """
+    changed = page_cache.last_changed('projects')
+    if _filter_counts['changed'] != changed:
+        project_count = func.count(ProjectTechnology.project_id)
+        technologies = db.session.query(Technology.name, Technology.slug, project_count) \
+            .join(ProjectTechnology, ProjectTechnology.technology_id == Technology.id) \
+            .group_by(Technology.id, Technology.name, Technology.slug) \
+            .order_by(project_count.desc(), Technology.name) \
+            .all()
+        categories = db.session.query(Project.category, func.count(Project.id)) \
+            .group_by(Project.category) \
+            .order_by(Project.category) \
+            .all()
+        _filter_counts.update(
+            changed=changed,
+            technologies=[{'name': name, 'slug': slug, 'count': count} for name, slug, count in technologies],
+            categories=[{'slug': slug, 'count': count} for slug, count in categories if slug]
+        )
+    return _filter_counts
+
+def latest_timestamp(*values):
+    """Il più recente tra datetime naive UTC e timestamp epoch (None ignorati)"""
+    converted = [
+        datetime.utcfromtimestamp(value) if isinstance(value, (int, float)) else value
+        for value in values if value is not None
+    ]
+    return max(converted) if converted else None
+
+def projects_version():
+    """
+    Versione dei progetti per le risposte condizionali: conteggio e date
+    massime dal database più l'ultima invalidazione (cattura le cancellazioni)
+    """
+    count, last_updated, last_created = db.session.query(
+        func.count(Project.id), func.max(Project.updated_at), func.max(Project.created_at)
+    ).one()
+    changed = page_cache.last_changed('projects')
+    version = f'{count}:{last_updated}:{last_created}:{changed}'
+    return version, latest_timestamp(last_updated, last_created, changed)
+
+def reviews_version():
+    """
+    Versione delle recensioni approvate: conteggio, data massima e somma
+    degli id, più l'ultima invalidazione (approvazioni e cancellazioni)
+    """
+    count, last_created, id_sum = db.session.query(
+        func.count(Review.id), func.max(Review.created_at), func.sum(Review.id)
+    ).filter(Review.approved == True).one()
+    changed = page_cache.last_changed('reviews')
+    version = f'{count}:{last_created}:{id_sum}:{changed}'
+    return version, latest_timestamp(last_created, changed)
+
+def index_version():
+    """La homepage mostra progetti in evidenza e riepilogo recensioni"""
+    projects_tag, projects_modified = projects_version()
+    reviews_tag, reviews_modified = reviews_version()
+    return f'{projects_tag}|{reviews_tag}', latest_timestamp(projects_modified, reviews_modified)
+
+def validate_email_address(email, check_deliverability=True):
+    """
+    Verifica se l'email è valida e se il dominio esiste. La verifica DNS
+    usa la cache per dominio e ha un tempo massimo (vedi email_check)
+    """
+    try:
+        # Verifica formato email, senza rete
+        valid = validate_email(email, check_deliverability=False)
     except EmailNotValidError as e:
         return False, str(e)
 
+    if check_deliverability and email_check.DELIVERABILITY_MODE != 'off':
+        status, error = email_check.check_domain(valid.ascii_domain)
+        if status == email_check.UNDELIVERABLE:
+            return False, error
+    return True, valid.email
+
 def extract_github_info(github_url):
     """
     Estrae username e repository name da un URL GitHub
@@ -67,104 +338,356 @@ def extract_github_info(github_url):
 
 def get_github_file_content(username, repo_name, file_path, branch='main'):
     """
-    Recupera il contenuto di un file da GitHub usando l'API pubblica
+    Recupera il contenuto di un file da GitHub usando l'API pubblica.
+    Le risposte (anche i 404) vengono salvate nella cache persistente e,
+    una volta scadute, rivalidate con l'ETag tramite If-None-Match.
     """
+    cache_key = f"contents:{username}/{repo_name}/{file_path}@{branch}"
+    cached = github_cache.get(cache_key)
+
+    if cached and cached['fresh']:
+        if cached['status'] == 200:
+            return cached['body']
+        # 404 in cache: prova direttamente con 'master' se 'main' non esiste
+        if branch == 'main':
+            return get_github_file_content(username, repo_name, file_path, 'master')
+        return None
+
     try:
-        url = f"https://api.github.com/repos/{username}/{repo_name}/contents/{file_path}"
         params = {'ref': branch}
+        headers = {}
+        if cached and cached['status'] == 200 and cached['etag']:
+            headers['If-None-Match'] = cached['etag']
         
-        response = requests.get(url, params=params, timeout=10)
+        response = github_client.get(f"repos/{username}/{repo_name}/contents/{file_path}", params=params, headers=headers)
         
-        if response.status_code == 200:
+        if response.status_code == 304 and cached:
+            # Il file non è cambiato: rinnova la voce senza riscaricarlo
+            github_cache.touch(cache_key)
+            return cached['body']
+        elif response.status_code == 200:
             data = response.json()
             if data.get('type') == 'file':
+                # Oltre 1 MB GitHub non include il contenuto (encoding 'none')
+                if data.get('encoding') != 'base64' or data.get('size', 0) > CODE_FULL_FILE_MAX_BYTES:
+                    print(f"⚠️ File {file_path} troppo grande ({data.get('size', 0)} byte), non scaricato")
+                    return None
                 import base64
                 content = base64.b64decode(data['content']).decode('utf-8')
+                github_cache.set(cache_key, 200, content, etag=response.headers.get('ETag'))
                 return content
         elif response.status_code == 404:
+            github_cache.set(cache_key, 404)
             # Prova con 'master' se 'main' non funziona
             if branch == 'main':
                 return get_github_file_content(username, repo_name, file_path, 'master')
         
         return None
-    except Exception as e:
+    except requests.Timeout as e:
+        print(f"Timeout nel recupero del file {file_path}: {e}")
+    except (requests.RequestException, ValueError) as e:
+        # ValueError copre JSON non valido e contenuti non decodificabili
         print(f"Errore nel recupero del file {file_path}: {e}")
+
+    # In caso di errore di rete meglio una copia scaduta che niente
+    if cached and cached['status'] == 200:
+        return cached['body']
+    return None
+
+def get_github_executor():
+    """
+    Restituisce il pool di thread per le richieste a GitHub.
+    Il pool viene creato in modo pigro e ricreato dopo un fork,
+    perché i thread non sopravvivono nei processi figli (es. worker gunicorn).
+    """
+    global _github_executor, _github_executor_pid
+    if _github_executor is None or _github_executor_pid != os.getpid():
+        _github_executor = ThreadPoolExecutor(
+            max_workers=int(os.environ.get('GITHUB_FETCH_WORKERS', 8)),
+            thread_name_prefix='github-fetch'
+        )
+        _github_executor_pid = os.getpid()
+    return _github_executor
+
+# File da mostrare nel visualizzatore di codice (in ordine di priorità)
+CODE_FILE_PATTERNS = [
+    # Python
+    'app.py', 'main.py', 'run.py', 'server.py',
+    'requirements.txt', 'setup.py', 'config.py',
+    # JavaScript/Node.js
+    'package.json', 'index.js', 'app.js', 'server.js',
+    # HTML/CSS
+    'index.html', 'style.css', 'styles.css',
+    # Altri
+    'README.md', 'Dockerfile', '.env.example'
+]
+
+# Estensioni usate per completare la selezione quando il manifest è disponibile
+CODE_FILE_EXTENSIONS = ['py', 'js', 'ts', 'jsx', 'tsx', 'java', 'go', 'rs', 'html', 'css']
+
+# Cartelle che contengono codice generato o di terze parti
+IGNORED_CODE_DIRS = ('node_modules/', 'vendor/', 'dist/', 'build/', '.git/', 'venv/', '.venv/', '__pycache__/')
+
+MAX_CODE_FILES = 5
+
+# Limiti in byte della pagina del codice: anteprima per file, totale della pagina
+# e file completo caricato su richiesta (l'API contents di GitHub arriva a 1 MB)
+CODE_FILE_MAX_BYTES = int(os.environ.get('CODE_FILE_MAX_BYTES', 64 * 1024))
+CODE_PAGE_MAX_BYTES = int(os.environ.get('CODE_PAGE_MAX_BYTES', 256 * 1024))
+CODE_FULL_FILE_MAX_BYTES = int(os.environ.get('CODE_FULL_FILE_MAX_BYTES', 1024 * 1024))
+
+def get_file_language(file_path):
+    """
+    Determina il linguaggio di un file basandosi sull'estensione
+    """
+    ext = file_path.split('.')[-1] if '.' in file_path else ''
+    language_map = {
+        'py': 'python',
+        'js': 'javascript',
+        'jsx': 'jsx',
+        'ts': 'typescript',
+        'tsx': 'tsx',
+        'java': 'java',
+        'go': 'go',
+        'rs': 'rust',
+        'html': 'html',
+        'css': 'css',
+        'md': 'markdown',
+        'json': 'json',
+        'txt': 'text'
+    }
+    return language_map.get(ext, 'text')
+
+def fetch_github_json_cached(cache_key, path, params=None, transform=None):
+    """
+    Esegue una GET JSON sull'API GitHub passando dalla cache persistente.
+    transform riduce la risposta ai soli dati da salvare in cache.
+    """
+    cached = github_cache.get(cache_key)
+    if cached and cached['fresh']:
+        return json.loads(cached['body']) if cached['status'] == 200 else None
+
+    try:
+        headers = {}
+        if cached and cached['status'] == 200 and cached['etag']:
+            headers['If-None-Match'] = cached['etag']
+
+        response = github_client.get(path, params=params, headers=headers)
+
+        if response.status_code == 304 and cached:
+            github_cache.touch(cache_key)
+            return json.loads(cached['body'])
+        elif response.status_code == 200:
+            data = response.json()
+            value = transform(data) if transform else data
+            github_cache.set(cache_key, 200, json.dumps(value), etag=response.headers.get('ETag'))
+            return value
+        elif response.status_code == 404:
+            github_cache.set(cache_key, 404)
+
+        # Altri errori (es. rate limit) non vengono salvati in cache
         return None
+    except requests.Timeout as e:
+        print(f"Timeout nella richiesta GitHub {path}: {e}")
+    except (requests.RequestException, ValueError) as e:
+        print(f"Errore nella richiesta GitHub {path}: {e}")
 
-def get_project_code_files(project):
+    if cached and cached['status'] == 200:
+        return json.loads(cached['body'])
+    return None
+
+def get_github_repo_manifest(username, repo_name):
     """
-    Recupera i file di codice principali dal repository del progetto
+    Recupera il branch predefinito e l'elenco completo dei file del repository
+    con due sole richieste (repository + git/trees ricorsivo).
+    Restituisce {'branch': ..., 'files': {path: size}} oppure None.
+    """
+    repo_info = fetch_github_json_cached(
+        f"repo:{username}/{repo_name}",
+        f"repos/{username}/{repo_name}",
+        transform=lambda data: {'default_branch': data.get('default_branch')}
+    )
+    if not repo_info:
+        return None
+
+    branch = repo_info.get('default_branch') or 'main'
+    tree = fetch_github_json_cached(
+        f"tree:{username}/{repo_name}@{branch}",
+        f"repos/{username}/{repo_name}/git/trees/{branch}",
+        params={'recursive': 1},
+        transform=lambda data: {
+            'files': {
+                item['path']: item.get('size', 0)
+                for item in data.get('tree', [])
+                if item.get('type') == 'blob'
+            },
+            'truncated': data.get('truncated', False)
+        }
+    )
+    if not tree:
+        return None
+
+    return {'branch': branch, 'files': tree['files']}
+
+def select_code_files(paths):
+    """
+    Sceglie i file da mostrare tra quelli presenti nel repository:
+    prima i nomi noti in CODE_FILE_PATTERNS (nella root), poi i file
+    più vicini alla root con le estensioni di CODE_FILE_EXTENSIONS
+    """
+    selected = [path for path in CODE_FILE_PATTERNS if path in paths]
+
+    candidates = []
+    for path in paths:
+        if path in selected or any('/' + folder in '/' + path for folder in IGNORED_CODE_DIRS):
+            continue
+        ext = path.split('.')[-1] if '.' in path else ''
+        if ext not in CODE_FILE_EXTENSIONS or path.endswith(('.min.js', '.min.css')):
+            continue
+        candidates.append((path.count('/'), CODE_FILE_EXTENSIONS.index(ext), path))
+
+    selected.extend(path for _, _, path in sorted(candidates))
+    return selected[:MAX_CODE_FILES]
+
+def iter_project_code_files(project):
+    """
+    Genera (percorso, contenuto, dimensione in byte) dei file di codice principali
+    del repository, in ordine di priorità e appena ciascun download è completato.
+    Con il manifest del repository vengono scaricati solo i file che esistono e
+    non quelli oltre CODE_FULL_FILE_MAX_BYTES (generati con contenuto None);
+    se il manifest non è disponibile si torna alla ricerca per nome.
     """
     if not project.github_repo:
-        return {}
+        return
     
     username, repo_name = extract_github_info(project.github_repo)
     if not username or not repo_name:
-        return {}
-    
-    # Lista dei file da cercare (in ordine di priorità)
-    file_patterns = [
-        # Python
-        'app.py', 'main.py', 'run.py', 'server.py',
-        'requirements.txt', 'setup.py', 'config.py',
-        # JavaScript/Node.js
-        'package.json', 'index.js', 'app.js', 'server.js',
-        # HTML/CSS
-        'index.html', 'style.css', 'styles.css',
-        # Altri
-        'README.md', 'Dockerfile', '.env.example'
+        return
+    
+    manifest = get_github_repo_manifest(username, repo_name)
+    if manifest is None:
+        yield from probe_project_code_files(username, repo_name)
+        return
+    
+    selected = select_code_files(manifest['files'])
+    executor = get_github_executor()
+    futures = [
+        executor.submit(get_github_file_content, username, repo_name, file_path, manifest['branch'])
+        if manifest['files'][file_path] <= CODE_FULL_FILE_MAX_BYTES else None
+        for file_path in selected
     ]
     
-    code_files = {}
+    try:
+        for index, file_path in enumerate(selected):
+            size = manifest['files'][file_path]
+            if futures[index] is None:
+                yield file_path, None, size
+                continue
+            content = futures[index].result()
+            # Il future non trattiene più il contenuto una volta consegnato
+            futures[index] = None
+            if content:
+                yield file_path, content, size
+    finally:
+        for future in futures:
+            if future is not None:
+                future.cancel()
+
+def get_project_code_files(project):
+    """
+    Recupera i file di codice principali dal repository del progetto
+    come dizionario {percorso: {'content': ..., 'language': ...}}
+    """
+    return {
+        file_path: {'content': content, 'language': get_file_language(file_path)}
+        for file_path, content, _ in iter_project_code_files(project)
+        if content is not None
+    }
+
+def probe_project_code_files(username, repo_name):
+    """
+    Cerca i file di CODE_FILE_PATTERNS uno per uno (in parallelo).
+    Genera (percorso, contenuto, dimensione) rispettando l'ordine di priorità
+    e il limite di 5 file.
+    """
+    executor = get_github_executor()
+    futures = [
+        executor.submit(get_github_file_content, username, repo_name, file_path)
+        for file_path in CODE_FILE_PATTERNS
+    ]
     
-    for file_path in file_patterns:
-        content = get_github_file_content(username, repo_name, file_path)
-        if content:
-            # Determina il linguaggio basato sull'estensione
-            ext = file_path.split('.')[-1] if '.' in file_path else ''
-            language_map = {
-                'py': 'python',
-                'js': 'javascript',
-                'html': 'html',
-                'css': 'css',
-                'md': 'markdown',
-                'json': 'json',
-                'txt': 'text'
-            }
-            language = language_map.get(ext, 'text')
-            
-            code_files[file_path] = {
-                'content': content,
-                'language': language
-            }
-            
-            # Limita a 5 file per non sovraccaricare la pagina
-            if len(code_files) >= 5:
-                break
+    found = 0
     
-    return code_files
+    try:
+        # Scorre i risultati in ordine di priorità, non di completamento
+        for index, file_path in enumerate(CODE_FILE_PATTERNS):
+            content = futures[index].result()
+            futures[index] = None
+            if content:
+                yield file_path, content, len(content.encode('utf-8'))
+                found += 1
+                
+                # Limita a 5 file per non sovraccaricare la pagina
+                if found >= MAX_CODE_FILES:
+                    break
+    finally:
+        # Annulla le richieste non ancora partite
+        for future in futures:
+            if future is not None:
+                future.cancel()
+
+def truncate_code(content, max_bytes):
+    """Tronca il contenuto a max_bytes byte UTF-8, fermandosi all'ultima riga completa"""
+    data = content.encode('utf-8')
+    if len(data) <= max_bytes:
+        return content
+    text = data[:max_bytes].decode('utf-8', 'ignore')
+    end = text.rfind('\n')
+    return text[:end + 1] if end >= 0 else text
+
+def iter_code_file_previews(project):
+    """
+    Anteprime dei file per la pagina del codice, preparate una alla volta
+    mentre la pagina viene inviata. Ogni file mostra al massimo
+    CODE_FILE_MAX_BYTES e l'intera pagina al massimo CODE_PAGE_MAX_BYTES:
+    il resto si carica su richiesta da project_code_file.
+    """
+    remaining = CODE_PAGE_MAX_BYTES
+    for file_path, content, size in iter_project_code_files(project):
+        language = get_file_language(file_path)
+        preview = {
+            'language': language,
+            'size': size,
+            'shown': 0,
+            'truncated': True,
+            'too_large': content is None,
+            'html': None
+        }
+        if content is not None:
+            text = truncate_code(content, min(CODE_FILE_MAX_BYTES, remaining))
+            preview['shown'] = len(text.encode('utf-8'))
+            preview['truncated'] = len(text) < len(content)
+            remaining -= preview['shown']
+            if text:
+                # Evidenziazione lato server, rifatta solo se l'anteprima cambia
+                preview['html'] = highlighter.highlight(text, language, file_path)
+        yield file_path, preview
 
 # Route principale - Homepage
 @app.route('/')
+@conditional(lambda: index_version())
+@page_cache.cached('index')
 def index():
     try:
-        # Verifica se il database esiste
-        with db.engine.connect() as conn:
-            conn.execute(db.text('SELECT 1'))
-        
         # Ottieni i progetti in evidenza dal database
         featured_projects = Project.query.filter_by(featured=True).order_by(Project.created_at.desc()).limit(3).all()
-        return render_template('index.html', featured_projects=featured_projects)
-    except Exception as e:
-        print(f"Errore nella homepage: {e}")
-        # Se c'è un errore, prova a inizializzare il database
-        try:
-            create_admin()
-            featured_projects = Project.query.filter_by(featured=True).order_by(Project.created_at.desc()).limit(3).all()
-            return render_template('index.html', featured_projects=featured_projects)
-        except Exception as e2:
-            print(f"Errore critico: {e2}")
-            return render_template('index.html', featured_projects=[])
+        return remember_page('index', render_template(
+            'index.html',
+            featured_projects=featured_projects,
+            review_summary=get_review_summary()
+        ))
+    except SQLAlchemyError as e:
+        return database_error_page('index', e, 'index.html', featured_projects=[])
 
 # Route per la pagina Chi Sono
 @app.route('/about')
@@ -173,27 +696,38 @@ def about():
 
 # Route per la pagina Progetti
 @app.route('/projects')
+@conditional(lambda: projects_version())
+@page_cache.cached('projects')
 def projects():
+    tech, category = get_project_filters()
+    query = request.args.get('q', '').strip()
+    # Solo la pagina senza filtri viene conservata come fallback
+    page_key = 'projects' if not request.args else f'projects?{request.query_string.decode()}'
+    context = {
+        'active_tech': tech,
+        'active_category': category,
+        'active_query': query,
+        'category_labels': CATEGORY_LABELS
+    }
     try:
-        # Verifica se il database esiste
-        with db.engine.connect() as conn:
-            conn.execute(db.text('SELECT 1'))
-        
-        projects_list = Project.query.order_by(Project.created_at.desc()).all()
-        return render_template('projects.html', projects=projects_list)
-    except Exception as e:
-        print(f"Errore nella pagina progetti: {e}")
-        # Se c'è un errore, prova a inizializzare il database
-        try:
-            create_admin()
-            projects_list = Project.query.order_by(Project.created_at.desc()).all()
-            return render_template('projects.html', projects=projects_list)
-        except Exception as e2:
-            print(f"Errore critico: {e2}")
-            return render_template('projects.html', projects=[])
+        projects_query = filter_projects(Project.query, tech, category)
+        if query:
+            # Risultati della ricerca in ordine di rilevanza
+            ranked_ids = [item_id for _, item_id, _ in search.search_ids(query, ['project'], limit=MAX_LIMIT)]
+            projects_list = projects_query.filter(Project.id.in_(ranked_ids)).all()
+            projects_list.sort(key=lambda project: ranked_ids.index(project.id))
+        else:
+            projects_list = projects_query.order_by(Project.created_at.desc()).all()
+        html = render_template('projects.html', projects=projects_list, filter_counts=get_filter_counts(), **context)
+        if page_key == 'projects':
+            remember_page(page_key, html)
+        return html
+    except SQLAlchemyError as e:
+        return database_error_page(page_key, e, 'projects.html', projects=[], filter_counts=None, **context)
 
 # Route per la pagina Contatti
 @app.route('/contact', methods=['GET', 'POST'])
+@write_limiter.limit('contact')
 def contact():
     if request.method == 'POST':
         # Gestione del form di contatto
@@ -207,8 +741,9 @@ def contact():
             flash('Tutti i campi sono obbligatori!', 'error')
             return render_template('contact.html')
         
-        # Verifica email
-        is_valid_email, email_result = validate_email_address(email)
+        # Verifica email (in modalità async il dominio viene verificato dopo il salvataggio)
+        check_later = email_check.DELIVERABILITY_MODE == 'async'
+        is_valid_email, email_result = validate_email_address(email, check_deliverability=not check_later)
         if not is_valid_email:
             flash(f'Email non valida: {email_result}', 'error')
             return render_template('contact.html')
@@ -223,6 +758,9 @@ def contact():
         
         db.session.add(contact_message)
         db.session.commit()
+        if check_later:
+            domain = email_result.rsplit('@', 1)[1]
+            email_check.check_message_later(app, contact_message.id, domain)
         
         flash('Grazie per il tuo messaggio! Ti risponderò presto.', 'success')
         return redirect(url_for('contact'))
@@ -234,13 +772,53 @@ def contact():
 def project_code(project_id):
     project = Project.query.get_or_404(project_id)
     
-    # Recupera i file di codice dal repository GitHub
-    code_files = get_project_code_files(project)
+    # La pagina viene inviata a pezzi: l'intestazione subito, poi un file alla volta
+    # man mano che viene scaricato, troncato ed evidenziato
+    return app.response_class(stream_template(
+        'project_code.html',
+        project=project,
+        code_files=iter_code_file_previews(project)
+    ))
+
+# File completo per il pulsante "Mostra file completo" della pagina del codice
+@app.route('/project/<int:project_id>/code/file')
+def project_code_file(project_id):
+    project = Project.query.get_or_404(project_id)
+    file_path = request.args.get('path', '')
+    
+    username, repo_name = extract_github_info(project.github_repo) if project.github_repo else (None, None)
+    if not username or not repo_name:
+        abort(404)
+    
+    # Solo file del repository del progetto, non percorsi arbitrari sull'API GitHub
+    manifest = get_github_repo_manifest(username, repo_name)
+    if manifest is not None:
+        if file_path not in manifest['files']:
+            abort(404)
+        if manifest['files'][file_path] > CODE_FULL_FILE_MAX_BYTES:
+            abort(413)
+        content = get_github_file_content(username, repo_name, file_path, manifest['branch'])
+    elif file_path in CODE_FILE_PATTERNS:
+        content = get_github_file_content(username, repo_name, file_path)
+    else:
+        abort(404)
     
-    return render_template('project_code.html', project=project, code_files=code_files)
+    if content is None:
+        abort(404)
+    
+    response = app.response_class(
+        highlighter.highlight(content, get_file_language(file_path), file_path),
+        mimetype='text/html'
+    )
+    response.headers['Cache-Control'] = 'public, max-age=300'
+    response.add_etag()
+    return response.make_conditional(request)
 
 # Route per la pagina Recensioni
 @app.route('/reviews', methods=['GET', 'POST'])
+@write_limiter.limit('reviews')
+@conditional(lambda: reviews_version())
+@page_cache.cached('reviews')
 def reviews():
     if request.method == 'POST':
         # Gestione del form di recensione
@@ -276,20 +854,20 @@ def reviews():
         flash('Grazie per la tua recensione! Sarà visibile dopo l\'approvazione.', 'success')
         return redirect(url_for('reviews'))
     
-    # Ottieni recensioni approvate per la visualizzazione
+    # Ottieni una pagina di recensioni approvate e il riepilogo delle valutazioni
     try:
-        approved_reviews = Review.query.filter_by(approved=True).order_by(Review.created_at.desc()).all()
-        
-        # Calcola la media delle stelle
-        if approved_reviews:
-            total_rating = sum(review.rating for review in approved_reviews)
-            average_rating = round(total_rating / len(approved_reviews), 1)
-        else:
-            average_rating = 0
-        
-        return render_template('reviews.html', reviews=approved_reviews, average_rating=average_rating)
-    except Exception as e:
+        page = get_keyset_page(Review.query.filter_by(approved=True), Review)
+        summary = get_review_summary()
+        return render_template(
+            'reviews.html',
+            reviews=page.items,
+            page=page,
+            average_rating=summary['average'],
+            review_summary=summary
+        )
+    except SQLAlchemyError as e:
         print(f"Errore nella pagina recensioni: {e}")
+        db.session.rollback()
         return render_template('reviews.html', reviews=[], average_rating=0)
 
 # Admin Routes
@@ -323,8 +901,13 @@ def admin_dashboard():
         flash('Accesso non autorizzato!', 'error')
         return redirect(url_for('index'))
     
-    projects = Project.query.order_by(Project.created_at.desc()).all()
-    return render_template('admin/dashboard.html', projects=projects)
+    page = get_keyset_page(Project.query, Project)
+    return render_template(
+        'admin/dashboard.html',
+        projects=page.items,
+        page=page,
+        total_projects=Project.query.count()
+    )
 
 @app.route('/admin/projects/new', methods=['GET', 'POST'])
 @login_required
@@ -354,12 +937,19 @@ def admin_new_project():
         technologies = request.form.get('technologies', '').strip()
         if technologies:
             tech_list = [tech.strip() for tech in technologies.split(',') if tech.strip()]
+            error = invalid_technologies_message(tech_list)
+            if error:
+                flash(error, 'error')
+                return render_template('admin/project_form.html')
             project.set_technologies_list(tech_list)
         else:
             project.set_technologies_list([])
+        # Varianti WebP e di fallback per srcset (riusate se l'immagine non è cambiata)
+        project.set_image_info(images.process_image(app.static_folder, project.image))
         
         db.session.add(project)
         db.session.commit()
+        page_cache.invalidate('index', 'projects')
         flash('Progetto creato con successo!', 'success')
         return redirect(url_for('admin_dashboard'))
     
@@ -385,12 +975,18 @@ def admin_edit_project(project_id):
         technologies = request.form.get('technologies', '').strip()
         if technologies:
             tech_list = [tech.strip() for tech in technologies.split(',') if tech.strip()]
+            error = invalid_technologies_message(tech_list)
+            if error:
+                flash(error, 'error')
+                return render_template('admin/project_form.html', project=project)
             project.set_technologies_list(tech_list)
         else:
             project.set_technologies_list([])
+        project.set_image_info(images.process_image(app.static_folder, project.image))
         project.updated_at = datetime.utcnow()
         
         db.session.commit()
+        page_cache.invalidate('index', 'projects')
         flash('Progetto aggiornato con successo!', 'success')
         return redirect(url_for('admin_dashboard'))
     
@@ -406,6 +1002,7 @@ def admin_delete_project(project_id):
     project = Project.query.get_or_404(project_id)
     db.session.delete(project)
     db.session.commit()
+    page_cache.invalidate('index', 'projects')
     flash('Progetto eliminato con successo!', 'success')
     return redirect(url_for('admin_dashboard'))
 
@@ -417,8 +1014,23 @@ def admin_messages():
         flash('Accesso non autorizzato!', 'error')
         return redirect(url_for('index'))
     
-    messages = ContactMessage.query.order_by(ContactMessage.created_at.desc()).all()
-    return render_template('admin/messages.html', messages=messages)
+    query = request.args.get('q', '').strip()
+    if query:
+        page = get_search_page(query, 'message')
+    else:
+        page = get_keyset_page(ContactMessage.query, ContactMessage)
+    total_messages, unread_messages = db.session.query(
+        func.count(ContactMessage.id),
+        func.coalesce(func.sum(case((ContactMessage.read == False, 1), else_=0)), 0)
+    ).one()
+    return render_template(
+        'admin/messages.html',
+        messages=page.items,
+        page=page,
+        query=query,
+        total_messages=total_messages,
+        unread_messages=unread_messages
+    )
 
 # Admin Users Routes
 @app.route('/admin/users')
@@ -533,8 +1145,24 @@ def admin_reviews():
         flash('Accesso non autorizzato!', 'error')
         return redirect(url_for('index'))
     
-    reviews = Review.query.order_by(Review.created_at.desc()).all()
-    return render_template('admin/reviews.html', reviews=reviews)
+    query = request.args.get('q', '').strip()
+    if query:
+        page = get_search_page(query, 'review')
+    else:
+        page = get_keyset_page(Review.query, Review)
+    total_reviews, approved_reviews = db.session.query(
+        func.count(Review.id),
+        func.coalesce(func.sum(case((Review.approved == True, 1), else_=0)), 0)
+    ).one()
+    return render_template(
+        'admin/reviews.html',
+        reviews=page.items,
+        page=page,
+        query=query,
+        total_reviews=total_reviews,
+        approved_reviews=approved_reviews,
+        pending_reviews=total_reviews - approved_reviews
+    )
 
 @app.route('/admin/reviews/<int:review_id>/approve', methods=['POST'])
 @login_required
@@ -547,6 +1175,7 @@ def admin_approve_review(review_id):
         review = Review.query.get_or_404(review_id)
         review.approved = True
         db.session.commit()
+        page_cache.invalidate('index', 'reviews')
         flash('Recensione approvata con successo!', 'success')
     except Exception as e:
         print(f"Errore durante l'approvazione della recensione: {e}")
@@ -565,6 +1194,7 @@ def admin_delete_review(review_id):
         review = Review.query.get_or_404(review_id)
         db.session.delete(review)
         db.session.commit()
+        page_cache.invalidate('index', 'reviews')
         flash('Recensione eliminata con successo!', 'success')
     except Exception as e:
         print(f"Errore durante l'eliminazione della recensione: {e}")
@@ -598,26 +1228,169 @@ def admin_delete_message(message_id):
     flash('Messaggio eliminato con successo!', 'success')
     return redirect(url_for('admin_messages'))
 
+def bulk_moderation(kind, endpoint):
+    """
+    Azione in blocco su una selezione (id e/o filtro) con una sola UPDATE o
+    DELETE. Con un corpo JSON risponde in JSON con il numero di righe
+    modificate, altrimenti con un messaggio flash e il redirect alla pagina.
+    """
+    if request.is_json:
+        data = request.get_json(silent=True)
+        # Un corpo JSON che non è un oggetto equivale a una selezione vuota
+        data = data if isinstance(data, dict) else {}
+        ids = data.get('ids')
+    else:
+        data = request.form
+        ids = request.form.getlist('ids')
+
+    try:
+        criteria = moderation.selection_criteria(kind, ids, data.get('status'), data.get('older_than'))
+        count, message = moderation.apply(kind, data.get('action'), criteria)
+        db.session.commit()
+    except moderation.InvalidSelection as e:
+        if request.is_json:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        flash(str(e), 'error')
+        return redirect(url_for(endpoint))
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        print(f"Errore durante l'azione in blocco su {kind}: {e}")
+        if request.is_json:
+            return jsonify({'success': False, 'error': 'Errore del database'}), 500
+        flash('Errore durante l\'operazione in blocco!', 'error')
+        return redirect(url_for(endpoint))
+
+    if kind == 'review' and count:
+        page_cache.invalidate('index', 'reviews')
+    if request.is_json:
+        return jsonify({'success': True, 'action': data.get('action'), 'affected': count})
+    flash(message, 'success')
+    return redirect(url_for(endpoint))
+
+@app.route('/admin/reviews/bulk', methods=['POST'])
+@login_required
+def admin_bulk_reviews():
+    if not current_user.is_admin:
+        flash('Accesso non autorizzato!', 'error')
+        return redirect(url_for('index'))
+    return bulk_moderation('review', 'admin_reviews')
+
+@app.route('/admin/messages/bulk', methods=['POST'])
+@login_required
+def admin_bulk_messages():
+    if not current_user.is_admin:
+        flash('Accesso non autorizzato!', 'error')
+        return redirect(url_for('index'))
+    return bulk_moderation('message', 'admin_messages')
+
 # API Routes per AJAX
 @app.route('/api/projects')
+@conditional(lambda: projects_version(), cache_control='public, max-age=60')
 def api_projects():
-    projects = Project.query.all()
-    return jsonify([project.to_dict() for project in projects])
+    tech, category = get_project_filters()
+    try:
+        page = get_keyset_page(filter_projects(Project.query, tech, category), Project)
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(keyset_page_to_dict(page))
 
 @app.route('/api/messages')
 def api_messages():
-    messages = ContactMessage.query.all()
-    return jsonify([message.to_dict() for message in messages])
+    try:
+        page = get_keyset_page(ContactMessage.query, ContactMessage)
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(keyset_page_to_dict(page))
+
+@app.route('/api/search')
+def api_search():
+    """Ricerca full-text: i messaggi e le recensioni non approvate solo per gli admin"""
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': 'Parametro q obbligatorio'}), 400
+
+    is_admin = current_user.is_authenticated and current_user.is_admin
+    kinds = [kind for kind in request.args.get('type', '').split(',') if kind] or None
+    try:
+        page = search.search(
+            query,
+            kinds=kinds,
+            public_only=not is_admin,
+            cursor=request.args.get('cursor'),
+            limit=parse_limit(request.args.get('limit'))
+        )
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
+
+    return jsonify({
+        'items': [
+            {'type': result.kind, 'score': round(result.score, 4), **result.item.to_dict()}
+            for result in page.items
+        ],
+        'next_cursor': page.next_cursor,
+        'limit': page.limit
+    })
+
+# Endpoint di stato per il monitoraggio e il load balancer
+@app.route('/healthz')
+def healthz():
+    """Liveness: il processo risponde, senza toccare il database"""
+    return jsonify({'status': 'ok'})
+
+@app.route('/readyz')
+def readyz():
+    """Readiness: il database è raggiungibile"""
+    # Evita di interrogare il database a ogni probe ravvicinato
+    checked_at = database_status['checked_at']
+    if checked_at is None or time.time() - checked_at > READINESS_CACHE_SECONDS:
+        check_database()
+
+    if database_status['ready']:
+        return jsonify({'status': 'ready', 'database': 'ok'})
+    return jsonify({'status': 'unavailable', 'database': database_status['error']}), 503, {'Retry-After': '30'}
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Metriche in formato Prometheus: richiede il login admin oppure il token METRICS_TOKEN"""
+    authorization = request.headers.get('Authorization', '')
+    token_valid = bool(METRICS_TOKEN) and hmac.compare_digest(authorization, f'Bearer {METRICS_TOKEN}')
+    if not token_valid:
+        if not current_user.is_authenticated:
+            return login_manager.unauthorized()
+        if not current_user.is_admin:
+            flash('Accesso non autorizzato!', 'error')
+            return redirect(url_for('index'))
+
+    return app.response_class(
+        metrics.render(),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+        headers={'Cache-Control': 'no-store'}
+    )
 
 # Route per inizializzare il database (solo per debug)
 @app.route('/init-db')
 def init_database():
     try:
         create_admin()
+        page_cache.clear()
+        page_cache.invalidate('index', 'projects', 'reviews')
         return jsonify({'success': True, 'message': 'Database inizializzato con successo'})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+# Cursore di paginazione non valido nelle pagine admin
+@app.errorhandler(InvalidCursor)
+def invalid_cursor(error):
+    flash('Pagina non valida, mostrati gli elementi più recenti.', 'error')
+    return redirect(request.path)
+
+# Troppe richieste dallo stesso client (429) o troppe scritture contemporanee (503 del limitatore)
+@app.errorhandler(429)
+@app.errorhandler(WriteBusy)
+def too_many_requests(error):
+    headers = {'Retry-After': str(error.retry_after)} if getattr(error, 'retry_after', None) else {}
+    return render_template('429.html', error=error), error.code, headers
+
 # Route per gestire errori 404
 @app.errorhandler(404)
 def not_found(error):
@@ -660,6 +1433,13 @@ def create_admin():
             except Exception as e2:
                 print(f"❌ Errore critico nella creazione tabelle: {e2}")
 
+# Verifica del database una sola volta all'avvio dell'applicazione
+with app.app_context():
+    if check_database():
+        print("✅ Database raggiungibile")
+    else:
+        print(f"⚠️ Database non raggiungibile all'avvio: {database_status['error']}")
+
 if __name__ == '__main__':
     create_admin()  # Crea database e admin
     # Avvia il server per deployment
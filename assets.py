@@ -0,0 +1,214 @@
+"""
+Pipeline degli asset statici: minificazione, nomi con hash e precompressione.
+
+I fogli di stile e gli script in ASSETS vengono minificati e scritti in
+static/dist con l'hash del contenuto nel nome (es. css/style.3f2a9c1b0d4e.css),
+insieme alle copie precompresse .gz e, se il modulo brotli è installato, .br.
+Un url_for('static', filename='css/style.css') nei template punta
+automaticamente al file con hash, che viene servito con cache immutabile di
+un anno: le visite successive non riscaricano gli asset e un file modificato
+ottiene semplicemente un nome nuovo.
+
+La build è deterministica e idempotente: all'avvio dell'app vengono scritti
+solo i file che mancano, quindi più worker che partono insieme non si
+danneggiano a vicenda. Per generarla prima dell'avvio:
+    python assets.py
+
+ASSETS_ENABLED=0 disattiva la pipeline (i file vengono serviti così come sono).
+"""
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+import re
+from flask import request, send_from_directory, abort
+
+try:
+    import brotli
+except ImportError:  # Senza brotli vengono generate solo le copie .gz
+    brotli = None
+
+# Asset da elaborare, nell'ordine in cui vengono costruiti: un file che ne
+# importa un altro (admin.css importa style.css) deve venire dopo
+ASSETS = ['css/style.css', 'css/pygments.css', 'css/admin.css', 'js/script.js']
+
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+HASH_LENGTH = 12
+MAX_AGE = 365 * 24 * 3600
+
+# Codifiche precompresse in ordine di preferenza: (nome, estensione)
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+_CSS_COMMENT = re.compile(r'/\*.*?\*/', re.S)
+_CSS_URL = re.compile(r'''url\(\s*(['"]?)([^'")]+)\1\s*\)''')
+
+
+def minify_css(css):
+    """Rimuove commenti e spazi superflui senza cambiare i selettori"""
+    css = _CSS_COMMENT.sub('', css)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};,>])\s*', r'\1', css)
+    # Solo gli spazi dopo i due punti: '.a :hover' è diverso da '.a:hover'
+    css = re.sub(r':\s+', ':', css)
+    return css.replace(';}', '}').strip()
+
+
+def minify_js(js):
+    """
+    Minificazione prudente: toglie indentazione, righe vuote e commenti su
+    riga intera, ma mantiene gli a capo (niente problemi con l'inserimento
+    automatico dei punti e virgola)
+    """
+    lines = []
+    for line in js.splitlines():
+        line = line.strip()
+        if line and not line.startswith('//'):
+            lines.append(line)
+    return '\n'.join(lines) + '\n'
+
+
+def rewrite_css_urls(css, source, manifest):
+    """Punta i riferimenti url(...) ad altri asset ai rispettivi file con hash"""
+    def replace(match):
+        quote, target = match.groups()
+        resolved = posixpath.normpath(posixpath.join(posixpath.dirname(source), target))
+        if resolved not in manifest:
+            return match.group(0)
+        hashed = posixpath.relpath(manifest[resolved], posixpath.dirname(source))
+        return f'url({quote}{hashed}{quote})'
+    return _CSS_URL.sub(replace, css)
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _write_if_missing(path, data):
+    # Il nome contiene l'hash del contenuto: un file esistente è già quello giusto
+    if os.path.exists(path):
+        return False
+    _write_atomic(path, data)
+    return True
+
+
+def load_manifest(static_folder):
+    try:
+        with open(os.path.join(static_folder, DIST_DIR, MANIFEST_NAME), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def build(static_folder):
+    """
+    Genera gli asset minificati, con hash e precompressi in static/dist.
+    Restituisce il manifest {percorso originale: percorso con hash}.
+    """
+    dist = os.path.join(static_folder, DIST_DIR)
+    manifest = {}
+    written = 0
+
+    for source in ASSETS:
+        path = os.path.join(static_folder, source)
+        if not os.path.exists(path):
+            continue
+        with open(path, encoding='utf-8') as f:
+            text = f.read()
+
+        if source.endswith('.css'):
+            text = minify_css(rewrite_css_urls(text, source, manifest))
+        elif source.endswith('.js'):
+            text = minify_js(text)
+        data = text.encode('utf-8')
+
+        digest = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+        base, ext = posixpath.splitext(source)
+        hashed = f'{base}.{digest}{ext}'
+        manifest[source] = hashed
+
+        target = os.path.join(dist, hashed)
+        written += _write_if_missing(target, data)
+        written += _write_if_missing(f'{target}.gz', gzip.compress(data, compresslevel=9, mtime=0))
+        if brotli is not None:
+            written += _write_if_missing(f'{target}.br', brotli.compress(data, quality=11))
+
+    if load_manifest(static_folder) != manifest:
+        _write_atomic(os.path.join(dist, MANIFEST_NAME), json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    if written:
+        print(f"✅ Asset statici generati: {written} file in {dist}")
+    return manifest
+
+
+def preferred_encoding(path):
+    """Codifica precompressa da inviare in base ad Accept-Encoding (None = file originale)"""
+    for encoding, suffix in ENCODINGS:
+        if request.accept_encodings[encoding] > 0 and os.path.exists(path + suffix):
+            return encoding, suffix
+    return None, ''
+
+
+class Assets:
+    """Collega la pipeline a un'app Flask: url_for con hash e route per static/dist"""
+
+    def __init__(self, app=None, enabled=True):
+        self.enabled = enabled
+        self.manifest = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        if not self.enabled:
+            return
+        try:
+            self.manifest = build(app.static_folder)
+        except OSError as e:
+            # Senza build l'app funziona comunque con i file originali
+            print(f"⚠️ Impossibile generare gli asset statici: {e}")
+            return
+
+        app.url_defaults(self._hashed_url)
+        app.add_url_rule(
+            f'{app.static_url_path}/{DIST_DIR}/<path:filename>',
+            endpoint='dist_static',
+            view_func=lambda filename: self.serve(app, filename)
+        )
+
+    def _hashed_url(self, endpoint, values):
+        if endpoint == 'static' and values.get('filename') in self.manifest:
+            values['filename'] = f"{DIST_DIR}/{self.manifest[values['filename']]}"
+
+    def serve(self, app, filename):
+        """File con hash: cache immutabile e variante precompressa se il client la accetta"""
+        dist = os.path.join(app.static_folder, DIST_DIR)
+        if filename.endswith(('.gz', '.br')) or filename == MANIFEST_NAME:
+            abort(404)
+
+        encoding, suffix = preferred_encoding(os.path.join(dist, filename))
+        # Il tipo è quello del file originale, anche quando si invia la copia compressa
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        response = send_from_directory(dist, filename + suffix, mimetype=mimetype, max_age=MAX_AGE)
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        response.vary.add('Accept-Encoding')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        return response
+
+
+def create_assets_from_env(app):
+    """Attiva la pipeline leggendo ASSETS_ENABLED"""
+    return Assets(app, enabled=os.environ.get('ASSETS_ENABLED', '1') != '0')
+
+
+if __name__ == '__main__':
+    static_folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+    for source, hashed in build(static_folder).items():
+        print(f"  {source} -> {DIST_DIR}/{hashed}")
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Benchmark della route /project/<id>/code contro la finta API GitHub.
+
+Avvia fake_github.FakeGitHub, crea un database temporaneo con un progetto
+per ogni repository di esempio e misura la route con il test client di Flask
+in due condizioni:
+  - cache fredda: la cache GitHub viene svuotata prima di ogni richiesta
+  - cache calda: la cache è già popolata da un primo giro di richieste
+Come riferimento viene misurata anche /projects.
+
+Uso:
+    python bench_code_viewer.py --requests 50 --latency 0.05 --concurrency 4
+"""
+
+import argparse
+import json
+import math
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Database e cache temporanei: vanno configurati prima di importare l'app
+WORK_DIR = tempfile.mkdtemp(prefix='bench-code-viewer-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(WORK_DIR, 'bench.db')}"
+os.environ['GITHUB_CACHE_PATH'] = os.path.join(WORK_DIR, 'github_cache.db')
+os.environ.setdefault('GITHUB_MAX_RETRIES', '2')
+os.environ.setdefault('GITHUB_BACKOFF', '0.01')
+
+import github_client
+from app import app, db, github_cache
+from models import Project
+from fake_github import FakeGitHub
+
+
+def percentile(values, p):
+    """Percentile con il metodo nearest-rank"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(p / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(name, latencies, elapsed, upstream_requests):
+    """Riassume le latenze (in millisecondi) di uno scenario"""
+    count = len(latencies)
+    return {
+        'scenario': name,
+        'requests': count,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+        'requests_per_sec': round(count / elapsed, 2) if elapsed else 0.0,
+        'github_requests_per_page': round(upstream_requests / count, 2) if count else 0.0
+    }
+
+
+def run_scenario(name, urls, fake, total, concurrency, before_each=None):
+    """Esegue total richieste (a rotazione sugli URL) e ne misura la latenza"""
+    fake.reset_stats()
+
+    def worker(i):
+        if before_each:
+            before_each()
+        with app.test_client() as client:
+            start = time.perf_counter()
+            response = client.get(urls[i % len(urls)])
+            # La pagina del codice è in streaming: i file vengono scaricati mentre si legge il corpo
+            response.get_data()
+            latency = time.perf_counter() - start
+        if response.status_code != 200:
+            print(f"⚠️ {urls[i % len(urls)]} ha restituito {response.status_code}")
+        return latency
+
+    start = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            latencies = list(pool.map(worker, range(total)))
+    else:
+        latencies = [worker(i) for i in range(total)]
+    elapsed = time.perf_counter() - start
+
+    return summarize(name, latencies, elapsed, fake.requests_total)
+
+
+def seed_projects(repos):
+    """Crea un progetto per ogni repository di esempio"""
+    with app.app_context():
+        db.create_all()
+        ids = []
+        for full_name in sorted(repos):
+            project = Project(
+                title=full_name,
+                description=f'Progetto di benchmark per {full_name}',
+                github_repo=f'https://github.com/{full_name}'
+            )
+            db.session.add(project)
+            db.session.commit()
+            ids.append(project.id)
+        return ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark del visualizzatore di codice')
+    parser.add_argument('--requests', type=int, default=40, help='richieste per scenario')
+    parser.add_argument('--concurrency', type=int, default=1)
+    parser.add_argument('--latency', type=float, default=0.05, help='latenza simulata di GitHub (secondi)')
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--json', help='salva i risultati in questo file JSON')
+    args = parser.parse_args()
+
+    fake = FakeGitHub(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, seed=42)
+    github_client.GITHUB_API_URL = fake.start()
+
+    try:
+        project_ids = seed_projects(fake.repos)
+        code_urls = [f'/project/{project_id}/code' for project_id in project_ids]
+
+        print(f"🚀 Benchmark /project/<id>/code ({args.requests} richieste per scenario, "
+              f"latenza GitHub {args.latency * 1000:.0f} ms, concorrenza {args.concurrency})")
+
+        results = [
+            run_scenario('code viewer (cache fredda)', code_urls, fake, args.requests,
+                         args.concurrency, before_each=github_cache.clear),
+        ]
+
+        # Popola la cache con una richiesta per progetto prima dello scenario a cache calda
+        with app.test_client() as client:
+            for url in code_urls:
+                client.get(url).get_data()
+
+        results += [
+            run_scenario('code viewer (cache calda)', code_urls, fake, args.requests, args.concurrency),
+            run_scenario('/projects (riferimento)', ['/projects'], fake, args.requests, args.concurrency),
+        ]
+
+        print()
+        print(f"{'Scenario':<30} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>9} {'GitHub/pag':>11}")
+        print('-' * 82)
+        for r in results:
+            print(f"{r['scenario']:<30} {r['p50_ms']:>9} {r['p95_ms']:>9} {r['p99_ms']:>9} "
+                  f"{r['requests_per_sec']:>9} {r['github_requests_per_page']:>11}")
+
+        if args.json:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                json.dump({'config': vars(args), 'results': results}, f, indent=2)
+            print(f"\n📄 Risultati salvati in {args.json}")
+
+        # A cache fredda ogni pagina deve interrogare GitHub: se no il benchmark non misura nulla
+        if results[0]['github_requests_per_page'] == 0:
+            print("❌ Nessuna richiesta a GitHub a cache fredda: il corpo delle pagine non è stato letto")
+            return 1
+        return 0
+    finally:
+        fake.stop()
+        shutil.rmtree(WORK_DIR, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
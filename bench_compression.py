@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Benchmark della compressione delle risposte: CPU spesa contro byte risparmiati.
+
+Crea un database temporaneo con progetti e recensioni di esempio, raccoglie
+le risposte non compresse delle pagine principali e delle API con il test
+client di Flask e le comprime con gzip (livelli 1-9) e, se il modulo brotli
+è installato, con Brotli (qualità 0-11), misurando per ogni livello:
+  - dimensione totale compressa e rapporto rispetto all'originale
+  - tempo medio di compressione per risposta
+  - byte risparmiati per millisecondo di CPU
+
+Uso:
+    python bench_compression.py --projects 30 --repeat 50 --json bench_output.json
+"""
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+
+# Database temporaneo e compressione disattivata: vanno configurati prima di importare l'app
+WORK_DIR = tempfile.mkdtemp(prefix='bench-compression-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(WORK_DIR, 'bench.db')}"
+os.environ['PAGE_CACHE_BACKEND'] = 'none'
+os.environ['COMPRESSION_ENABLED'] = '0'
+
+from app import app, db
+from models import Project, Review
+from compression import compress, brotli
+
+URLS = ['/', '/about', '/projects', '/reviews', '/contact', '/api/projects', '/api/projects?limit=50']
+
+GZIP_LEVELS = [1, 3, 6, 9]
+BROTLI_QUALITIES = [0, 2, 4, 5, 6, 9, 11]
+
+
+def seed(projects):
+    """Crea progetti e recensioni con testi di lunghezza realistica"""
+    with app.app_context():
+        db.create_all()
+        for i in range(projects):
+            project = Project(
+                title=f'Progetto di esempio {i}',
+                description=f'Applicazione web numero {i} con autenticazione, API REST e pannello di amministrazione. ' * 3,
+                category=['web', 'mobile', 'desktop'][i % 3],
+                github_repo=f'https://github.com/demo/progetto-{i}',
+                featured=i < 6
+            )
+            project.set_technologies_list(['Python', 'Flask', 'SQLAlchemy', ['React', 'Vue', 'Svelte'][i % 3]])
+            db.session.add(project)
+            db.session.add(Review(
+                name=f'Cliente {i}',
+                rating=4 + i % 2,
+                comment='Lavoro preciso, consegnato nei tempi e con una comunicazione sempre chiara. ' * 2,
+                approved=True
+            ))
+        db.session.commit()
+
+
+def collect_bodies():
+    """Corpi non compressi delle risposte da misurare"""
+    bodies = {}
+    with app.test_client() as client:
+        for url in URLS:
+            response = client.get(url)
+            if response.status_code != 200:
+                print(f"⚠️ {url} ha restituito {response.status_code}")
+                continue
+            bodies[url] = response.get_data()
+    return bodies
+
+
+def measure(bodies, encoding, level, repeat):
+    """Comprime ogni corpo repeat volte e riassume dimensioni e tempi"""
+    original = compressed = 0
+    elapsed = 0.0
+    for data in bodies.values():
+        start = time.perf_counter()
+        for _ in range(repeat):
+            output = compress(data, encoding, level=level, brotli_quality=level)
+        elapsed += (time.perf_counter() - start) / repeat
+        original += len(data)
+        compressed += len(output)
+
+    ms_per_response = elapsed * 1000 / len(bodies)
+    return {
+        'encoding': encoding,
+        'level': level,
+        'original_bytes': original,
+        'compressed_bytes': compressed,
+        'ratio': round(compressed / original, 3),
+        'ms_per_response': round(ms_per_response, 3),
+        'saved_bytes_per_ms': round((original - compressed) / (elapsed * 1000)) if elapsed else 0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark della compressione delle risposte')
+    parser.add_argument('--projects', type=int, default=30, help='progetti e recensioni di esempio')
+    parser.add_argument('--repeat', type=int, default=50, help='compressioni per risposta e livello')
+    parser.add_argument('--json', help='salva i risultati in questo file JSON')
+    args = parser.parse_args()
+
+    try:
+        seed(args.projects)
+        bodies = collect_bodies()
+        total = sum(len(data) for data in bodies.values())
+        print(f"🚀 Benchmark compressione: {len(bodies)} risposte, {total} byte non compressi, "
+              f"{args.repeat} ripetizioni")
+        for url, data in bodies.items():
+            print(f"  {url:<28} {len(data):>8} byte")
+
+        results = [measure(bodies, 'gzip', level, args.repeat) for level in GZIP_LEVELS]
+        if brotli is not None:
+            results += [measure(bodies, 'br', quality, args.repeat) for quality in BROTLI_QUALITIES]
+        else:
+            print("⚠️ Modulo brotli non installato: misurato solo gzip")
+
+        print()
+        print(f"{'Codifica':<10} {'Livello':>8} {'Byte':>10} {'Rapporto':>9} {'ms/risp':>9} {'Byte risp./ms':>14}")
+        print('-' * 64)
+        for r in results:
+            print(f"{r['encoding']:<10} {r['level']:>8} {r['compressed_bytes']:>10} {r['ratio']:>9} "
+                  f"{r['ms_per_response']:>9} {r['saved_bytes_per_ms']:>14}")
+
+        if args.json:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                json.dump({'config': vars(args), 'results': results}, f, indent=2)
+            print(f"\n📄 Risultati salvati in {args.json}")
+    finally:
+        shutil.rmtree(WORK_DIR, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+"""
+Verifica della consegnabilità degli indirizzi email con cache per dominio.
+
+La sintassi viene sempre controllata subito, senza rete. La verifica DNS
+(record MX, con fallback su A/AAAA) viene fatta una sola volta per dominio e
+conservata in una cache in memoria con TTL distinti per esito positivo e
+negativo. Ogni verifica in una richiesta ha un tempo massimo: se il DNS non
+risponde entro EMAIL_DNS_TIMEOUT l'indirizzo viene accettato con esito
+'unknown' e la risoluzione prosegue in background, aggiornando la cache.
+
+Modalità (variabile EMAIL_DELIVERABILITY_MODE):
+    sync   la verifica DNS avviene durante la richiesta (default)
+    async  il form di contatto viene accettato dopo il controllo sintattico;
+           l'esito viene calcolato in background e salvato sul messaggio
+           (ContactMessage.email_status)
+    off    solo controllo sintattico
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+import dns.resolver
+from email_validator import EmailUndeliverableError
+from email_validator.deliverability import validate_email_deliverability
+
+DELIVERABLE = 'deliverable'
+UNDELIVERABLE = 'undeliverable'
+UNKNOWN = 'unknown'
+
+DELIVERABILITY_MODE = os.environ.get('EMAIL_DELIVERABILITY_MODE', 'sync').lower()
+DNS_TIMEOUT = float(os.environ.get('EMAIL_DNS_TIMEOUT', 2))
+DNS_TTL = int(os.environ.get('EMAIL_DNS_TTL', 86400))
+DNS_NEGATIVE_TTL = int(os.environ.get('EMAIL_DNS_NEGATIVE_TTL', 3600))
+DNS_MAX_ENTRIES = int(os.environ.get('EMAIL_DNS_MAX_ENTRIES', 1024))
+DNS_WORKERS = int(os.environ.get('EMAIL_DNS_WORKERS', 4))
+
+# Timeout e resolver non disponibili: esito incerto, riprovato presto
+UNKNOWN_TTL = 60
+
+_cache = OrderedDict()  # dominio -> (esito, errore, scadenza)
+_pending = {}           # dominio -> future della risoluzione in corso
+_lock = threading.Lock()
+
+# Executor e resolver creati per processo (i worker gunicorn non li condividono)
+_executor = None
+_executor_pid = None
+_resolver = None
+
+
+def get_executor():
+    global _executor, _executor_pid, _resolver
+    if _executor is None or _executor_pid != os.getpid():
+        _executor = ThreadPoolExecutor(max_workers=DNS_WORKERS, thread_name_prefix='email-dns')
+        _executor_pid = os.getpid()
+        _resolver = None
+    return _executor
+
+
+def get_resolver():
+    """Resolver dedicato, così il timeout non modifica il resolver di default di dnspython"""
+    global _resolver
+    if _resolver is None:
+        _resolver = dns.resolver.Resolver()
+        _resolver.lifetime = DNS_TIMEOUT
+    return _resolver
+
+
+def _query_dns(domain):
+    """Interroga il DNS e restituisce (esito, messaggio di errore)"""
+    try:
+        info = validate_email_deliverability(domain, domain, dns_resolver=get_resolver())
+    except EmailUndeliverableError as e:
+        return UNDELIVERABLE, str(e)
+    if info.get('unknown-deliverability'):
+        return UNKNOWN, None
+    return DELIVERABLE, None
+
+
+def _cached(domain):
+    with _lock:
+        entry = _cache.get(domain)
+        if entry is None:
+            return None
+        status, error, expires_at = entry
+        if expires_at <= time.time():
+            del _cache[domain]
+            return None
+        _cache.move_to_end(domain)
+        return status, error
+
+
+def _store(domain, status, error):
+    ttl = {DELIVERABLE: DNS_TTL, UNDELIVERABLE: DNS_NEGATIVE_TTL}.get(status, UNKNOWN_TTL)
+    with _lock:
+        _cache[domain] = (status, error, time.time() + ttl)
+        _cache.move_to_end(domain)
+        while len(_cache) > DNS_MAX_ENTRIES:
+            _cache.popitem(last=False)
+
+
+def lookup_domain(domain):
+    """Esito della verifica DNS del dominio (bloccante, usa la cache)"""
+    domain = domain.lower()
+    cached = _cached(domain)
+    if cached is not None:
+        return cached
+    try:
+        status, error = _query_dns(domain)
+    except Exception as e:
+        print(f"⚠️ Errore nella verifica DNS di {domain}: {e}")
+        status, error = UNKNOWN, None
+    _store(domain, status, error)
+    return status, error
+
+
+def check_domain(domain, timeout=None):
+    """
+    Esito della verifica del dominio entro il tempo massimo indicato.
+    Le richieste concorrenti per lo stesso dominio condividono la stessa risoluzione.
+    """
+    domain = domain.lower()
+    cached = _cached(domain)
+    if cached is not None:
+        return cached
+
+    with _lock:
+        future = _pending.get(domain)
+        if future is None:
+            future = get_executor().submit(lookup_domain, domain)
+            _pending[domain] = future
+            future.add_done_callback(lambda _: _pending.pop(domain, None))
+
+    try:
+        return future.result(timeout=DNS_TIMEOUT if timeout is None else timeout)
+    except FutureTimeoutError:
+        print(f"⚠️ Verifica DNS di {domain} oltre il tempo massimo, email accettata")
+        return UNKNOWN, None
+
+
+def record_message_status(app, message_id, domain):
+    """Calcola l'esito in background e lo salva sul messaggio di contatto"""
+    from models import db, ContactMessage
+
+    status, _ = lookup_domain(domain)
+    try:
+        with app.app_context():
+            ContactMessage.query.filter_by(id=message_id).update({'email_status': status})
+            db.session.commit()
+    except Exception as e:
+        print(f"❌ Errore nel salvataggio della verifica email del messaggio {message_id}: {e}")
+
+
+def check_message_later(app, message_id, domain):
+    """Pianifica la verifica del dominio di un messaggio appena salvato"""
+    return get_executor().submit(record_message_status, app, message_id, domain)
+
+
+def clear_cache():
+    with _lock:
+        _cache.clear()
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Server locale che simula l'API GitHub usata dal visualizzatore di codice.
+
+Serve gli endpoint repos/<owner>/<repo>, contents/, git/trees e rate_limit
+a partire da repository di esempio definiti in FIXTURE_REPOS, con ETag,
+header di rate limit, latenza e percentuale di errori configurabili.
+Permette di testare e misurare /project/<id>/code senza internet.
+
+Uso come script:
+    python fake_github.py --port 8765 --latency 0.05 --error-rate 0.02
+e poi avviare l'app con GITHUB_API_URL=http://127.0.0.1:8765
+"""
+
+import argparse
+import base64
+import hashlib
+import random
+import threading
+import time
+from flask import Flask, jsonify, request, Response
+from werkzeug.serving import make_server, WSGIRequestHandler
+
+# Repository di esempio: owner/repo -> branch predefinito e file
+FIXTURE_REPOS = {
+    'stevenVinci05/Morfeo': {
+        'default_branch': 'main',
+        'files': {
+            'app.py': 'from flask import Flask\n\napp = Flask(__name__)\n\n@app.route("/")\ndef index():\n    return "Morfeo"\n',
+            'requirements.txt': 'Flask==2.3.3\nrequests==2.31.0\n',
+            'README.md': '# Morfeo\n\nBot Discord per la gestione del server.\n',
+            'bot/commands.py': 'def ping():\n    return "pong"\n',
+            'bot/__init__.py': '',
+        }
+    },
+    'octocat/Hello-World': {
+        'default_branch': 'master',
+        'files': {
+            'README': 'Hello World!\n',
+        }
+    },
+    'demo/web-app': {
+        'default_branch': 'main',
+        'files': {
+            'package.json': '{\n  "name": "web-app",\n  "version": "1.0.0"\n}\n',
+            'index.js': 'const express = require("express");\nconst app = express();\napp.listen(3000);\n',
+            'index.html': '<!DOCTYPE html>\n<html><body><h1>Web App</h1></body></html>\n',
+            'style.css': 'body { margin: 0; font-family: sans-serif; }\n',
+            'src/components/Header.jsx': 'export default function Header() { return <h1>Header</h1>; }\n',
+            'node_modules/express/index.js': 'module.exports = {};\n',
+        }
+    },
+    'demo/large-repo': {
+        'default_branch': 'develop',
+        'files': dict(
+            [('main.py', 'print("main")\n' * 200), ('README.md', '# Large repo\n')] +
+            [(f'pkg/module_{i}.py', f'VALUE = {i}\n' * 50) for i in range(200)]
+        )
+    },
+}
+
+# Dimensione massima dei file restituiti con il contenuto dall'API contents
+CONTENTS_MAX_BYTES = 1024 * 1024
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    """Handler che non stampa una riga di log per ogni richiesta"""
+
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+def blob_sha(content):
+    """Calcola lo sha di un blob come fa git"""
+    data = content.encode('utf-8')
+    return hashlib.sha1(b'blob %d\0' % len(data) + data).hexdigest()
+
+
+class FakeGitHub:
+    """Finta API GitHub con latenza ed errori iniettabili"""
+
+    def __init__(self, repos=None, latency=0.0, jitter=0.0, error_rate=0.0, rate_limit=5000, seed=None):
+        self.repos = repos if repos is not None else FIXTURE_REPOS
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.server = None
+        self.thread = None
+        self.reset_stats()
+        self.app = self._create_app()
+
+    def reset_stats(self):
+        """Azzera i contatori delle richieste ricevute"""
+        with self.lock:
+            self.requests_total = 0
+            self.requests_by_status = {}
+            self.rate_remaining = self.rate_limit
+
+    def _record(self, status):
+        with self.lock:
+            self.requests_by_status[status] = self.requests_by_status.get(status, 0) + 1
+
+    def _create_app(self):
+        app = Flask('fake_github')
+
+        @app.before_request
+        def simulate_network():
+            with self.lock:
+                self.requests_total += 1
+                self.rate_remaining = max(0, self.rate_remaining - 1)
+                remaining = self.rate_remaining
+
+            delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0)
+            if delay:
+                time.sleep(delay)
+
+            if remaining == 0 and request.path != '/rate_limit':
+                return jsonify({'message': 'API rate limit exceeded'}), 403
+            if self.error_rate and self.random.random() < self.error_rate:
+                return jsonify({'message': 'Server Error'}), self.random.choice([500, 502, 503])
+
+        @app.after_request
+        def rate_limit_headers(response):
+            reset = int(time.time()) + 3600
+            response.headers['X-RateLimit-Limit'] = str(self.rate_limit)
+            response.headers['X-RateLimit-Remaining'] = str(self.rate_remaining)
+            response.headers['X-RateLimit-Reset'] = str(reset)
+            self._record(response.status_code)
+            return response
+
+        def conditional_json(payload, etag):
+            """Risponde 304 se il client ha già la versione corrente"""
+            etag = f'"{etag}"'
+            if request.headers.get('If-None-Match') == etag:
+                response = Response(status=304)
+            else:
+                response = jsonify(payload)
+            response.headers['ETag'] = etag
+            return response
+
+        def not_found():
+            return jsonify({'message': 'Not Found'}), 404
+
+        @app.route('/rate_limit')
+        def rate_limit():
+            core = {
+                'limit': self.rate_limit,
+                'remaining': self.rate_remaining,
+                'reset': int(time.time()) + 3600
+            }
+            return jsonify({'resources': {'core': core}, 'rate': core})
+
+        @app.route('/repos/<owner>/<repo>')
+        def repository(owner, repo):
+            fixture = self.repos.get(f'{owner}/{repo}')
+            if not fixture:
+                return not_found()
+            payload = {
+                'full_name': f'{owner}/{repo}',
+                'default_branch': fixture['default_branch']
+            }
+            return conditional_json(payload, hashlib.sha1(repr(payload).encode()).hexdigest())
+
+        @app.route('/repos/<owner>/<repo>/git/trees/<ref>')
+        def tree(owner, repo, ref):
+            fixture = self.repos.get(f'{owner}/{repo}')
+            if not fixture or ref != fixture['default_branch']:
+                return not_found()
+
+            entries = []
+            folders = set()
+            for path, content in sorted(fixture['files'].items()):
+                parts = path.split('/')[:-1]
+                for i in range(len(parts)):
+                    folders.add('/'.join(parts[:i + 1]))
+                entries.append({
+                    'path': path,
+                    'type': 'blob',
+                    'sha': blob_sha(content),
+                    'size': len(content.encode('utf-8'))
+                })
+            entries.extend({'path': folder, 'type': 'tree'} for folder in sorted(folders))
+
+            tree_sha = hashlib.sha1(''.join(e.get('sha', e['path']) for e in entries).encode()).hexdigest()
+            return conditional_json({'sha': tree_sha, 'tree': entries, 'truncated': False}, tree_sha)
+
+        @app.route('/repos/<owner>/<repo>/contents/<path:file_path>')
+        def contents(owner, repo, file_path):
+            fixture = self.repos.get(f'{owner}/{repo}')
+            if not fixture:
+                return not_found()
+            if request.args.get('ref', fixture['default_branch']) != fixture['default_branch']:
+                return not_found()
+            content = fixture['files'].get(file_path)
+            if content is None:
+                return not_found()
+
+            sha = blob_sha(content)
+            data = content.encode('utf-8')
+            payload = {
+                'type': 'file',
+                'path': file_path,
+                'sha': sha,
+                'size': len(data),
+                'encoding': 'base64',
+                'content': base64.b64encode(data).decode('ascii')
+            }
+            if len(data) > CONTENTS_MAX_BYTES:
+                # Come GitHub: oltre 1 MB l'API contents non include il contenuto
+                payload.update(encoding='none', content='')
+            return conditional_json(payload, sha)
+
+        return app
+
+    def start(self, host='127.0.0.1', port=0):
+        """Avvia il server in un thread e restituisce l'URL base"""
+        self.server = make_server(host, port, self.app, threaded=True, request_handler=QuietRequestHandler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self.url
+
+    @property
+    def url(self):
+        return f'http://{self.server.host}:{self.server.server_port}'
+
+    def stop(self):
+        """Ferma il server"""
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Finta API GitHub per test e benchmark')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help='latenza fissa per richiesta (secondi)')
+    parser.add_argument('--jitter', type=float, default=0.0, help='latenza casuale aggiuntiva massima (secondi)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='probabilità di risposta 5xx (0-1)')
+    parser.add_argument('--rate-limit', type=int, default=5000)
+    args = parser.parse_args()
+
+    fake = FakeGitHub(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, rate_limit=args.rate_limit)
+    print(f"🚀 Finta API GitHub su http://{args.host}:{args.port}")
+    print(f"📦 Repository disponibili: {', '.join(sorted(fake.repos))}")
+    fake.start(args.host, args.port)
+    try:
+        fake.thread.join()
+    except KeyboardInterrupt:
+        fake.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+"""
+Cache persistente per le risposte dell'API GitHub usate dal visualizzatore di codice.
+
+I dati vengono salvati in un piccolo database SQLite separato (di default
+instance/github_cache.db), quindi sopravvivono ai riavvii e sono condivisi
+tra i worker gunicorn della stessa macchina. Ogni voce ha una scadenza (TTL)
+e l'ETag restituito da GitHub, così una voce scaduta può essere rivalidata
+con If-None-Match (risposta 304) invece di riscaricare tutto il file.
+Quando la cache supera i limiti di voci o di byte vengono eliminate le voci
+usate meno di recente (LRU).
+"""
+
+import os
+import sqlite3
+import time
+
+
+class GitHubCache:
+    """Cache chiave/valore su SQLite con TTL per voce ed eviction LRU"""
+
+    # Aggiorna last_access al massimo una volta ogni N secondi per voce,
+    # per non trasformare ogni lettura in una scrittura
+    ACCESS_RESOLUTION = 60
+
+    def __init__(self, path, ttl=600, negative_ttl=300, max_entries=2000, max_bytes=50 * 1024 * 1024):
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._initialized = False
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5)
+        if not self._initialized:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS github_cache (
+                    key TEXT PRIMARY KEY,
+                    status INTEGER NOT NULL,
+                    etag TEXT,
+                    body TEXT,
+                    size INTEGER NOT NULL DEFAULT 0,
+                    expires_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_github_cache_last_access ON github_cache (last_access)')
+            conn.commit()
+            self._initialized = True
+        return conn
+
+    def get(self, key):
+        """
+        Restituisce la voce in cache come dizionario (status, etag, body, fresh)
+        oppure None se la chiave non è presente
+        """
+        try:
+            conn = self._connect()
+        except sqlite3.Error as e:
+            print(f"Errore nell'apertura della cache GitHub: {e}")
+            return None
+        try:
+            row = conn.execute(
+                'SELECT status, etag, body, expires_at, last_access FROM github_cache WHERE key = ?',
+                (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            status, etag, body, expires_at, last_access = row
+            now = time.time()
+            if now - last_access > self.ACCESS_RESOLUTION:
+                conn.execute('UPDATE github_cache SET last_access = ? WHERE key = ?', (now, key))
+                conn.commit()
+
+            return {
+                'status': status,
+                'etag': etag,
+                'body': body,
+                'fresh': expires_at > now
+            }
+        except sqlite3.Error as e:
+            print(f"Errore nella lettura della cache GitHub: {e}")
+            return None
+        finally:
+            conn.close()
+
+    def set(self, key, status, body=None, etag=None, ttl=None):
+        """Salva (o sostituisce) una voce e applica i limiti di dimensione"""
+        if ttl is None:
+            ttl = self.ttl if status == 200 else self.negative_ttl
+        now = time.time()
+        size = len(body.encode('utf-8')) if body else 0
+
+        # Un file più grande dell'intera cache non viene salvato
+        if size > self.max_bytes:
+            return
+
+        try:
+            conn = self._connect()
+        except sqlite3.Error as e:
+            print(f"Errore nell'apertura della cache GitHub: {e}")
+            return
+        try:
+            conn.execute(
+                'INSERT OR REPLACE INTO github_cache (key, status, etag, body, size, expires_at, last_access) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (key, status, etag, body, size, now + ttl, now)
+            )
+            self._evict(conn)
+            conn.commit()
+        except sqlite3.Error as e:
+            print(f"Errore nella scrittura della cache GitHub: {e}")
+        finally:
+            conn.close()
+
+    def touch(self, key, ttl=None):
+        """Rinnova la scadenza di una voce rivalidata (risposta 304)"""
+        now = time.time()
+        try:
+            conn = self._connect()
+        except sqlite3.Error as e:
+            print(f"Errore nell'apertura della cache GitHub: {e}")
+            return
+        try:
+            conn.execute(
+                'UPDATE github_cache SET expires_at = ?, last_access = ? WHERE key = ?',
+                (now + (ttl if ttl is not None else self.ttl), now, key)
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            print(f"Errore nell'aggiornamento della cache GitHub: {e}")
+        finally:
+            conn.close()
+
+    def clear(self):
+        """Svuota completamente la cache"""
+        conn = self._connect()
+        try:
+            conn.execute('DELETE FROM github_cache')
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _evict(self, conn):
+        """Elimina le voci usate meno di recente finché la cache rientra nei limiti"""
+        count, total_size = conn.execute(
+            'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM github_cache'
+        ).fetchone()
+        if count <= self.max_entries and total_size <= self.max_bytes:
+            return
+
+        victims = []
+        rows = conn.execute('SELECT key, size FROM github_cache ORDER BY last_access ASC').fetchall()
+        for key, size in rows:
+            if count <= self.max_entries and total_size <= self.max_bytes:
+                break
+            victims.append((key,))
+            count -= 1
+            total_size -= size
+
+        conn.executemany('DELETE FROM github_cache WHERE key = ?', victims)
+
+
+def create_cache_from_env(default_path):
+    """Crea la cache leggendo la configurazione dalle variabili d'ambiente"""
+    path = os.environ.get('GITHUB_CACHE_PATH', default_path)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    return GitHubCache(
+        path,
+        ttl=int(os.environ.get('GITHUB_CACHE_TTL', 600)),
+        negative_ttl=int(os.environ.get('GITHUB_CACHE_NEGATIVE_TTL', 300)),
+        max_entries=int(os.environ.get('GITHUB_CACHE_MAX_ENTRIES', 2000)),
+        max_bytes=int(os.environ.get('GITHUB_CACHE_MAX_BYTES', 50 * 1024 * 1024))
+    )
@@ -0,0 +1,137 @@
+"""
+Client HTTP condiviso per l'API GitHub.
+
+Tutte le richieste passano da una requests.Session per processo, così le
+connessioni keep-alive vengono riutilizzate invece di rifare l'handshake
+TCP/TLS per ogni file. Gli errori di connessione e le risposte 5xx vengono
+ritentati un numero limitato di volte con un backoff esponenziale con jitter.
+I timeout di lettura non vengono ritentati (GitHub ha ricevuto la richiesta
+ma è lento: un nuovo tentativo raddoppierebbe l'attesa) e tutti i tentativi
+di una chiamata stanno entro GITHUB_TOTAL_TIMEOUT, sotto il timeout dei
+worker gunicorn (GUNICORN_TIMEOUT, default 30).
+
+Configurazione tramite variabili d'ambiente:
+    GITHUB_API_URL          URL base dell'API (default https://api.github.com)
+    GITHUB_TOKEN            token opzionale per il rate limit autenticato
+    GITHUB_POOL_SIZE        connessioni mantenute aperte per host (default 10)
+    GITHUB_CONNECT_TIMEOUT  timeout di connessione in secondi (default 3.05)
+    GITHUB_READ_TIMEOUT     timeout di lettura in secondi (default 10)
+    GITHUB_MAX_RETRIES      tentativi aggiuntivi dopo il primo (default 2)
+    GITHUB_TOTAL_TIMEOUT    durata massima di una chiamata, tentativi compresi (default 20)
+    GITHUB_BACKOFF          base del backoff in secondi (default 0.5)
+"""
+
+import os
+import random
+import time
+import requests
+from requests.adapters import HTTPAdapter
+
+GITHUB_API_URL = os.environ.get('GITHUB_API_URL', 'https://api.github.com').rstrip('/')
+GITHUB_TOKEN = os.environ.get('GITHUB_TOKEN')
+
+POOL_SIZE = int(os.environ.get('GITHUB_POOL_SIZE', 10))
+CONNECT_TIMEOUT = float(os.environ.get('GITHUB_CONNECT_TIMEOUT', 3.05))
+READ_TIMEOUT = float(os.environ.get('GITHUB_READ_TIMEOUT', 10))
+MAX_RETRIES = int(os.environ.get('GITHUB_MAX_RETRIES', 2))
+TOTAL_TIMEOUT = float(os.environ.get('GITHUB_TOTAL_TIMEOUT', 20))
+BACKOFF = float(os.environ.get('GITHUB_BACKOFF', 0.5))
+MAX_BACKOFF = 8
+
+# Status per cui ha senso ritentare la richiesta
+RETRY_STATUSES = {500, 502, 503, 504}
+
+# Funzioni chiamate dopo ogni tentativo con (status o 'error', durata in secondi),
+# ad esempio per le metriche (vedi metrics.Metrics.record_github_request)
+request_observers = []
+
+_session = None
+_session_pid = None
+
+
+def get_session():
+    """
+    Restituisce la sessione HTTP condivisa del processo corrente.
+    Dopo un fork viene creata una nuova sessione, per non condividere
+    i socket del processo padre.
+    """
+    global _session, _session_pid
+    if _session is None or _session_pid != os.getpid():
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_SIZE, max_retries=0)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers.update({
+            'Accept': 'application/vnd.github+json',
+            'User-Agent': 'portfolio-code-viewer'
+        })
+        if GITHUB_TOKEN:
+            session.headers['Authorization'] = f'Bearer {GITHUB_TOKEN}'
+        _session = session
+        _session_pid = os.getpid()
+    return _session
+
+
+def api_url(path):
+    """Costruisce l'URL completo per un percorso dell'API"""
+    return f"{GITHUB_API_URL}/{path.lstrip('/')}"
+
+
+def backoff_delay(attempt):
+    """Attesa prima del tentativo successivo (backoff esponenziale con full jitter)"""
+    return random.uniform(0, min(MAX_BACKOFF, BACKOFF * (2 ** attempt)))
+
+
+def notify_observers(status, elapsed):
+    for observer in request_observers:
+        try:
+            observer(status, elapsed)
+        except Exception as e:
+            print(f"Errore in un osservatore delle richieste GitHub: {e}")
+
+
+def _can_retry(deadline, delay):
+    """True se dopo l'attesa resta almeno il tempo per stabilire una connessione"""
+    return time.monotonic() + delay + CONNECT_TIMEOUT <= deadline
+
+
+def get(path, params=None, headers=None):
+    """
+    Esegue una GET sull'API GitHub con retry e backoff, entro TOTAL_TIMEOUT.
+    Restituisce la risposta (anche se di errore) oppure solleva
+    requests.RequestException se tutti i tentativi falliscono.
+    """
+    session = get_session()
+    url = api_url(path)
+    deadline = time.monotonic() + TOTAL_TIMEOUT
+
+    for attempt in range(MAX_RETRIES + 1):
+        started_at = time.perf_counter()
+        remaining = max(0.1, deadline - time.monotonic())
+        try:
+            response = session.get(
+                url,
+                params=params,
+                headers=headers,
+                timeout=(min(CONNECT_TIMEOUT, remaining), min(READ_TIMEOUT, remaining))
+            )
+        except requests.ReadTimeout:
+            notify_observers('error', time.perf_counter() - started_at)
+            raise
+        except (requests.ConnectionError, requests.Timeout) as e:
+            notify_observers('error', time.perf_counter() - started_at)
+            delay = backoff_delay(attempt)
+            if attempt == MAX_RETRIES or not _can_retry(deadline, delay):
+                raise
+            print(f"Errore di rete verso GitHub ({url}), nuovo tentativo: {e}")
+        else:
+            notify_observers(response.status_code, time.perf_counter() - started_at)
+            delay = backoff_delay(attempt)
+            if (response.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES
+                    or not _can_retry(deadline, delay)):
+                if response.status_code == 403 and response.headers.get('X-RateLimit-Remaining') == '0':
+                    print(f"Rate limit GitHub esaurito (reset: {response.headers.get('X-RateLimit-Reset')})")
+                return response
+            print(f"GitHub ha risposto {response.status_code} ({url}), nuovo tentativo")
+
+        time.sleep(delay)
@@ -0,0 +1,61 @@
+"""
+Configurazione di gunicorn per la produzione (vedi server_config.py).
+
+    gunicorn -c gunicorn.conf.py app:app
+
+Con il preload l'app viene importata una sola volta nel processo master e
+i worker la condividono dopo il fork (meno memoria, avvio più rapido). Le
+connessioni al database aperte dal master durante l'import vengono
+scartate in ogni worker (post_fork), che apre le proprie.
+"""
+
+import glob
+import os
+import sys
+import server_config
+
+profile = server_config.load_profile()
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 8000)}"
+worker_class = profile.worker_class
+workers = profile.workers
+threads = profile.threads
+worker_connections = profile.worker_connections
+preload_app = profile.preload
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = timeout
+# Il proxy di Render riusa le connessioni: le teniamo aperte un po' più del suo intervallo
+keepalive = 5
+
+# Con più worker una cache in memoria non vede le invalidazioni fatte dagli altri
+# processi, e il limite per IP verrebbe contato a parte da ognuno: salvo scelta
+# esplicita si usano i backend SQLite condivisi (l'app li legge all'import)
+if workers > 1:
+    os.environ.setdefault('PAGE_CACHE_BACKEND', 'sqlite')
+    os.environ.setdefault('RATE_LIMIT_BACKEND', 'sqlite')
+
+
+def on_starting(server):
+    """Prima dell'avvio dei worker: elimina le copie delle metriche del deploy precedente"""
+    metrics_dir = os.environ.get('METRICS_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'metrics'))
+    # Solo i file: con il preload la cartella è già stata creata dall'app e resta in uso
+    for path in glob.glob(os.path.join(metrics_dir, '*.json')) + glob.glob(os.path.join(metrics_dir, '*.json.tmp')):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    server.log.info(
+        f"Profilo: {profile.workers} worker {profile.worker_class}, {profile.threads} thread, "
+        f"preload {'sì' if profile.preload else 'no'}"
+    )
+
+
+def post_fork(server, worker):
+    """Il worker non deve riusare le connessioni al database aperte dal master"""
+    app_module = sys.modules.get('app')
+    if app_module is None:
+        return
+    with app_module.app.app_context():
+        for engine in app_module.db.engines.values():
+            # close=False: le connessioni restano del master, il worker ne apre di nuove
+            engine.dispose(close=False)
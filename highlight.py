@@ -0,0 +1,96 @@
+"""
+Evidenziazione della sintassi lato server per la pagina del codice dei progetti.
+
+Ogni file viene colorato con Pygments una sola volta per contenuto: l'HTML
+risultante viene salvato nella cache persistente (la stessa dei file
+GitHub) con chiave hash di contenuto, lexer scelto, versione di Pygments e
+stile, quindi un file viene rielaborato solo quando cambia. Il browser
+riceve HTML già colorato e un foglio di stile statico
+(static/css/pygments.css), senza script esterni.
+
+Rigenerare il CSS dopo aver cambiato STYLE:
+    python highlight.py --css > static/css/pygments.css
+"""
+
+import hashlib
+import sys
+from markupsafe import Markup, escape
+
+try:
+    import pygments
+    from pygments import highlight as pygments_highlight
+    from pygments.formatters import HtmlFormatter
+    from pygments.lexers import get_lexer_by_name, get_lexer_for_filename, TextLexer
+    from pygments.util import ClassNotFound
+except ImportError:  # Senza Pygments il codice viene mostrato senza colori
+    pygments = None
+
+STYLE = 'github-dark'
+CSS_CLASS = 'highlight'
+
+# Le voci dipendono solo dal contenuto: non diventano obsolete, escono dalla cache solo per LRU
+CACHE_TTL = 30 * 24 * 3600
+
+
+def get_lexer(language, filename=''):
+    """Lexer per il linguaggio di get_file_language, con fallback sul nome del file"""
+    # 'text' è il valore di get_file_language per le estensioni non riconosciute
+    if language and language != 'text':
+        try:
+            return get_lexer_by_name(language)
+        except ClassNotFound:
+            pass
+    try:
+        return get_lexer_for_filename(filename)
+    except ClassNotFound:
+        return TextLexer()
+
+
+class Highlighter:
+    """Colora il codice e conserva l'HTML in una cache con interfaccia get/set di GitHubCache"""
+
+    def __init__(self, cache=None):
+        self.cache = cache
+
+    def cache_key(self, content, lexer_name):
+        # Il lexer effettivo, non il linguaggio: con 'text' dipende anche dal nome del file
+        version = pygments.__version__ if pygments else 'plain'
+        digest = hashlib.sha256(f'{version}|{STYLE}|{lexer_name}|{content}'.encode('utf-8')).hexdigest()
+        return f'highlight:{digest}'
+
+    def highlight(self, content, language, filename=''):
+        """Restituisce l'HTML colorato (senza <pre>) come Markup sicuro per i template"""
+        if pygments is None:
+            return Markup(escape(content))
+
+        lexer = get_lexer(language, filename)
+        key = self.cache_key(content, lexer.name)
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached and cached['body'] is not None:
+                return Markup(cached['body'])
+
+        html = pygments_highlight(content, lexer, HtmlFormatter(nowrap=True))
+        if self.cache is not None:
+            self.cache.set(key, 200, html, ttl=CACHE_TTL)
+        return Markup(html)
+
+
+def style_css():
+    """
+    CSS dello stile scelto, limitato a .highlight (niente regole globali su pre)
+    e senza colore di sfondo, che resta quello di .code-content
+    """
+    rules = HtmlFormatter(style=STYLE).get_style_defs(f'.{CSS_CLASS}').splitlines()
+    return '\n'.join(
+        rule for rule in rules
+        if rule.startswith(f'.{CSS_CLASS} ') and not rule.startswith(f'.{CSS_CLASS} {{ background')
+    )
+
+
+if __name__ == '__main__':
+    if '--css' in sys.argv:
+        print(f'/* Stile Pygments "{STYLE}": generato con python highlight.py --css */')
+        print(style_css())
+    else:
+        print(__doc__)
@@ -0,0 +1,97 @@
+"""
+Supporto alle richieste condizionali (ETag / Last-Modified) per le pagine
+pubbliche e le API JSON.
+
+Prima di eseguire la view viene calcolata la "versione" dei dati con una
+query aggregata leggera (conteggi e date massime). Se il client ha già
+quella versione (If-None-Match o If-Modified-Since) la risposta è un 304
+senza corpo e senza render del template.
+
+Le pagine di fallback servite quando il database non risponde (header
+FALLBACK_HEADER) non ricevono validatori e hanno Cache-Control no-store:
+browser e proxy non devono continuare a rivalidare una pagina degradata.
+"""
+
+import hashlib
+from datetime import datetime, timezone
+from functools import wraps
+from flask import request, make_response, current_app
+from sqlalchemy.exc import SQLAlchemyError
+from page_cache import is_personalized_request
+
+# Header delle pagine di fallback (vedi database_error_page in app.py)
+FALLBACK_HEADER = 'X-Fallback-Page'
+
+
+def _to_http_date(value):
+    """Converte un timestamp (datetime naive UTC o epoch) per l'header Last-Modified"""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        value = datetime.fromtimestamp(value, tz=timezone.utc)
+    elif value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    # Gli header HTTP hanno la precisione del secondo
+    return value.replace(microsecond=0)
+
+
+def is_not_modified(etag, last_modified):
+    """
+    True se il client ha già la versione corrente. If-None-Match ha la
+    precedenza: If-Modified-Since viene usato solo se manca.
+    """
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if last_modified is not None and request.if_modified_since is not None:
+        return last_modified <= request.if_modified_since
+    return False
+
+
+def _not_storable(response):
+    """Pagina di fallback: nessuna copia nelle cache di browser e proxy"""
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+
+def conditional(validator, cache_control='no-cache'):
+    """
+    Decoratore per le view GET. validator() restituisce (versione, last_modified):
+    la versione, insieme al percorso e ai parametri della richiesta, forma l'ETag;
+    last_modified può essere None se non esiste un timestamp affidabile.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            # Le risposte personali (login, messaggi flash) non sono condizionali
+            if request.method != 'GET' or is_personalized_request():
+                return view(*args, **kwargs)
+
+            try:
+                version, last_modified = validator()
+            except SQLAlchemyError as e:
+                # Database non raggiungibile: la view gestisce l'errore (pagina di fallback)
+                print(f"Errore nel calcolo della versione di {request.path}: {e}")
+                response = make_response(view(*args, **kwargs))
+                return _not_storable(response) if FALLBACK_HEADER in response.headers else response
+
+            args_key = '&'.join(f'{k}={v}' for k, v in sorted(request.args.items(multi=True)))
+            etag = hashlib.sha1(f'{version}|{request.path}?{args_key}'.encode('utf-8')).hexdigest()
+            last_modified = _to_http_date(last_modified)
+
+            if is_not_modified(etag, last_modified):
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                # Le pagine di errore o di fallback non ricevono validatori
+                if FALLBACK_HEADER in response.headers:
+                    return _not_storable(response)
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            response.headers['Cache-Control'] = cache_control
+            return response
+        return wrapper
+    return decorator
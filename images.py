@@ -0,0 +1,141 @@
+"""
+Varianti ridimensionate delle immagini dei progetti.
+
+Quando un admin salva un progetto, l'immagine indicata nel campo image
+(static/images/projects/<nome>) viene ridimensionata nelle larghezze di
+VARIANTS, ognuna in WebP e in un formato di fallback (JPEG, oppure PNG se
+l'immagine ha trasparenza). Le immagini non vengono mai ingrandite.
+
+I file derivati stanno in static/images/derived/<hash>/, dove l'hash è
+calcolato sul contenuto della sorgente e sulle impostazioni di questo
+modulo: un'immagine già elaborata non viene rielaborata, una modificata
+ottiene una cartella nuova, e i file si possono servire con cache
+immutabile. Dimensioni e percorsi delle varianti vengono salvati sul
+progetto e usati dai template per srcset, width e height.
+
+Pillow è opzionale: senza, i template mostrano l'immagine originale.
+Per rigenerare le varianti di tutti i progetti:
+    python images.py
+"""
+
+import hashlib
+import json
+import os
+from flask import send_from_directory, abort
+from werkzeug.security import safe_join
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Senza Pillow non vengono generate varianti
+    Image = None
+
+SOURCE_DIR = 'images/projects'
+DERIVED_DIR = 'images/derived'
+INFO_NAME = 'variants.json'
+
+# (nome, larghezza in pixel): card per la griglia, retina per la card su schermi 2x, detail per le viste grandi
+VARIANTS = [('card', 400), ('retina', 800), ('detail', 1200)]
+WEBP_QUALITY = 80
+JPEG_QUALITY = 82
+MAX_AGE = 365 * 24 * 3600
+
+
+def source_hash(path):
+    """Hash del contenuto della sorgente e delle impostazioni che influenzano i derivati"""
+    digest = hashlib.sha256(repr((VARIANTS, WEBP_QUALITY, JPEG_QUALITY)).encode('utf-8'))
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def _save(image, path, image_format):
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    if image_format == 'WEBP':
+        image.save(tmp_path, 'WEBP', quality=WEBP_QUALITY, method=4)
+    elif image_format == 'JPEG':
+        image.save(tmp_path, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+    else:
+        image.save(tmp_path, 'PNG', optimize=True)
+    os.replace(tmp_path, path)
+
+
+def process_image(static_folder, filename):
+    """
+    Genera (o ritrova su disco) le varianti di static/images/projects/<filename>.
+    Restituisce {'width', 'height', 'variants': [...]}, con i percorsi delle
+    varianti relativi a static/images/derived (endpoint derived_image), oppure
+    None se Pillow non è installato o l'immagine non esiste o non è leggibile.
+    """
+    if Image is None or not filename:
+        return None
+    source = safe_join(os.path.join(static_folder, SOURCE_DIR), filename)
+    if source is None or not os.path.isfile(source):
+        return None
+
+    try:
+        digest = source_hash(source)
+        directory = os.path.join(static_folder, DERIVED_DIR, digest)
+        info_path = os.path.join(directory, INFO_NAME)
+        if os.path.exists(info_path):
+            with open(info_path, encoding='utf-8') as f:
+                return json.load(f)
+
+        os.makedirs(directory, exist_ok=True)
+        with Image.open(source) as original:
+            image = ImageOps.exif_transpose(original)
+            has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+            image = image.convert('RGBA' if has_alpha else 'RGB')
+            fallback_format, fallback_ext = ('PNG', 'png') if has_alpha else ('JPEG', 'jpg')
+
+            variants = []
+            for name, target_width in VARIANTS:
+                width = min(target_width, image.width)
+                if variants and variants[-1]['width'] == width:
+                    continue
+                height = max(1, round(image.height * width / image.width))
+                resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+
+                variant = {'name': name, 'width': width, 'height': height}
+                for key, image_format, ext in [('webp', 'WEBP', 'webp'), ('fallback', fallback_format, fallback_ext)]:
+                    _save(resized, os.path.join(directory, f'{name}.{ext}'), image_format)
+                    variant[key] = f'{digest}/{name}.{ext}'
+                variants.append(variant)
+
+        info = {'width': image.width, 'height': image.height, 'variants': variants}
+        # Il file con le informazioni viene scritto per ultimo: una cartella senza è incompleta
+        tmp_path = f'{info_path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(info, f)
+        os.replace(tmp_path, info_path)
+        print(f"✅ Varianti generate per {filename}: {', '.join(str(v['width']) for v in variants)} px")
+        return info
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        print(f"❌ Errore nell'elaborazione dell'immagine {filename}: {e}")
+        return None
+
+
+def init_app(app):
+    """Serve i derivati con cache immutabile: il nome della cartella cambia con il contenuto"""
+    directory = os.path.join(app.static_folder, DERIVED_DIR)
+
+    def derived_image(filename):
+        if filename.endswith(INFO_NAME):
+            abort(404)
+        response = send_from_directory(directory, filename, max_age=MAX_AGE)
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
+
+    app.add_url_rule(f'{app.static_url_path}/{DERIVED_DIR}/<path:filename>', 'derived_image', derived_image)
+
+
+if __name__ == '__main__':
+    from app import app, db, page_cache
+    from models import Project
+
+    with app.app_context():
+        for project in Project.query.all():
+            project.set_image_info(process_image(app.static_folder, project.image))
+        db.session.commit()
+        page_cache.invalidate('index', 'projects')
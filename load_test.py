@@ -0,0 +1,435 @@
+#!/usr/bin/env python3
+"""
+Test di carico end-to-end delle route pubbliche e admin su gunicorn.
+
+Lo script:
+  1. crea un database SQLite temporaneo con i volumi richiesti (progetti,
+     recensioni, messaggi) e un admin per le pagine riservate
+  2. avvia fake_github.FakeGitHub, così /project/<id>/code funziona offline
+  3. avvia gunicorn in locale con l'app puntata al database e a GitHub finti
+  4. per ogni scenario invia richieste HTTP concorrenti per --duration
+     secondi (dopo --warmup secondi non misurati), con una sessione
+     keep-alive per client
+  5. scrive un report JSON con richieste/s, percentuali di errore e
+     percentili di latenza, confrontabile con quello di un'esecuzione
+     precedente (--compare)
+
+La verifica email è sintattica (EMAIL_DELIVERABILITY_MODE=off) e il limite
+di richieste per IP è disattivato (RATE_LIMIT_BACKEND=none), altrimenti il
+POST /contact da un solo indirizzo riceverebbe solo 429. Le altre variabili
+si possono impostare con --env, ad esempio --env PAGE_CACHE_BACKEND=none.
+gunicorn parte con gunicorn.conf.py, quindi con il profilo di produzione
+di server_config.py: per confrontare profili diversi si usano le stesse
+variabili (--env GUNICORN_WORKER_CLASS=sync --env WEB_CONCURRENCY=3) oppure
+--workers e --threads, che hanno la precedenza.
+
+Uso:
+    python load_test.py --projects 200 --reviews 5000 --messages 10000 \\
+        --concurrency 8 --duration 10 --json report.json
+    python load_test.py --scenarios home,reviews --compare report.json --max-regression 10
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+import requests
+from flask import Flask
+from sqlalchemy import insert
+from models import db, User, Project, ContactMessage, Review
+from fake_github import FakeGitHub
+import search
+import server_config
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+ADMIN_USERNAME = 'loadtest'
+ADMIN_PASSWORD = 'loadtest-password'
+
+TECHNOLOGIES = ['Python', 'Flask', 'SQLAlchemy', 'JavaScript', 'React', 'Vue', 'Node.js', 'PostgreSQL',
+                'Docker', 'Redis', 'Django', 'TypeScript', 'Svelte', 'Go', 'Rust', 'HTML', 'CSS', 'Tailwind']
+CATEGORIES = ['web', 'mobile', 'desktop']
+WORDS = ['sito', 'veloce', 'progetto', 'preventivo', 'lavoro', 'flask', 'design', 'consegna', 'supporto',
+         'ottimo', 'applicazione', 'database', 'grafica', 'professionale', 'tempi', 'qualità']
+
+# Scenario -> (metodo, percorsi a rotazione, richiede il login admin)
+# I percorsi con {project_id} vengono espansi sui primi progetti creati
+SCENARIOS = {
+    'home': ('GET', ['/'], False),
+    'about': ('GET', ['/about'], False),
+    'projects': ('GET', ['/projects'], False),
+    'projects_filtered': ('GET', ['/projects?category=web', '/projects?tech=python'], False),
+    'reviews': ('GET', ['/reviews'], False),
+    'contact_form': ('GET', ['/contact'], False),
+    'contact_post': ('POST', ['/contact'], False),
+    'api_projects': ('GET', ['/api/projects', '/api/projects?limit=50'], False),
+    'api_search': ('GET', ['/api/search?q=flask', '/api/search?q=sito'], False),
+    'project_code': ('GET', ['/project/{project_id}/code'], False),
+    # Pagine pubbliche insieme al visualizzatore di codice: misura quanto un recupero
+    # lento da GitHub rallenta le altre richieste (con --env GITHUB_CACHE_TTL=0)
+    'mixed': ('GET', ['/', '/projects', '/reviews', '/project/{project_id}/code'], False),
+    'admin_dashboard': ('GET', ['/admin/dashboard'], True),
+    'admin_messages': ('GET', ['/admin/messages'], True),
+    'admin_messages_search': ('GET', ['/admin/messages?q=preventivo'], True),
+    'admin_reviews': ('GET', ['/admin/reviews'], True),
+    'admin_users': ('GET', ['/admin/users'], True),
+}
+
+
+def percentile(values, p):
+    """Percentile con il metodo nearest-rank"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(p / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def sentence(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize() + '.'
+
+
+def seed(database_url, projects, reviews, messages, repos):
+    """Popola il database con i volumi richiesti; restituisce gli id dei progetti"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_url
+    db.init_app(app)
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    repo_names = sorted(repos)
+
+    with app.app_context():
+        db.create_all()
+        admin = User(username=ADMIN_USERNAME, email='loadtest@example.com', is_admin=True)
+        admin.set_password(ADMIN_PASSWORD)
+        db.session.add(admin)
+
+        # Progetti con l'ORM: i tag delle tecnologie passano da set_technologies_list
+        created = []
+        for i in range(projects):
+            project = Project(
+                title=f'Progetto {i} {rng.choice(WORDS)}',
+                description=sentence(rng, 30),
+                category=CATEGORIES[i % len(CATEGORIES)],
+                github_repo=f'https://github.com/{repo_names[i % len(repo_names)]}',
+                featured=i < 6,
+                created_at=now - timedelta(minutes=i)
+            )
+            project.set_technologies_list(rng.sample(TECHNOLOGIES, 4))
+            db.session.add(project)
+            created.append(project)
+        db.session.commit()
+
+        # Recensioni e messaggi con INSERT multiple: l'indice di ricerca viene ricostruito dopo
+        db.session.execute(insert(Review), [{
+            'name': f'Cliente {i}',
+            'rating': rng.randint(1, 5),
+            'comment': sentence(rng, 25),
+            'approved': rng.random() < 0.8,
+            'created_at': now - timedelta(minutes=i * 3)
+        } for i in range(reviews)])
+        db.session.execute(insert(ContactMessage), [{
+            'name': f'Contatto {i}',
+            'email': f'contatto{i}@example.com',
+            'subject': sentence(rng, 4),
+            'message': sentence(rng, 40),
+            'read': rng.random() < 0.7,
+            'created_at': now - timedelta(minutes=i * 2)
+        } for i in range(messages)])
+        db.session.commit()
+
+        with db.engine.begin() as conn:
+            documents = search.rebuild_index(conn)
+        project_ids = [project.id for project in created]
+        db.engine.dispose()
+
+    print(f"✅ Database popolato: {projects} progetti, {reviews} recensioni, {messages} messaggi, "
+          f"{documents} documenti indicizzati")
+    return project_ids
+
+
+def start_gunicorn(env, port, log_path):
+    """Avvia gunicorn con gunicorn.conf.py e attende che /healthz risponda"""
+    command = [
+        sys.executable, '-m', 'gunicorn', 'app:app',
+        '--config', os.path.join(BASE_DIR, 'gunicorn.conf.py'),
+        '--bind', f'127.0.0.1:{port}',
+        '--log-level', 'warning',
+    ]
+    log = open(log_path, 'w')
+    process = subprocess.Popen(command, cwd=BASE_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+    url = f'http://127.0.0.1:{port}'
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            log.close()
+            with open(log_path) as f:
+                raise RuntimeError(f"gunicorn terminato all'avvio:\n{f.read()}")
+        try:
+            if requests.get(f'{url}/healthz', timeout=1).status_code == 200:
+                return process, log, url
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    log.close()
+    raise RuntimeError("gunicorn non ha risposto a /healthz entro 60 secondi")
+
+
+def stop_gunicorn(process, log):
+    process.terminate()
+    try:
+        process.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+    log.close()
+
+
+def new_client(base_url, admin):
+    """Sessione HTTP keep-alive, autenticata come admin se richiesto"""
+    session = requests.Session()
+    if admin:
+        response = session.post(f'{base_url}/admin/login', allow_redirects=False,
+                                data={'username': ADMIN_USERNAME, 'password': ADMIN_PASSWORD})
+        if response.status_code != 302:
+            raise RuntimeError(f"Login admin non riuscito: {response.status_code}")
+    return session
+
+
+def contact_form(counter):
+    return {
+        'name': f'Carico {counter}',
+        'email': f'carico{counter}@example.com',
+        'subject': 'Richiesta di preventivo',
+        'message': 'Messaggio inviato dal test di carico per misurare il form di contatto.'
+    }
+
+
+def run_scenario(name, base_url, paths, method, admin, concurrency, duration, warmup):
+    """Richieste concorrenti per warmup + duration secondi; misura solo le ultime duration"""
+    sessions = [new_client(base_url, admin) for _ in range(concurrency)]
+    start = time.perf_counter()
+    measure_from = start + warmup
+    stop_at = measure_from + duration
+    results = [[] for _ in range(concurrency)]
+    counter = [0]
+    counter_lock = threading.Lock()
+
+    def worker(index):
+        session = sessions[index]
+        i = index
+        while True:
+            now = time.perf_counter()
+            if now >= stop_at:
+                return
+            url = base_url + paths[i % len(paths)]
+            i += concurrency
+            sent = time.perf_counter()
+            try:
+                if method == 'POST':
+                    with counter_lock:
+                        counter[0] += 1
+                        form = contact_form(counter[0])
+                    response = session.post(url, data=form, allow_redirects=False, timeout=30)
+                else:
+                    response = session.get(url, timeout=30)
+                status = response.status_code
+            except requests.RequestException:
+                status = 0
+            if sent >= measure_from:
+                results[index].append((time.perf_counter() - sent, status))
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for session in sessions:
+        session.close()
+
+    samples = [sample for worker_results in results for sample in worker_results]
+    latencies = [latency for latency, _ in samples]
+    status_codes = {}
+    for _, status in samples:
+        status_codes[str(status)] = status_codes.get(str(status), 0) + 1
+    # Il POST del form risponde con il redirect alla pagina
+    ok_statuses = {'302'} if method == 'POST' else {'200'}
+    errors = sum(count for status, count in status_codes.items() if status not in ok_statuses)
+
+    return {
+        'method': method,
+        'paths': paths,
+        'requests': len(samples),
+        'errors': errors,
+        'error_rate': round(errors / len(samples), 4) if samples else 0.0,
+        'status_codes': status_codes,
+        'requests_per_sec': round(len(samples) / duration, 2),
+        'latency_ms': {
+            'mean': round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+            'p50': round(percentile(latencies, 50) * 1000, 2),
+            'p90': round(percentile(latencies, 90) * 1000, 2),
+            'p95': round(percentile(latencies, 95) * 1000, 2),
+            'p99': round(percentile(latencies, 99) * 1000, 2),
+            'max': round(max(latencies) * 1000, 2) if latencies else 0.0,
+        }
+    }
+
+
+def compare(report, baseline, max_regression=None):
+    """
+    Stampa le differenze di richieste/s e p95 rispetto a un report precedente.
+    Restituisce gli scenari peggiorati oltre max_regression (percentuale).
+    """
+    print()
+    print(f"{'Scenario':<24} {'req/s prima':>12} {'req/s ora':>10} {'Δ':>8} {'p95 prima':>10} {'p95 ora':>9} {'Δ':>8}")
+    print('-' * 86)
+    regressions = []
+    for name, current in report['scenarios'].items():
+        previous = baseline.get('scenarios', {}).get(name)
+        if previous is None:
+            continue
+        rps_change = (current['requests_per_sec'] / previous['requests_per_sec'] - 1) * 100 if previous['requests_per_sec'] else 0.0
+        p95_before, p95_now = previous['latency_ms']['p95'], current['latency_ms']['p95']
+        p95_change = (p95_now / p95_before - 1) * 100 if p95_before else 0.0
+        print(f"{name:<24} {previous['requests_per_sec']:>12} {current['requests_per_sec']:>10} {rps_change:>+7.1f}% "
+              f"{p95_before:>10} {p95_now:>9} {p95_change:>+7.1f}%")
+        if max_regression is not None and (rps_change < -max_regression or p95_change > max_regression):
+            regressions.append(name)
+    return regressions
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Test di carico delle route su gunicorn')
+    parser.add_argument('--projects', type=int, default=200)
+    parser.add_argument('--reviews', type=int, default=5000)
+    parser.add_argument('--messages', type=int, default=10000)
+    parser.add_argument('--workers', type=int, help='worker gunicorn (default: profilo di server_config)')
+    parser.add_argument('--threads', type=int, help='thread per worker, gthread se > 1 (default: profilo di server_config)')
+    parser.add_argument('--concurrency', type=int, default=8, help='client contemporanei')
+    parser.add_argument('--duration', type=float, default=10, help='secondi misurati per scenario')
+    parser.add_argument('--warmup', type=float, default=2, help='secondi non misurati per scenario')
+    parser.add_argument('--scenarios', help=f"elenco separato da virgole (default tutti: {', '.join(SCENARIOS)})")
+    parser.add_argument('--github-latency', type=float, default=0.05, help='latenza simulata di GitHub (secondi)')
+    parser.add_argument('--env', action='append', default=[], metavar='NOME=VALORE',
+                        help="variabile d'ambiente per l'app (ripetibile)")
+    parser.add_argument('--json', default='load_test_report.json', help='file del report')
+    parser.add_argument('--compare', help='report precedente da confrontare')
+    parser.add_argument('--max-regression', type=float,
+                        help='con --compare: esce con errore se req/s o p95 peggiorano oltre questa percentuale')
+    parser.add_argument('--keep', action='store_true', help='non cancella la cartella temporanea (database e log)')
+    args = parser.parse_args()
+
+    names = args.scenarios.split(',') if args.scenarios else list(SCENARIOS)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"Scenari sconosciuti: {', '.join(unknown)}")
+
+    work_dir = tempfile.mkdtemp(prefix='load-test-')
+    database_url = f"sqlite:///{os.path.join(work_dir, 'load.db')}"
+    fake = FakeGitHub(latency=args.github_latency, seed=42)
+    process = log = None
+    try:
+        project_ids = seed(database_url, args.projects, args.reviews, args.messages, fake.repos)
+
+        env = dict(os.environ)
+        env.update({
+            'DATABASE_URL': database_url,
+            'GITHUB_API_URL': fake.start(),
+            'GITHUB_CACHE_PATH': os.path.join(work_dir, 'github_cache.db'),
+            'METRICS_DIR': os.path.join(work_dir, 'metrics'),
+            'PAGE_CACHE_PATH': os.path.join(work_dir, 'page_cache.db'),
+            'RATE_LIMIT_PATH': os.path.join(work_dir, 'rate_limit.db'),
+            'EMAIL_DELIVERABILITY_MODE': 'off',
+            'RATE_LIMIT_BACKEND': 'none',
+            'SQL_PROFILER': 'off',
+        })
+        for item in args.env:
+            key, _, value = item.partition('=')
+            env[key] = value
+
+        # Come variabili d'ambiente, così anche il pool del database dell'app le vede
+        if args.workers:
+            env['WEB_CONCURRENCY'] = str(args.workers)
+        if args.threads:
+            env['GUNICORN_THREADS'] = str(args.threads)
+            env['GUNICORN_WORKER_CLASS'] = 'gthread' if args.threads > 1 else 'sync'
+        profile = server_config.load_profile(env)._asdict()
+
+        process, log, base_url = start_gunicorn(env, free_port(), os.path.join(work_dir, 'gunicorn.log'))
+        print(f"🚀 gunicorn su {base_url}: {profile['workers']} worker {profile['worker_class']} x "
+              f"{profile['threads']} thread, {args.concurrency} client, {args.duration:g} s per scenario")
+
+        report = {
+            'created_at': datetime.utcnow().isoformat(timespec='seconds'),
+            'git_commit': git_commit(),
+            'python': platform.python_version(),
+            'cpu_count': os.cpu_count(),
+            'config': {key: value for key, value in vars(args).items() if key not in ('json', 'compare', 'keep')},
+            'server_profile': profile,
+            'scenarios': {}
+        }
+        sample_ids = project_ids[:10] or [0]
+        print()
+        print(f"{'Scenario':<24} {'Richieste':>10} {'Errori':>7} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+        print('-' * 80)
+        for name in names:
+            method, paths, admin = SCENARIOS[name]
+            paths = [path.format(project_id=project_id) for path in paths for project_id in sample_ids] \
+                if any('{project_id}' in path for path in paths) else paths
+            result = run_scenario(name, base_url, paths, method, admin, args.concurrency, args.duration, args.warmup)
+            report['scenarios'][name] = result
+            latency = result['latency_ms']
+            print(f"{name:<24} {result['requests']:>10} {result['errors']:>7} {result['requests_per_sec']:>9} "
+                  f"{latency['p50']:>8} {latency['p95']:>8} {latency['p99']:>8}")
+            if result['errors']:
+                print(f"  ⚠️ Codici di stato: {result['status_codes']}")
+
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n📄 Report salvato in {args.json}")
+
+        if args.compare:
+            with open(args.compare, encoding='utf-8') as f:
+                regressions = compare(report, json.load(f), args.max_regression)
+            if regressions:
+                print(f"\n❌ Peggioramenti oltre il {args.max_regression:g}%: {', '.join(regressions)}")
+                return 1
+        return 0
+    finally:
+        if process is not None:
+            stop_gunicorn(process, log)
+        fake.stop()
+        if args.keep:
+            print(f"📁 Database e log in {work_dir}")
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
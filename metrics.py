@@ -0,0 +1,335 @@
+"""
+Metriche dell'applicazione in formato testo Prometheus.
+
+Raccolte per ogni richiesta, con costo di pochi aggiornamenti di dizionari
+in memoria:
+  - durata delle richieste per endpoint (istogramma) e conteggio per
+    endpoint, metodo e status
+  - richieste in corso
+  - numero di query SQL e tempo passato nel database per richiesta,
+    misurati con gli eventi dell'Engine di SQLAlchemy
+  - richieste in uscita verso l'API GitHub (conteggio per status e latenza)
+
+Con più worker gunicorn ogni processo ha i propri contatori: ogni worker
+salva periodicamente (al più ogni METRICS_FLUSH_INTERVAL secondi) una copia
+dei suoi valori in METRICS_DIR/<pid>.json e /metrics somma le copie di tutti
+i worker, compresi quelli terminati, così i contatori non tornano indietro
+quando un worker viene riavviato. Le richieste in corso contano solo i
+processi ancora vivi. Le copie vanno eliminate a ogni deploy, prima
+dell'avvio dei worker: lo fa on_starting in gunicorn.conf.py.
+
+Configurazione tramite variabili d'ambiente:
+    METRICS_ENABLED         0 per disattivare la raccolta (default 1)
+    METRICS_DIR             cartella delle copie dei worker (default instance/metrics)
+    METRICS_FLUSH_INTERVAL  secondi tra due salvataggi dello stesso worker (default 5)
+    METRICS_TOKEN           token per leggere /metrics senza login admin
+                            (header Authorization: Bearer <token>)
+"""
+
+import json
+import os
+import threading
+import time
+from flask import has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+# Stato della richiesta in corso (inizio, query, status) nell'environ WSGI
+ENVIRON_KEY = 'portfolio.metrics'
+
+# nome -> (tipo, descrizione, bucket degli istogrammi)
+METRICS = {
+    'portfolio_http_requests_total': (
+        'counter', 'Richieste HTTP gestite per endpoint, metodo e status', None),
+    'portfolio_http_request_duration_seconds': (
+        'histogram', 'Durata delle richieste HTTP per endpoint', DURATION_BUCKETS),
+    'portfolio_http_requests_in_progress': (
+        'gauge', 'Richieste HTTP in corso', None),
+    'portfolio_db_queries_per_request': (
+        'histogram', 'Query SQL eseguite per richiesta, per endpoint', QUERY_COUNT_BUCKETS),
+    'portfolio_db_query_duration_seconds_per_request': (
+        'histogram', 'Tempo passato nelle query SQL per richiesta, per endpoint', DURATION_BUCKETS),
+    'portfolio_github_requests_total': (
+        'counter', 'Richieste verso l\'API GitHub per status (error se fallite)', None),
+    'portfolio_github_request_duration_seconds': (
+        'histogram', 'Durata delle richieste verso l\'API GitHub', DURATION_BUCKETS),
+}
+
+
+def _labels_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+class Registry:
+    """Valori delle metriche di un processo"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.pid = os.getpid()
+            self.values = {}      # (nome, etichette) -> valore di counter e gauge
+            self.histograms = {}  # (nome, etichette) -> [conteggi per bucket..., somma, totale]
+
+    def _check_pid(self):
+        # Dopo un fork i valori del processo padre non appartengono al worker
+        if self.pid != os.getpid():
+            self.reset()
+
+    def inc(self, name, labels=None, amount=1):
+        self._check_pid()
+        key = (name, _labels_key(labels or {}))
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def set(self, name, value, labels=None):
+        self._check_pid()
+        key = (name, _labels_key(labels or {}))
+        with self._lock:
+            self.values[key] = value
+
+    def observe(self, name, value, labels=None):
+        self._check_pid()
+        buckets = METRICS[name][2]
+        key = (name, _labels_key(labels or {}))
+        with self._lock:
+            data = self.histograms.get(key)
+            if data is None:
+                data = self.histograms[key] = [0] * (len(buckets) + 2)
+            for index, bound in enumerate(buckets):
+                if value <= bound:
+                    data[index] += 1
+                    break
+            data[-2] += value
+            data[-1] += 1
+
+    def snapshot(self):
+        """Copia serializzabile in JSON dei valori attuali"""
+        self._check_pid()
+        with self._lock:
+            return {
+                'pid': self.pid,
+                'values': [[name, list(labels), value] for (name, labels), value in self.values.items()],
+                'histograms': [[name, list(labels), list(data)] for (name, labels), data in self.histograms.items()],
+            }
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def merge_snapshots(snapshots):
+    """Somma le copie dei worker; le gauge valgono solo per i processi vivi"""
+    values = {}
+    histograms = {}
+    for snapshot in snapshots:
+        alive = snapshot['pid'] == os.getpid() or _pid_alive(snapshot['pid'])
+        for name, labels, value in snapshot['values']:
+            if name not in METRICS or (METRICS[name][0] == 'gauge' and not alive):
+                continue
+            key = (name, tuple(tuple(pair) for pair in labels))
+            values[key] = values.get(key, 0) + value
+        for name, labels, data in snapshot['histograms']:
+            if name not in METRICS or len(data) != len(METRICS[name][2]) + 2:
+                continue
+            key = (name, tuple(tuple(pair) for pair in labels))
+            total = histograms.setdefault(key, [0] * len(data))
+            for index, value in enumerate(data):
+                total[index] += value
+    return values, histograms
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_text(values, histograms):
+    """Formato di esposizione testuale di Prometheus (versione 0.0.4)"""
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        if kind == 'histogram':
+            for (metric, labels), data in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(buckets, data):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{_format_labels(labels + (("le", str(bound)),))} {cumulative}')
+                lines.append(f'{name}_bucket{_format_labels(labels + (("le", "+Inf"),))} {data[-1]}')
+                lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(data[-2])}')
+                lines.append(f'{name}_count{_format_labels(labels)} {data[-1]}')
+        else:
+            for (metric, labels), value in sorted(values.items()):
+                if metric == name:
+                    lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+    return '\n'.join(lines) + '\n'
+
+
+class Metrics:
+    """Raccolta delle metriche di un'app Flask, aggregate tra i worker tramite file"""
+
+    def __init__(self, directory, flush_interval=5, enabled=True):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.enabled = enabled
+        self.registry = Registry()
+        self._last_flush = 0
+        self._in_progress = 0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        if not self.enabled:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        listen_to_queries()
+
+    # --- Richieste HTTP ---
+
+    def _before_request(self):
+        request.environ[ENVIRON_KEY] = {
+            'started_at': time.perf_counter(),
+            'queries': 0,
+            'query_time': 0.0,
+            'status': 500
+        }
+        self._track_in_progress(1)
+
+    def _after_request(self, response):
+        state = request.environ.get(ENVIRON_KEY)
+        if state is not None:
+            state['status'] = response.status_code
+        return response
+
+    def _teardown_request(self, exc):
+        # Chiamato dopo la fine della risposta, anche se inviata in streaming
+        state = request.environ.pop(ENVIRON_KEY, None)
+        if state is None:
+            return
+        self._track_in_progress(-1)
+
+        endpoint = request.endpoint or 'unmatched'
+        status = 500 if exc is not None else state['status']
+        labels = {'endpoint': endpoint}
+        self.registry.inc('portfolio_http_requests_total',
+                          {'endpoint': endpoint, 'method': request.method, 'status': str(status)})
+        self.registry.observe('portfolio_http_request_duration_seconds', time.perf_counter() - state['started_at'], labels)
+        self.registry.observe('portfolio_db_queries_per_request', state['queries'], labels)
+        self.registry.observe('portfolio_db_query_duration_seconds_per_request', state['query_time'], labels)
+        self.maybe_flush()
+
+    def _track_in_progress(self, delta):
+        with self._lock:
+            self._in_progress += delta
+            value = self._in_progress
+        self.registry.set('portfolio_http_requests_in_progress', value)
+
+    # --- Richieste GitHub ---
+
+    def record_github_request(self, status, elapsed):
+        if not self.enabled:
+            return
+        self.registry.inc('portfolio_github_requests_total', {'status': str(status)})
+        self.registry.observe('portfolio_github_request_duration_seconds', elapsed)
+
+    # --- Aggregazione ---
+
+    def snapshot_path(self, pid=None):
+        return os.path.join(self.directory, f'{pid or os.getpid()}.json')
+
+    def flush(self):
+        """Salva la copia dei valori del worker (scrittura atomica)"""
+        snapshot = self.registry.snapshot()
+        path = self.snapshot_path(snapshot['pid'])
+        tmp_path = f'{path}.tmp'
+        try:
+            # La cartella può essere stata svuotata o rimossa dopo l'avvio
+            os.makedirs(self.directory, exist_ok=True)
+            with open(tmp_path, 'w') as f:
+                json.dump(snapshot, f)
+            os.replace(tmp_path, path)
+            self._last_flush = time.time()
+        except OSError as e:
+            print(f"⚠️ Errore nel salvataggio delle metriche: {e}")
+
+    def maybe_flush(self):
+        if time.time() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def collect(self):
+        """Copie di tutti i worker, con i valori aggiornati del processo corrente"""
+        own = self.registry.snapshot()
+        snapshots = [own]
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            names = []
+        for name in names:
+            if not name.endswith('.json') or name == f"{own['pid']}.json":
+                continue
+            try:
+                with open(os.path.join(self.directory, name)) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Copia delle metriche {name} non leggibile: {e}")
+        return snapshots
+
+    def render(self):
+        return render_text(*merge_snapshots(self.collect()))
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('metrics_query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('metrics_query_start')
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    # Le query fuori da una richiesta (thread in background, CLI) non vengono contate
+    state = request.environ.get(ENVIRON_KEY) if has_request_context() else None
+    if state is not None:
+        state['queries'] += 1
+        state['query_time'] += elapsed
+
+
+def listen_to_queries():
+    """Misura le query di tutti gli Engine SQLAlchemy del processo (una sola volta)"""
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+def create_metrics_from_env(default_directory):
+    """Crea la raccolta delle metriche leggendo la configurazione dalle variabili d'ambiente"""
+    return Metrics(
+        os.environ.get('METRICS_DIR', default_directory),
+        flush_interval=float(os.environ.get('METRICS_FLUSH_INTERVAL', 5)),
+        enabled=os.environ.get('METRICS_ENABLED', '1') != '0'
+    )
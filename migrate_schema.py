@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Migrazioni dello schema del database, ripetibili e compatibili con SQLite e PostgreSQL.
+
+Ogni migrazione ha un identificativo e viene registrata nella tabella
+schema_migrations dopo essere stata applicata, quindi lo script può essere
+eseguito a ogni deploy: le migrazioni già applicate vengono saltate.
+Anche i singoli passaggi sono idempotenti (IF NOT EXISTS), così una
+migrazione interrotta a metà può essere rieseguita senza errori.
+
+Uso:
+    python migrate_schema.py          # applica le migrazioni mancanti
+    python migrate_schema.py --status # mostra lo stato delle migrazioni
+"""
+
+import json
+import sys
+from datetime import datetime
+from app import app, db
+from models import Project, Technology, ProjectTechnology
+from search import rebuild_index
+from images import process_image
+
+# Elenco ordinato delle migrazioni: (id, descrizione, funzione)
+MIGRATIONS = []
+
+
+def migration(migration_id, description):
+    """Registra una funzione come migrazione"""
+    def decorator(func):
+        MIGRATIONS.append((migration_id, description, func))
+        return func
+    return decorator
+
+
+def create_index(conn, name, table, columns):
+    """Crea un indice se non esiste già (sintassi valida su SQLite e PostgreSQL)"""
+    quote = conn.dialect.identifier_preparer.quote
+    column_list = ', '.join(quote(column) for column in columns)
+    conn.execute(db.text(f'CREATE INDEX IF NOT EXISTS {quote(name)} ON {quote(table)} ({column_list})'))
+
+
+def add_column(conn, table, column, column_type):
+    """Aggiunge una colonna se non esiste già"""
+    existing = {col['name'] for col in db.inspect(conn).get_columns(table)}
+    if column not in existing:
+        quote = conn.dialect.identifier_preparer.quote
+        conn.execute(db.text(f'ALTER TABLE {quote(table)} ADD COLUMN {quote(column)} {column_type}'))
+
+
+@migration('0001_list_indexes', 'Indici per i filtri e gli ordinamenti delle liste')
+def add_list_indexes(conn):
+    indexes = [
+        ('ix_project_created_at', 'project', ['created_at']),
+        ('ix_project_featured_created_at', 'project', ['featured', 'created_at']),
+        ('ix_review_created_at', 'review', ['created_at']),
+        ('ix_review_approved_created_at', 'review', ['approved', 'created_at']),
+        ('ix_contact_message_created_at', 'contact_message', ['created_at']),
+        ('ix_contact_message_read_created_at', 'contact_message', ['read', 'created_at']),
+        ('ix_user_created_at', 'user', ['created_at']),
+    ]
+    for name, table, columns in indexes:
+        print(f"  - {name} su {table} ({', '.join(columns)})")
+        create_index(conn, name, table, columns)
+
+
+@migration('0002_technology_tags', 'Tag delle tecnologie normalizzati dalla colonna technologies')
+def convert_technology_tags(conn):
+    create_index(conn, 'ix_project_category_created_at', 'project', ['category', 'created_at'])
+    create_index(conn, 'ix_project_technology_technology_id', 'project_technology', ['technology_id', 'project_id'])
+
+    technology_table = Technology.__table__
+    link_table = ProjectTechnology.__table__
+    project_table = Project.__table__
+
+    technology_ids = {
+        slug: technology_id
+        for technology_id, slug in conn.execute(db.select(technology_table.c.id, technology_table.c.slug))
+    }
+    # I progetti che hanno già dei tag sono stati convertiti (o modificati dopo la migrazione)
+    tagged = {row[0] for row in conn.execute(db.select(link_table.c.project_id).distinct())}
+
+    converted = 0
+    rows = conn.execute(db.select(project_table.c.id, project_table.c.technologies)).fetchall()
+    for project_id, technologies in rows:
+        if project_id in tagged or not technologies:
+            continue
+        links, seen = [], set()
+        for name in (Technology.clean_name(name) for name in technologies.split(',')):
+            slug = Technology.slugify(name)
+            if not name or slug in seen:
+                continue
+            seen.add(slug)
+            if slug not in technology_ids:
+                result = conn.execute(technology_table.insert().values(name=name, slug=slug))
+                technology_ids[slug] = result.inserted_primary_key[0]
+            links.append({'project_id': project_id, 'technology_id': technology_ids[slug], 'position': len(links)})
+        if links:
+            conn.execute(link_table.insert(), links)
+            converted += 1
+
+    print(f"  - {converted} progetti convertiti, {len(technology_ids)} tag in totale")
+
+
+@migration('0003_search_index', 'Indice di ricerca full-text (FTS5 su SQLite, tsvector su PostgreSQL)')
+def build_search_index(conn):
+    count = rebuild_index(conn)
+    print(f"  - {count} documenti indicizzati")
+
+
+@migration('0004_contact_email_status', 'Esito della verifica email sui messaggi di contatto')
+def add_contact_email_status(conn):
+    add_column(conn, 'contact_message', 'email_status', 'VARCHAR(20)')
+
+
+@migration('0005_project_image_variants', 'Dimensioni e varianti ridimensionate delle immagini dei progetti')
+def add_project_image_variants(conn):
+    add_column(conn, 'project', 'image_width', 'INTEGER')
+    add_column(conn, 'project', 'image_height', 'INTEGER')
+    add_column(conn, 'project', 'image_variants', 'TEXT')
+
+    # Genera le varianti delle immagini già presenti
+    table = Project.__table__
+    processed = 0
+    for project_id, image in conn.execute(db.select(table.c.id, table.c.image)):
+        info = process_image(app.static_folder, image)
+        if info:
+            conn.execute(table.update().where(table.c.id == project_id).values(
+                image_width=info['width'],
+                image_height=info['height'],
+                image_variants=json.dumps(info['variants'])
+            ))
+            processed += 1
+    print(f"  - {processed} immagini elaborate")
+
+
+def ensure_migrations_table(conn):
+    conn.execute(db.text(
+        'CREATE TABLE IF NOT EXISTS schema_migrations ('
+        'id VARCHAR(100) PRIMARY KEY, '
+        'applied_at TIMESTAMP NOT NULL)'
+    ))
+
+
+def applied_migrations():
+    """Restituisce gli id delle migrazioni già applicate"""
+    with db.engine.begin() as conn:
+        ensure_migrations_table(conn)
+        return {row[0] for row in conn.execute(db.text('SELECT id FROM schema_migrations'))}
+
+
+def run_migrations():
+    """Applica in ordine le migrazioni mancanti, ognuna nella sua transazione"""
+    with app.app_context():
+        # Crea le tabelle mancanti (un database nuovo nasce già aggiornato)
+        db.create_all()
+
+        applied = applied_migrations()
+        pending = [m for m in MIGRATIONS if m[0] not in applied]
+        if not pending:
+            print("✅ Database già aggiornato, nessuna migrazione da applicare")
+            return 0
+
+        for migration_id, description, func in pending:
+            print(f"🔄 Applicando {migration_id}: {description}")
+            with db.engine.begin() as conn:
+                func(conn)
+                conn.execute(
+                    db.text('INSERT INTO schema_migrations (id, applied_at) VALUES (:id, :applied_at)'),
+                    {'id': migration_id, 'applied_at': datetime.utcnow()}
+                )
+            print(f"✅ {migration_id} applicata")
+
+        return len(pending)
+
+
+def print_status():
+    """Mostra quali migrazioni sono state applicate"""
+    with app.app_context():
+        applied = applied_migrations()
+    for migration_id, description, _ in MIGRATIONS:
+        status = "✅" if migration_id in applied else "⏳"
+        print(f"{status} {migration_id}: {description}")
+
+
+if __name__ == '__main__':
+    if '--status' in sys.argv:
+        print_status()
+    else:
+        print("🚀 Avvio migrazioni schema...")
+        try:
+            count = run_migrations()
+            print(f"\n✅ Migrazioni completate ({count} applicate)")
+        except Exception as e:
+            print(f"❌ Errore durante la migrazione: {e}")
+            sys.exit(1)
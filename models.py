@@ -1,6 +1,7 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
+import json
 from datetime import datetime
 
 db = SQLAlchemy()
@@ -11,7 +12,7 @@ class User(UserMixin, db.Model):
     email = db.Column(db.String(120), unique=True, nullable=False)
     password_hash = db.Column(db.String(255), nullable=False)
     is_admin = db.Column(db.Boolean, default=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
 
     def set_password(self, password):
         self.password_hash = generate_password_hash(password)
@@ -20,26 +21,79 @@ class User(UserMixin, db.Model):
         return check_password_hash(self.password_hash, password)
 
 class Project(db.Model):
+    __table_args__ = (
+        # Homepage: progetti in evidenza ordinati per data
+        db.Index('ix_project_featured_created_at', 'featured', 'created_at'),
+        # Pagina progetti: filtro per categoria ordinato per data
+        db.Index('ix_project_category_created_at', 'category', 'created_at'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text, nullable=False)
     image = db.Column(db.String(255), default='project-default.jpg')
+    image_width = db.Column(db.Integer)  # Dimensioni dell'immagine originale
+    image_height = db.Column(db.Integer)
+    image_variants = db.Column(db.Text)  # Varianti ridimensionate in JSON (vedi images.py)
     github_repo = db.Column(db.String(255))  # Repository GitHub
     category = db.Column(db.String(50), default='web')
-    technologies = db.Column(db.Text)  # JSON string
+    technologies = db.Column(db.Text)  # Copia testuale dei tag, separati da virgola
     featured = db.Column(db.Boolean, default=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # Tag normalizzati, caricati con una sola query per tutta la lista (selectin)
+    technology_links = db.relationship(
+        'ProjectTechnology',
+        order_by='ProjectTechnology.position',
+        cascade='all, delete-orphan',
+        lazy='selectin',
+        back_populates='project'
+    )
+
     def get_technologies_list(self):
-        """Convert technologies string to list"""
+        """Convert technology tags to list"""
+        if self.technology_links:
+            return [link.technology.name for link in self.technology_links]
+        # Progetti non ancora migrati ai tag normalizzati
         if self.technologies:
             return self.technologies.split(',')
         return []
 
     def set_technologies_list(self, tech_list):
-        """Convert list to technologies string"""
-        self.technologies = ','.join(tech_list) if tech_list else ''
+        """Set technology tags from list (keeps the technologies string in sync)"""
+        names, seen = [], set()
+        for name in tech_list or []:
+            name = Technology.clean_name(name)
+            slug = Technology.slugify(name)
+            if name and slug not in seen:
+                seen.add(slug)
+                names.append(name)
+
+        existing = {link.technology.slug: link for link in self.technology_links}
+        links = []
+        for position, name in enumerate(names):
+            link = existing.get(Technology.slugify(name))
+            if link is None:
+                link = ProjectTechnology(technology=Technology.get_or_create(name))
+            link.position = position
+            links.append(link)
+
+        self.technology_links = links
+        self.technologies = ','.join(link.technology.name for link in links)
+
+    def get_image_variants(self):
+        """Resized image variants, smallest first"""
+        if not self.image_variants:
+            return []
+        return json.loads(self.image_variants)
+
+    def set_image_info(self, info):
+        """Store the output of images.process_image (None clears the variants)"""
+        info = info or {}
+        self.image_width = info.get('width')
+        self.image_height = info.get('height')
+        self.image_variants = json.dumps(info['variants']) if info.get('variants') else None
 
     def to_dict(self):
         """Convert project to dictionary for JSON response"""
@@ -48,6 +102,8 @@ class Project(db.Model):
             'title': self.title,
             'description': self.description,
             'image': self.image,
+            'image_width': self.image_width,
+            'image_height': self.image_height,
             'github_repo': self.github_repo,
             'category': self.category,
             'technologies': self.get_technologies_list(),
@@ -56,14 +112,68 @@ class Project(db.Model):
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
 
+class Technology(db.Model):
+    # Lunghezza massima di un tag: le route admin rifiutano i tag più lunghi
+    MAX_LENGTH = 50
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(MAX_LENGTH), nullable=False)
+    slug = db.Column(db.String(MAX_LENGTH), unique=True, nullable=False)  # Nome in minuscolo, usato nei filtri
+
+    @staticmethod
+    def slugify(name):
+        return name.strip().lower()
+
+    @classmethod
+    def clean_name(cls, name):
+        """Nome del tag senza spazi, troncato alla lunghezza della colonna (su PostgreSQL un valore più lungo è un errore)"""
+        return name.strip()[:cls.MAX_LENGTH].strip()
+
+    @classmethod
+    def get_or_create(cls, name):
+        """Restituisce il tag con questo nome (senza distinzione di maiuscole), creandolo se manca"""
+        slug = cls.slugify(name)
+        with db.session.no_autoflush:
+            technology = cls.query.filter_by(slug=slug).first()
+            if technology is None:
+                # Tag creato in questa stessa sessione ma non ancora salvato
+                technology = next(
+                    (obj for obj in db.session.new if isinstance(obj, cls) and obj.slug == slug),
+                    None
+                )
+        if technology is None:
+            technology = cls(name=name.strip(), slug=slug)
+            db.session.add(technology)
+        return technology
+
+class ProjectTechnology(db.Model):
+    __tablename__ = 'project_technology'
+    __table_args__ = (
+        # Filtro ?tech=: dai tag ai progetti (la chiave primaria copre il verso opposto)
+        db.Index('ix_project_technology_technology_id', 'technology_id', 'project_id'),
+    )
+
+    project_id = db.Column(db.Integer, db.ForeignKey('project.id', ondelete='CASCADE'), primary_key=True)
+    technology_id = db.Column(db.Integer, db.ForeignKey('technology.id', ondelete='CASCADE'), primary_key=True)
+    position = db.Column(db.Integer, nullable=False, default=0)  # Ordine di visualizzazione
+
+    project = db.relationship('Project', back_populates='technology_links')
+    technology = db.relationship('Technology', lazy='joined')
+
 class ContactMessage(db.Model):
+    __table_args__ = (
+        # Admin: messaggi non letti ordinati per data
+        db.Index('ix_contact_message_read_created_at', 'read', 'created_at'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     email = db.Column(db.String(120), nullable=False)
     subject = db.Column(db.String(200), nullable=False)
     message = db.Column(db.Text, nullable=False)
     read = db.Column(db.Boolean, default=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    email_status = db.Column(db.String(20))  # Esito verifica DNS: deliverable, undeliverable, unknown (None = non verificata)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     
     def to_dict(self):
         """Convert message to dictionary for JSON response"""
@@ -71,6 +181,7 @@ class ContactMessage(db.Model):
             'id': self.id,
             'name': self.name,
             'email': self.email,
+            'email_status': self.email_status,
             'subject': self.subject,
             'message': self.message,
             'read': self.read,
@@ -78,11 +189,16 @@ class ContactMessage(db.Model):
         }
 
 class Review(db.Model):
+    __table_args__ = (
+        # Pagina recensioni: recensioni approvate ordinate per data
+        db.Index('ix_review_approved_created_at', 'approved', 'created_at'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     rating = db.Column(db.Integer, nullable=False)  # 1-5 stelle
     comment = db.Column(db.Text, nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     approved = db.Column(db.Boolean, default=False)  # Solo recensioni approvate vengono mostrate
     
     def to_dict(self):
@@ -0,0 +1,147 @@
+"""
+Moderazione in blocco di recensioni e messaggi di contatto.
+
+Una selezione è una lista di id (le caselle spuntate nelle pagine admin)
+e/o un filtro per stato ed età, ad esempio "tutte le recensioni in attesa
+più vecchie di 30 giorni". Ogni azione esegue una sola UPDATE o DELETE
+set-based sulle righe selezionate, senza caricare gli oggetti nella
+sessione, e restituisce il numero di righe modificate.
+
+Le istruzioni massive non passano dal listener after_flush dell'indice di
+ricerca: gli id modificati vengono letti con RETURNING e l'indice viene
+aggiornato con search.set_public() e search.remove() nella stessa
+transazione. Il commit e l'invalidazione della cache delle pagine
+spettano al chiamante.
+"""
+
+from datetime import datetime, timedelta
+from sqlalchemy import update, delete
+from models import db, ContactMessage, Review
+import search
+
+# Id accettati in una selezione esplicita: per insiemi più grandi si usa un filtro
+MAX_IDS = 500
+
+# Tipo -> (modello, filtri di stato)
+MODELS = {
+    'review': (Review, {
+        'pending': Review.approved == False,
+        'approved': Review.approved == True,
+        'all': None,
+    }),
+    'message': (ContactMessage, {
+        'unread': ContactMessage.read == False,
+        'read': ContactMessage.read == True,
+        'all': None,
+    }),
+}
+
+
+class InvalidSelection(ValueError):
+    """Selezione o azione non valida (il messaggio è mostrato all'admin)"""
+
+
+def parse_ids(values):
+    """Id della selezione: una lista di interi o di stringhe di cifre (mai una stringa singola)"""
+    if values is None:
+        return []
+    if not isinstance(values, (list, tuple)):
+        raise InvalidSelection('Selezione non valida.')
+    if not all(isinstance(value, str) or (isinstance(value, int) and not isinstance(value, bool)) for value in values):
+        raise InvalidSelection('Selezione non valida.')
+    try:
+        ids = sorted({int(value) for value in values})
+    except ValueError:
+        raise InvalidSelection('Selezione non valida.')
+    if len(ids) > MAX_IDS:
+        raise InvalidSelection(f'Troppi elementi selezionati (massimo {MAX_IDS}): usa un filtro.')
+    return ids
+
+
+def selection_criteria(kind, ids=None, status=None, older_than=None):
+    """
+    Condizioni WHERE per una selezione: id e/o stato e/o età minima in
+    giorni. Senza nessun criterio non seleziona nulla (per agire su tutto
+    serve status='all' esplicito).
+    """
+    model, statuses = MODELS[kind]
+    ids = parse_ids(ids)
+    criteria = []
+    if ids:
+        criteria.append(model.id.in_(ids))
+    if status:
+        if not isinstance(status, str) or status not in statuses:
+            raise InvalidSelection('Filtro di stato non valido.')
+        if statuses[status] is not None:
+            criteria.append(statuses[status])
+    if older_than not in (None, ''):
+        if isinstance(older_than, bool) or not isinstance(older_than, (str, int)):
+            raise InvalidSelection('Numero di giorni non valido.')
+        try:
+            days = int(older_than)
+        except (TypeError, ValueError):
+            raise InvalidSelection('Numero di giorni non valido.')
+        if days < 0:
+            raise InvalidSelection('Numero di giorni non valido.')
+        criteria.append(model.created_at < datetime.utcnow() - timedelta(days=days))
+    if not ids and not status and older_than in (None, ''):
+        raise InvalidSelection('Nessun elemento selezionato.')
+    return criteria
+
+
+def _update_returning_ids(model, criteria, values):
+    statement = update(model).where(*criteria).values(**values).returning(model.id)
+    result = db.session.execute(statement, execution_options={'synchronize_session': False})
+    return [row[0] for row in result]
+
+
+def _delete_returning_ids(model, criteria):
+    statement = delete(model).where(*criteria).returning(model.id)
+    result = db.session.execute(statement, execution_options={'synchronize_session': False})
+    return [row[0] for row in result]
+
+
+def approve_reviews(criteria):
+    ids = _update_returning_ids(Review, [*criteria, Review.approved == False], {'approved': True})
+    search.set_public('review', ids, True)
+    return len(ids)
+
+
+def delete_reviews(criteria):
+    ids = _delete_returning_ids(Review, criteria)
+    search.remove('review', ids)
+    return len(ids)
+
+
+def mark_messages_read(criteria):
+    # Il flag read non è indicizzato: nessun aggiornamento dell'indice
+    ids = _update_returning_ids(ContactMessage, [*criteria, ContactMessage.read == False], {'read': True})
+    return len(ids)
+
+
+def delete_messages(criteria):
+    ids = _delete_returning_ids(ContactMessage, criteria)
+    search.remove('message', ids)
+    return len(ids)
+
+
+# Tipo -> azione -> (funzione, messaggio con il numero di righe)
+ACTIONS = {
+    'review': {
+        'approve': (approve_reviews, '{count} recensioni approvate.'),
+        'delete': (delete_reviews, '{count} recensioni eliminate.'),
+    },
+    'message': {
+        'read': (mark_messages_read, '{count} messaggi segnati come letti.'),
+        'delete': (delete_messages, '{count} messaggi eliminati.'),
+    },
+}
+
+
+def apply(kind, action, criteria):
+    """Esegue l'azione sulla selezione e restituisce (righe modificate, messaggio)"""
+    if not isinstance(action, str) or action not in ACTIONS[kind]:
+        raise InvalidSelection('Azione non valida.')
+    func, message = ACTIONS[kind][action]
+    count = func(criteria)
+    return count, message.format(count=count)
@@ -0,0 +1,286 @@
+"""
+Cache lato server delle pagine pubbliche renderizzate.
+
+Le pagine vengono salvate per gruppo (es. 'projects') e per percorso completo
+della richiesta (route + query string) e restano valide fino alla scadenza
+o finché una route admin non invalida esplicitamente il gruppo dopo una
+scrittura sul database.
+
+Backend disponibili (variabile PAGE_CACHE_BACKEND):
+    memory  LRU nel processo (default): veloce, ma ogni worker ha la sua copia
+    sqlite  file SQLite condiviso: le invalidazioni valgono per tutti i worker
+            gunicorn della stessa macchina
+    none    cache disattivata
+
+Le richieste di utenti autenticati, quelle con messaggi flash in attesa e
+tutte le richieste diverse da GET non leggono né scrivono la cache.
+
+Ogni invalidazione registra anche l'istante della modifica del gruppo
+(last_changed), usato come Last-Modified dalle risposte condizionali
+(vedi http_cache): cancellazioni e approvazioni non cambiano nessuna data
+nel database, ma passano sempre da un'invalidazione.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import request, session
+from flask_login import current_user
+
+
+def is_personalized_request():
+    """
+    True se la risposta dipende dalla sessione dell'utente (login o messaggi
+    flash in attesa) e quindi non può essere condivisa o messa in cache
+    """
+    if current_user.is_authenticated:
+        return True
+    return bool(session.get('_flashes'))
+
+
+class MemoryBackend:
+    """Cache LRU in memoria, limitata nel numero di voci"""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._changed = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (value, time.time() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete_prefix(self, prefix):
+        with self._lock:
+            for key in [key for key in self._data if key.startswith(prefix)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def get_changed(self, group):
+        return self._changed.get(group)
+
+    def set_changed(self, group, changed_at):
+        self._changed[group] = changed_at
+
+
+class SQLiteBackend:
+    """Cache LRU su file SQLite, condivisa tra i processi della stessa macchina"""
+
+    def __init__(self, path, max_entries=1000):
+        self.path = path
+        self.max_entries = max_entries
+        self._initialized = False
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5)
+        if not self._initialized:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS page_cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_page_cache_last_access ON page_cache (last_access)')
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS page_cache_changes (
+                    group_name TEXT PRIMARY KEY,
+                    changed_at REAL NOT NULL
+                )
+            """)
+            conn.commit()
+            self._initialized = True
+        return conn
+
+    def get(self, key):
+        try:
+            conn = self._connect()
+            try:
+                now = time.time()
+                row = conn.execute(
+                    'SELECT value FROM page_cache WHERE key = ? AND expires_at > ?', (key, now)
+                ).fetchone()
+                if row is None:
+                    return None
+                conn.execute('UPDATE page_cache SET last_access = ? WHERE key = ?', (now, key))
+                conn.commit()
+                return row[0]
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"Errore nella lettura della cache pagine: {e}")
+            return None
+
+    def set(self, key, value, ttl):
+        try:
+            conn = self._connect()
+            try:
+                now = time.time()
+                conn.execute(
+                    'INSERT OR REPLACE INTO page_cache (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)',
+                    (key, value, now + ttl, now)
+                )
+                conn.execute(
+                    'DELETE FROM page_cache WHERE key IN ('
+                    'SELECT key FROM page_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?)',
+                    (self.max_entries,)
+                )
+                conn.commit()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"Errore nella scrittura della cache pagine: {e}")
+
+    def delete_prefix(self, prefix):
+        try:
+            conn = self._connect()
+            try:
+                conn.execute('DELETE FROM page_cache WHERE substr(key, 1, ?) = ?', (len(prefix), prefix))
+                conn.commit()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"Errore nell'invalidazione della cache pagine: {e}")
+
+    def clear(self):
+        self.delete_prefix('')
+
+    def get_changed(self, group):
+        try:
+            conn = self._connect()
+            try:
+                row = conn.execute(
+                    'SELECT changed_at FROM page_cache_changes WHERE group_name = ?', (group,)
+                ).fetchone()
+                return row[0] if row else None
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"Errore nella lettura della cache pagine: {e}")
+            return None
+
+    def set_changed(self, group, changed_at):
+        try:
+            conn = self._connect()
+            try:
+                conn.execute(
+                    'INSERT OR REPLACE INTO page_cache_changes (group_name, changed_at) VALUES (?, ?)',
+                    (group, changed_at)
+                )
+                conn.commit()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"Errore nella scrittura della cache pagine: {e}")
+
+
+class PageCache:
+    """Cache delle pagine con invalidazione esplicita per gruppo"""
+
+    def __init__(self, backend=None, ttl=300):
+        self.backend = backend
+        self.ttl = ttl
+        # Senza backend le modifiche vengono tracciate solo nel processo
+        self._changed = MemoryBackend() if backend is None else backend
+        self.started_at = time.time()
+
+    @property
+    def enabled(self):
+        return self.backend is not None
+
+    def _key(self, group):
+        # Parametri ordinati: ?a=1&b=2 e ?b=2&a=1 condividono la stessa voce
+        args = '&'.join(f'{k}={v}' for k, v in sorted(request.args.items(multi=True)))
+        return f'{group}:{request.path}?{args}'
+
+    def _bypass(self):
+        """True se la richiesta corrente non deve usare la cache"""
+        return request.method != 'GET' or is_personalized_request()
+
+    def cached(self, group):
+        """Decoratore per le view che restituiscono HTML renderizzato"""
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if not self.enabled or self._bypass():
+                    return view(*args, **kwargs)
+
+                key = self._key(group)
+                html = self.backend.get(key)
+                if html is not None:
+                    return html, 200, {'X-Page-Cache': 'hit'}
+
+                rv = view(*args, **kwargs)
+                # Solo le risposte 200 semplici (stringhe) vengono salvate
+                if isinstance(rv, str):
+                    self.backend.set(key, rv, self.ttl)
+                    return rv, 200, {'X-Page-Cache': 'miss'}
+                return rv
+            return wrapper
+        return decorator
+
+    def invalidate(self, *groups):
+        """Elimina tutte le pagine dei gruppi indicati e registra la modifica"""
+        now = time.time()
+        for group in groups:
+            self._changed.set_changed(group, now)
+            if self.enabled:
+                self.backend.delete_prefix(f'{group}:')
+
+    def last_changed(self, group):
+        """
+        Timestamp dell'ultima invalidazione del gruppo. Se non è nota
+        si usa l'avvio del processo, così dopo un riavvio i client
+        ricevono comunque una versione aggiornata.
+        """
+        return max(self._changed.get_changed(group) or 0, self.started_at)
+
+    def clear(self):
+        if self.enabled:
+            self.backend.clear()
+
+
+def create_page_cache_from_env(default_path):
+    """Crea la cache delle pagine leggendo la configurazione dalle variabili d'ambiente"""
+    backend_name = os.environ.get('PAGE_CACHE_BACKEND', 'memory').lower()
+    ttl = int(os.environ.get('PAGE_CACHE_TTL', 300))
+    max_entries = int(os.environ.get('PAGE_CACHE_MAX_ENTRIES', 256))
+
+    if backend_name == 'none':
+        backend = None
+    elif backend_name == 'sqlite':
+        path = os.environ.get('PAGE_CACHE_PATH', default_path)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        backend = SQLiteBackend(path, max_entries=max_entries)
+    elif backend_name == 'memory':
+        backend = MemoryBackend(max_entries=max_entries)
+    else:
+        raise ValueError(f"PAGE_CACHE_BACKEND non valido: {backend_name}")
+
+    return PageCache(backend, ttl=ttl)
@@ -0,0 +1,83 @@
+"""
+Paginazione keyset (a cursore) per le liste ordinate per data.
+
+Invece di OFFSET, ogni pagina riparte dall'ultima riga della precedente
+usando la coppia (created_at, id): il costo di una pagina resta costante
+anche quando la tabella cresce e l'inserimento di nuove righe non sposta
+gli elementi tra una pagina e l'altra. L'ordinamento è sempre dal più
+recente al più vecchio.
+"""
+
+import base64
+import binascii
+from datetime import datetime
+from sqlalchemy import and_, or_
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+
+class InvalidCursor(ValueError):
+    """Cursore di paginazione non valido o manomesso"""
+
+
+class KeysetPage:
+    """Una pagina di risultati con il cursore per la pagina successiva"""
+
+    def __init__(self, items, next_cursor, limit):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.limit = limit
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+def encode_cursor(item):
+    """Crea il cursore opaco che punta dopo l'elemento indicato"""
+    raw = f"{item.created_at.isoformat()}|{item.id}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decodifica un cursore in (created_at, id)"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8')
+        created_at, item_id = raw.split('|', 1)
+        return datetime.fromisoformat(created_at), int(item_id)
+    except (binascii.Error, UnicodeError, ValueError):
+        raise InvalidCursor('Cursore di paginazione non valido')
+
+
+def parse_limit(value, default=DEFAULT_LIMIT):
+    """Converte il parametro limit della richiesta, limitandolo a MAX_LIMIT"""
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(limit, MAX_LIMIT))
+
+
+def keyset_paginate(query, model, cursor=None, limit=DEFAULT_LIMIT):
+    """
+    Restituisce una KeysetPage con al massimo limit elementi di query,
+    ordinati per (created_at, id) decrescenti e successivi a cursor
+    """
+    if cursor:
+        created_at, item_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            model.created_at < created_at,
+            and_(model.created_at == created_at, model.id < item_id)
+        ))
+
+    # Una riga in più per sapere se esiste una pagina successiva
+    items = query.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor(items[-1])
+
+    return KeysetPage(items, next_cursor, limit)
@@ -0,0 +1,207 @@
+"""
+Profilatore delle query SQL per richiesta, da attivare solo per il debug.
+
+Con SQL_PROFILER attivo ogni query eseguita durante una richiesta viene
+registrata con la durata e il punto di chiamata: la prima riga del codice
+dell'applicazione (o del template Jinja) fuori da SQLAlchemy e Flask.
+Le query con la stessa forma (stesso SQL, parametri esclusi) eseguite
+almeno SQL_PROFILER_REPEAT_THRESHOLD volte nella stessa richiesta vengono
+segnalate come possibili N+1, tipicamente un lazy load dentro un ciclo.
+
+Modalità (variabile SQL_PROFILER):
+    off     disattivato (default)
+    header  header X-SQL-Queries con numero di query, tempo totale e
+            forme ripetute, più un avviso nel log per le N+1
+    panel   come header, più un pannello con l'elenco delle query in fondo
+            alle pagine HTML (solo per gli admin autenticati o in debug)
+
+Nei test, assert_max_queries(client, url, n) fallisce se la route esegue
+più di n query, indipendentemente da SQL_PROFILER.
+"""
+
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter, namedtuple
+from contextlib import contextmanager
+from flask import current_app, has_request_context, render_template, request
+from flask_login import current_user
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+QueryRecord = namedtuple('QueryRecord', ['statement', 'duration', 'location'])
+
+# Stato della richiesta in corso nell'environ WSGI
+ENVIRON_KEY = 'portfolio.sql_profile'
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+_SKIPPED_PATHS = (os.path.join(PROJECT_ROOT, 'venv'), os.path.join(PROJECT_ROOT, '.venv'), __file__)
+
+# Liste IN espanse con un numero variabile di parametri: stessa forma
+_IN_LIST = re.compile(r'IN \((?:\?|:\w+|%\(\w+\)s)(?:, ?(?:\?|:\w+|%\(\w+\)s))*\)')
+
+# Registrazioni attive di capture_queries (usate dai test)
+_captures = []
+_captures_lock = threading.Lock()
+
+
+def statement_shape(statement):
+    """Forma della query: spazi normalizzati e liste IN ridotte a un segnaposto"""
+    return _IN_LIST.sub('IN (...)', ' '.join(statement.split()))
+
+
+def call_site():
+    """Prima riga del codice del progetto nello stack (file:riga o template:riga)"""
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(PROJECT_ROOT) and not filename.startswith(_SKIPPED_PATHS):
+            template = frame.f_globals.get('__jinja_template__')
+            if template is not None:
+                return f'templates/{template.name}:{template.get_corresponding_lineno(frame.f_lineno)}'
+            return f'{os.path.relpath(filename, PROJECT_ROOT)}:{frame.f_lineno} ({frame.f_code.co_name})'
+        frame = frame.f_back
+    return '?'
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('profiler_query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('profiler_query_start')
+    if not starts:
+        return
+    duration = time.perf_counter() - starts.pop()
+
+    queries = request.environ.get(ENVIRON_KEY) if has_request_context() else None
+    if queries is None and not _captures:
+        return
+    record = QueryRecord(statement, duration, call_site())
+    if queries is not None:
+        queries.append(record)
+    with _captures_lock:
+        for captured in _captures:
+            captured.append(record)
+
+
+def listen_to_queries():
+    """Registra tutte le query degli Engine SQLAlchemy del processo (una sola volta)"""
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+def summarize(queries, threshold=3):
+    """Totale, tempo e forme ripetute almeno threshold volte (con i punti di chiamata)"""
+    shapes = Counter(statement_shape(query.statement) for query in queries)
+    repeated = []
+    for shape, count in shapes.most_common():
+        if count < threshold:
+            break
+        locations = Counter(
+            query.location for query in queries if statement_shape(query.statement) == shape
+        )
+        repeated.append({'statement': shape, 'count': count, 'locations': [loc for loc, _ in locations.most_common()]})
+    return {
+        'count': len(queries),
+        'duration': sum(query.duration for query in queries),
+        'repeated': repeated,
+        'queries': queries
+    }
+
+
+def format_report(summary):
+    """Descrizione testuale del riepilogo, per il log e per i messaggi dei test"""
+    lines = [f"{summary['count']} query in {summary['duration'] * 1000:.1f} ms"]
+    for item in summary['repeated']:
+        lines.append(f"  {item['count']}× {item['statement'][:200]} ({', '.join(item['locations'])})")
+    return '\n'.join(lines)
+
+
+class SQLProfiler:
+    """Registra le query di ogni richiesta e ne mostra il riepilogo"""
+
+    MODES = ('off', 'header', 'panel')
+
+    def __init__(self, mode='off', threshold=3):
+        if mode not in self.MODES:
+            raise ValueError(f"SQL_PROFILER non valido: {mode}")
+        self.mode = mode
+        self.threshold = threshold
+
+    def init_app(self, app):
+        if self.mode == 'off':
+            return
+        listen_to_queries()
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+
+    def _before_request(self):
+        request.environ[ENVIRON_KEY] = []
+
+    def _after_request(self, response):
+        queries = request.environ.pop(ENVIRON_KEY, None)
+        if queries is None:
+            return response
+
+        summary = summarize(queries, self.threshold)
+        response.headers['X-SQL-Queries'] = (
+            f"count={summary['count']}; time_ms={summary['duration'] * 1000:.1f}; "
+            f"repeated={len(summary['repeated'])}"
+        )
+        if summary['repeated']:
+            print(f"⚠️ Possibili N+1 in {request.method} {request.path}: {format_report(summary)}")
+
+        if self.mode == 'panel' and self._show_panel(response):
+            panel = render_template('_sql_profile.html', summary=summary)
+            html = response.get_data(as_text=True)
+            response.set_data(html.replace('</body>', panel + '</body>', 1))
+        return response
+
+    def _show_panel(self, response):
+        # Il pannello mostra l'SQL: solo pagine HTML complete e solo agli admin (o in debug)
+        if response.mimetype != 'text/html' or response.is_streamed or response.direct_passthrough:
+            return False
+        return current_app.debug or (current_user.is_authenticated and current_user.is_admin)
+
+
+@contextmanager
+def capture_queries():
+    """Registra le query eseguite durante il blocco, comprese quelle delle richieste del test client"""
+    listen_to_queries()
+    captured = []
+    with _captures_lock:
+        _captures.append(captured)
+    try:
+        yield captured
+    finally:
+        with _captures_lock:
+            _captures.remove(captured)
+
+
+def assert_max_queries(client, url, max_queries, threshold=3, **kwargs):
+    """
+    Esegue una GET con il test client e solleva AssertionError se la route
+    esegue più di max_queries query. Restituisce la risposta.
+    """
+    with capture_queries() as queries:
+        response = client.get(url, **kwargs)
+        # Le risposte in streaming eseguono le query mentre vengono lette
+        response.get_data()
+    if len(queries) > max_queries:
+        raise AssertionError(
+            f"{url}: {len(queries)} query, massimo {max_queries}\n"
+            f"{format_report(summarize(queries, threshold))}"
+        )
+    return response
+
+
+def create_profiler_from_env():
+    """Crea il profilatore leggendo la configurazione dalle variabili d'ambiente"""
+    return SQLProfiler(
+        os.environ.get('SQL_PROFILER', 'off').lower(),
+        threshold=int(os.environ.get('SQL_PROFILER_REPEAT_THRESHOLD', 3))
+    )
@@ -0,0 +1,279 @@
+"""
+Limitazione delle richieste di scrittura pubbliche (form contatti e recensioni).
+
+Due controlli, eseguiti prima di qualsiasi lavoro della view (validazione,
+DNS, commit):
+  - token bucket per indirizzo IP del client: RATE_LIMIT_REQUESTS richieste
+    consecutive, poi il bucket si ricarica in RATE_LIMIT_PERIOD secondi.
+    Oltre il limite la risposta è 429.
+  - numero massimo di richieste di scrittura contemporanee
+    (WRITE_CONCURRENCY). Oltre il limite la risposta è 503, così i client
+    lenti o insistenti non occupano tutti i worker e i thread. I posti
+    occupati sono contati nel backend: con sqlite il limite vale per tutti
+    i worker della macchina, con memory (o none) per ogni processo. Con un
+    solo worker sync il limite per processo non scatta mai (una richiesta
+    alla volta): gunicorn.conf.py usa sqlite appena i worker sono più di uno.
+Entrambe le risposte hanno l'header Retry-After. Le richieste GET non sono limitate.
+
+L'IP del client è request.remote_addr: dietro un proxy (Render, nginx)
+impostare TRUSTED_PROXIES con il numero di proxy davanti all'app, così
+ProxyFix legge X-Forwarded-For senza fidarsi di valori inviati dal client.
+
+Backend dei contatori (RATE_LIMIT_BACKEND):
+    memory  LRU nel processo (default), al massimo RATE_LIMIT_MAX_KEYS client
+    sqlite  file SQLite condiviso: i limiti valgono per tutti i worker
+            gunicorn della stessa macchina
+    none    limitazione per IP disattivata
+"""
+
+import math
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from functools import wraps
+from flask import request
+from werkzeug.exceptions import TooManyRequests, ServiceUnavailable
+
+
+class WriteBusy(ServiceUnavailable):
+    """Troppe scritture contemporanee: 503 distinto dagli altri errori di servizio non disponibile"""
+
+
+class MemoryBackend:
+    """Token bucket in memoria, limitati nel numero di client"""
+
+    def __init__(self, max_keys=10000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._slots = {}
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, refill_rate, now=None):
+        """Consuma un token: restituisce 0 se la richiesta è consentita, altrimenti i secondi di attesa"""
+        now = time.time() if now is None else now
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated_at) * refill_rate)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0
+            else:
+                wait = (1 - tokens) / refill_rate
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return wait
+
+    def acquire_slot(self, name, limit, ttl, now=None):
+        """Occupa uno dei limit posti: restituisce il token da rilasciare, oppure None se sono tutti occupati"""
+        with self._lock:
+            if self._slots.get(name, 0) >= limit:
+                return None
+            self._slots[name] = self._slots.get(name, 0) + 1
+            return name
+
+    def release_slot(self, name, token):
+        with self._lock:
+            self._slots[name] = max(0, self._slots.get(name, 0) - 1)
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+            self._slots.clear()
+
+
+class SQLiteBackend:
+    """Token bucket su file SQLite, condivisi tra i processi della stessa macchina"""
+
+    # Ogni quante scritture eliminare i bucket tornati pieni (equivalenti a un client nuovo)
+    CLEANUP_EVERY = 100
+
+    def __init__(self, path, max_keys=10000):
+        self.path = path
+        self.max_keys = max_keys
+        self._initialized = False
+        self._writes = 0
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        if not self._initialized:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS rate_limit (
+                    key TEXT PRIMARY KEY,
+                    tokens REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_rate_limit_updated_at ON rate_limit (updated_at)')
+            # Posti occupati dalle scritture in corso in tutti i worker
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS write_slots (
+                    token TEXT PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            """)
+            self._initialized = True
+        return conn
+
+    def take(self, key, capacity, refill_rate, now=None):
+        now = time.time() if now is None else now
+        try:
+            conn = self._connect()
+            try:
+                # Lettura e scrittura nella stessa transazione: nessuna corsa tra worker
+                conn.execute('BEGIN IMMEDIATE')
+                row = conn.execute('SELECT tokens, updated_at FROM rate_limit WHERE key = ?', (key,)).fetchone()
+                tokens, updated_at = row if row else (capacity, now)
+                tokens = min(capacity, tokens + (now - updated_at) * refill_rate)
+                if tokens >= 1:
+                    tokens -= 1
+                    wait = 0
+                else:
+                    wait = (1 - tokens) / refill_rate
+                conn.execute(
+                    'INSERT OR REPLACE INTO rate_limit (key, tokens, updated_at) VALUES (?, ?, ?)',
+                    (key, tokens, now)
+                )
+
+                self._writes += 1
+                if self._writes % self.CLEANUP_EVERY == 0:
+                    conn.execute('DELETE FROM rate_limit WHERE updated_at < ?', (now - capacity / refill_rate,))
+                    conn.execute(
+                        'DELETE FROM rate_limit WHERE key IN ('
+                        'SELECT key FROM rate_limit ORDER BY updated_at DESC LIMIT -1 OFFSET ?)',
+                        (self.max_keys,)
+                    )
+                conn.execute('COMMIT')
+                return wait
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            # In caso di errore la richiesta passa: meglio nessun limite che un sito bloccato
+            print(f"Errore nel contatore delle richieste: {e}")
+            return 0
+
+    def acquire_slot(self, name, limit, ttl, now=None):
+        """
+        Come MemoryBackend.acquire_slot, ma condiviso tra i processi. Un posto
+        scade dopo ttl secondi, così quelli di un worker terminato durante
+        la richiesta vengono recuperati.
+        """
+        now = time.time() if now is None else now
+        token = uuid.uuid4().hex
+        try:
+            conn = self._connect()
+            try:
+                conn.execute('BEGIN IMMEDIATE')
+                conn.execute('DELETE FROM write_slots WHERE expires_at < ?', (now,))
+                (busy,) = conn.execute('SELECT COUNT(*) FROM write_slots WHERE name = ?', (name,)).fetchone()
+                if busy >= limit:
+                    conn.execute('COMMIT')
+                    return None
+                conn.execute('INSERT INTO write_slots (token, name, expires_at) VALUES (?, ?, ?)', (token, name, now + ttl))
+                conn.execute('COMMIT')
+                return token
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            # Come per take(): in caso di errore la richiesta passa, senza occupare un posto
+            print(f"Errore nel contatore delle scritture in corso: {e}")
+            return ''
+
+    def release_slot(self, name, token):
+        if not token:
+            return
+        try:
+            conn = self._connect()
+            try:
+                conn.execute('DELETE FROM write_slots WHERE token = ?', (token,))
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"Errore nel rilascio del posto di scrittura: {e}")
+
+    def clear(self):
+        try:
+            conn = self._connect()
+            try:
+                conn.execute('DELETE FROM rate_limit')
+                conn.execute('DELETE FROM write_slots')
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"Errore nella pulizia dei contatori delle richieste: {e}")
+
+
+class WriteLimiter:
+    """Limite per client e limite di concorrenza per le route di scrittura"""
+
+    # Nome dei posti di scrittura: il limite è unico per tutte le route
+    SLOTS = 'write'
+
+    def __init__(self, backend=None, requests=5, period=60, concurrency=4, busy_retry_after=5, slot_ttl=60):
+        self.backend = backend
+        self.capacity = requests
+        self.refill_rate = requests / period
+        self.busy_retry_after = busy_retry_after
+        self.concurrency = concurrency
+        # Durata massima di un posto: più lunga del timeout dei worker gunicorn
+        self.slot_ttl = slot_ttl
+        # Senza backend per client i posti si contano comunque, nel processo
+        self.slots = backend if backend is not None else MemoryBackend(max_keys=0)
+
+    def limit(self, name):
+        """Decoratore: limita le richieste POST della view"""
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if request.method != 'POST':
+                    return view(*args, **kwargs)
+
+                if self.backend is not None:
+                    wait = self.backend.take(f'{name}:{request.remote_addr}', self.capacity, self.refill_rate)
+                    if wait > 0:
+                        raise TooManyRequests(retry_after=math.ceil(wait))
+
+                if not self.concurrency:
+                    return view(*args, **kwargs)
+                token = self.slots.acquire_slot(self.SLOTS, self.concurrency, self.slot_ttl)
+                if token is None:
+                    raise WriteBusy(retry_after=self.busy_retry_after)
+                try:
+                    return view(*args, **kwargs)
+                finally:
+                    self.slots.release_slot(self.SLOTS, token)
+            return wrapper
+        return decorator
+
+
+def create_write_limiter_from_env(default_path):
+    """Crea il limitatore leggendo la configurazione dalle variabili d'ambiente"""
+    backend_name = os.environ.get('RATE_LIMIT_BACKEND', 'memory').lower()
+    max_keys = int(os.environ.get('RATE_LIMIT_MAX_KEYS', 10000))
+
+    if backend_name == 'none':
+        backend = None
+    elif backend_name == 'sqlite':
+        path = os.environ.get('RATE_LIMIT_PATH', default_path)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        backend = SQLiteBackend(path, max_keys=max_keys)
+    elif backend_name == 'memory':
+        backend = MemoryBackend(max_keys=max_keys)
+    else:
+        raise ValueError(f"RATE_LIMIT_BACKEND non valido: {backend_name}")
+
+    return WriteLimiter(
+        backend,
+        requests=int(os.environ.get('RATE_LIMIT_REQUESTS', 5)),
+        period=float(os.environ.get('RATE_LIMIT_PERIOD', 60)),
+        concurrency=int(os.environ.get('WRITE_CONCURRENCY', 4)),
+        slot_ttl=2 * int(os.environ.get('GUNICORN_TIMEOUT', 30))
+    )
@@ -0,0 +1,392 @@
+"""
+Ricerca full-text su progetti, messaggi e recensioni.
+
+Un unico indice contiene un documento per elemento (titolo e testo):
+    SQLite      tabella virtuale FTS5 search_index, ranking bm25
+    PostgreSQL  tabella search_document con colonna tsvector e indice GIN, ranking ts_rank
+
+L'indice viene aggiornato nella stessa transazione delle modifiche: un
+listener after_flush della sessione reindicizza gli oggetti nuovi o
+modificati e rimuove quelli eliminati. Le UPDATE/DELETE massive
+(query.update(), query.delete()) non passano dagli oggetti della sessione
+e devono chiamare reindex(), set_public() o remove() esplicitamente.
+
+Le query leggono solo i documenti che contengono i termini cercati (anche
+come prefisso) e una pagina alla volta: il costo dipende dal numero di
+risultati, non dalla dimensione delle tabelle.
+
+Uso:
+    python search.py --rebuild   # ricostruisce l'indice dai dati esistenti
+"""
+
+import os
+import re
+import sys
+from collections import namedtuple
+from sqlalchemy import event, bindparam
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session, load_only, raiseload
+from models import db, Project, ContactMessage, Review
+from pagination import KeysetPage, InvalidCursor, DEFAULT_LIMIT
+
+# Tipo di documento -> (modello, campi indicizzati, funzione che restituisce titolo, testo, pubblico)
+DOCUMENTS = {
+    'project': (
+        Project,
+        ('title', 'description', 'technologies'),
+        lambda project: (project.title, ' '.join(filter(None, [project.description, project.technologies])), True)
+    ),
+    'message': (
+        ContactMessage,
+        ('subject', 'message'),
+        lambda message: (message.subject, message.message, False)
+    ),
+    'review': (
+        Review,
+        ('comment', 'approved'),
+        lambda review: ('', review.comment, bool(review.approved))
+    ),
+}
+KIND_BY_MODEL = {model: kind for kind, (model, _, _) in DOCUMENTS.items()}
+
+# Tipi visibili a tutti (le recensioni solo se approvate, i messaggi solo agli admin)
+PUBLIC_KINDS = ('project', 'review')
+
+SEARCH_LANGUAGE = os.environ.get('SEARCH_LANGUAGE', 'simple')  # Configurazione testo di PostgreSQL
+MAX_TERMS = 8
+BULK_CHUNK = 500  # Id per istruzione nelle operazioni massive (limite di parametri di SQLite)
+
+SearchResult = namedtuple('SearchResult', ['kind', 'item', 'score'])
+
+
+def parse_terms(query):
+    """Estrae i termini di ricerca (solo lettere e cifre: niente sintassi FTS dall'utente)"""
+    return re.findall(r'\w+', (query or '').lower())[:MAX_TERMS]
+
+
+class SQLiteSearch:
+    """Indice FTS5: il rowid codifica tipo e id, così aggiornamenti e cancellazioni sono puntuali"""
+
+    KIND_CODES = {'project': 1, 'message': 2, 'review': 3}
+    KINDS_BY_CODE = {code: kind for kind, code in KIND_CODES.items()}
+
+    def create(self, conn):
+        conn.exec_driver_sql(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5("
+            "public UNINDEXED, title, body, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+
+    def drop(self, conn):
+        conn.exec_driver_sql('DROP TABLE IF EXISTS search_index')
+
+    def _rowid(self, kind, item_id):
+        return item_id * 4 + self.KIND_CODES[kind]
+
+    def upsert(self, conn, kind, item_id, title, body, public):
+        self.delete(conn, kind, item_id)
+        conn.execute(
+            db.text('INSERT INTO search_index (rowid, public, title, body) VALUES (:rowid, :public, :title, :body)'),
+            {'rowid': self._rowid(kind, item_id), 'public': int(public), 'title': title or '', 'body': body or ''}
+        )
+
+    def delete(self, conn, kind, item_id):
+        conn.execute(db.text('DELETE FROM search_index WHERE rowid = :rowid'), {'rowid': self._rowid(kind, item_id)})
+
+    def delete_many(self, conn, kind, item_ids):
+        conn.execute(
+            db.text('DELETE FROM search_index WHERE rowid IN :rowids').bindparams(bindparam('rowids', expanding=True)),
+            {'rowids': [self._rowid(kind, item_id) for item_id in item_ids]}
+        )
+
+    def set_public(self, conn, kind, item_ids, public):
+        conn.execute(
+            db.text('UPDATE search_index SET public = :public WHERE rowid IN :rowids').bindparams(
+                bindparam('rowids', expanding=True)
+            ),
+            {'public': int(public), 'rowids': [self._rowid(kind, item_id) for item_id in item_ids]}
+        )
+
+    def clear(self, conn):
+        conn.exec_driver_sql('DELETE FROM search_index')
+
+    def query(self, conn, terms, kinds, public_only, limit, offset):
+        sql = (
+            'SELECT rowid, bm25(search_index, 0.0, 10.0, 1.0) AS score FROM search_index '
+            'WHERE search_index MATCH :match AND (rowid % 4) IN :codes'
+        )
+        if public_only:
+            sql += ' AND public = 1'
+        sql += ' ORDER BY score, rowid DESC LIMIT :limit OFFSET :offset'
+        rows = conn.execute(
+            db.text(sql).bindparams(bindparam('codes', expanding=True)),
+            {
+                'match': ' '.join(f'"{term}"*' for term in terms),
+                'codes': [self.KIND_CODES[kind] for kind in kinds],
+                'limit': limit,
+                'offset': offset,
+            }
+        )
+        # bm25 è negativo (più basso = più rilevante): restituisce un punteggio crescente
+        return [(self.KINDS_BY_CODE[rowid % 4], rowid // 4, -score) for rowid, score in rows]
+
+
+class PostgresSearch:
+    """Indice tsvector con indice GIN, titolo con peso A e testo con peso B"""
+
+    def create(self, conn):
+        conn.exec_driver_sql(
+            'CREATE TABLE IF NOT EXISTS search_document ('
+            'kind VARCHAR(20) NOT NULL, '
+            'item_id INTEGER NOT NULL, '
+            'public BOOLEAN NOT NULL DEFAULT FALSE, '
+            'document TSVECTOR NOT NULL, '
+            'PRIMARY KEY (kind, item_id))'
+        )
+        conn.exec_driver_sql(
+            'CREATE INDEX IF NOT EXISTS ix_search_document_document ON search_document USING GIN (document)'
+        )
+
+    def drop(self, conn):
+        conn.exec_driver_sql('DROP TABLE IF EXISTS search_document')
+
+    def upsert(self, conn, kind, item_id, title, body, public):
+        conn.execute(db.text(
+            'INSERT INTO search_document (kind, item_id, public, document) VALUES (:kind, :item_id, :public, '
+            "setweight(to_tsvector(CAST(:config AS regconfig), :title), 'A') || "
+            "setweight(to_tsvector(CAST(:config AS regconfig), :body), 'B')) "
+            'ON CONFLICT (kind, item_id) DO UPDATE SET public = EXCLUDED.public, document = EXCLUDED.document'
+        ), {
+            'kind': kind, 'item_id': item_id, 'public': bool(public),
+            'title': title or '', 'body': body or '', 'config': SEARCH_LANGUAGE
+        })
+
+    def delete(self, conn, kind, item_id):
+        conn.execute(
+            db.text('DELETE FROM search_document WHERE kind = :kind AND item_id = :item_id'),
+            {'kind': kind, 'item_id': item_id}
+        )
+
+    def delete_many(self, conn, kind, item_ids):
+        conn.execute(
+            db.text('DELETE FROM search_document WHERE kind = :kind AND item_id IN :item_ids').bindparams(
+                bindparam('item_ids', expanding=True)
+            ),
+            {'kind': kind, 'item_ids': list(item_ids)}
+        )
+
+    def set_public(self, conn, kind, item_ids, public):
+        conn.execute(
+            db.text('UPDATE search_document SET public = :public WHERE kind = :kind AND item_id IN :item_ids').bindparams(
+                bindparam('item_ids', expanding=True)
+            ),
+            {'public': bool(public), 'kind': kind, 'item_ids': list(item_ids)}
+        )
+
+    def clear(self, conn):
+        conn.exec_driver_sql('DELETE FROM search_document')
+
+    def query(self, conn, terms, kinds, public_only, limit, offset):
+        sql = (
+            'SELECT kind, item_id, ts_rank(document, query) AS score '
+            'FROM search_document, to_tsquery(CAST(:config AS regconfig), :match) AS query '
+            'WHERE document @@ query AND kind IN :kinds'
+        )
+        if public_only:
+            sql += ' AND public'
+        sql += ' ORDER BY score DESC, item_id DESC LIMIT :limit OFFSET :offset'
+        rows = conn.execute(
+            db.text(sql).bindparams(bindparam('kinds', expanding=True)),
+            {
+                'config': SEARCH_LANGUAGE,
+                'match': ' & '.join(f'{term}:*' for term in terms),
+                'kinds': list(kinds),
+                'limit': limit,
+                'offset': offset,
+            }
+        )
+        return [(kind, item_id, score) for kind, item_id, score in rows]
+
+
+BACKENDS = {'sqlite': SQLiteSearch, 'postgresql': PostgresSearch}
+
+# Backend già verificato per ogni database (None se la ricerca non è disponibile)
+_backends = {}
+
+
+def get_backend(conn):
+    """Restituisce il backend del database, creando l'indice al primo utilizzo"""
+    key = str(conn.engine.url)
+    if key not in _backends:
+        backend_class = BACKENDS.get(conn.dialect.name)
+        backend = None
+        if backend_class is None:
+            print(f"⚠️ Ricerca full-text non supportata su {conn.dialect.name}")
+        else:
+            try:
+                backend = backend_class()
+                backend.create(conn)
+            except DBAPIError as e:
+                # Es. SQLite compilato senza FTS5
+                print(f"⚠️ Ricerca full-text non disponibile: {e}")
+                backend = None
+        _backends[key] = backend
+    return _backends[key]
+
+
+@event.listens_for(db.metadata, 'after_create')
+def _create_index(target, connection, **kw):
+    """db.create_all() crea anche l'indice di ricerca"""
+    _backends.pop(str(connection.engine.url), None)
+    get_backend(connection)
+
+
+@event.listens_for(db.metadata, 'before_drop')
+def _drop_index(target, connection, **kw):
+    """db.drop_all() elimina anche l'indice, che altrimenti punterebbe a righe non più esistenti"""
+    backend_class = BACKENDS.get(connection.dialect.name)
+    if backend_class is not None:
+        backend_class().drop(connection)
+    _backends.pop(str(connection.engine.url), None)
+
+
+def _index_document(backend, conn, obj):
+    kind = KIND_BY_MODEL[type(obj)]
+    title, body, public = DOCUMENTS[kind][2](obj)
+    backend.upsert(conn, kind, obj.id, title, body, public)
+
+
+def _indexed_fields_changed(obj):
+    state = db.inspect(obj)
+    fields = DOCUMENTS[KIND_BY_MODEL[type(obj)]][1]
+    return any(state.attrs[field].history.has_changes() for field in fields)
+
+
+@event.listens_for(Session, 'after_flush')
+def _sync_after_flush(session, flush_context):
+    """Aggiorna l'indice con le modifiche appena scritte, nella stessa transazione"""
+    new = [obj for obj in session.new if type(obj) in KIND_BY_MODEL]
+    dirty = [obj for obj in session.dirty if type(obj) in KIND_BY_MODEL and _indexed_fields_changed(obj)]
+    deleted = [obj for obj in session.deleted if type(obj) in KIND_BY_MODEL]
+    if not (new or dirty or deleted):
+        return
+
+    conn = session.connection()
+    backend = get_backend(conn)
+    if backend is None:
+        return
+    for obj in new + dirty:
+        _index_document(backend, conn, obj)
+    for obj in deleted:
+        backend.delete(conn, KIND_BY_MODEL[type(obj)], obj.id)
+
+
+def reindex(objects):
+    """Reindicizza oggetti modificati senza passare dalla sessione (es. dopo query.update())"""
+    conn = db.session.connection()
+    backend = get_backend(conn)
+    if backend is not None:
+        for obj in objects:
+            _index_document(backend, conn, obj)
+
+
+def _chunks(item_ids):
+    item_ids = list(item_ids)
+    for start in range(0, len(item_ids), BULK_CHUNK):
+        yield item_ids[start:start + BULK_CHUNK]
+
+
+def remove(kind, item_ids):
+    """Rimuove dall'indice elementi eliminati con query.delete()"""
+    conn = db.session.connection()
+    backend = get_backend(conn)
+    if backend is not None:
+        for chunk in _chunks(item_ids):
+            backend.delete_many(conn, kind, chunk)
+
+
+def set_public(kind, item_ids, public):
+    """Aggiorna la visibilità di elementi approvati o nascosti con query.update(), senza ricalcolare il testo"""
+    conn = db.session.connection()
+    backend = get_backend(conn)
+    if backend is not None:
+        for chunk in _chunks(item_ids):
+            backend.set_public(conn, kind, chunk, public)
+
+
+def rebuild_index(conn):
+    """Ricostruisce l'intero indice dai dati delle tabelle"""
+    backend = get_backend(conn)
+    if backend is None:
+        return 0
+    backend.clear(conn)
+    count = 0
+    with Session(bind=conn) as session:
+        for model, fields, _ in DOCUMENTS.values():
+            # Solo le colonne indicizzate: funziona anche prima delle migrazioni successive
+            options = [load_only(model.id, *(getattr(model, field) for field in fields)), raiseload('*')]
+            for obj in session.query(model).options(*options).yield_per(500):
+                _index_document(backend, conn, obj)
+                count += 1
+    return count
+
+
+def decode_offset(cursor):
+    """Il cursore della ricerca è la posizione del primo risultato della pagina"""
+    if not cursor:
+        return 0
+    if not cursor.isdigit():
+        raise InvalidCursor('Cursore di ricerca non valido')
+    return int(cursor)
+
+
+def search_ids(query, kinds, public_only=True, offset=0, limit=DEFAULT_LIMIT):
+    """Restituisce (tipo, id, punteggio) dei documenti più rilevanti per query"""
+    terms = parse_terms(query)
+    if not terms or not kinds:
+        return []
+    conn = db.session.connection()
+    backend = get_backend(conn)
+    if backend is None:
+        return []
+    return backend.query(conn, terms, kinds, public_only, limit, offset)
+
+
+def search(query, kinds=None, public_only=True, cursor=None, limit=DEFAULT_LIMIT):
+    """
+    Una pagina di SearchResult ordinati per rilevanza. Gli oggetti vengono
+    caricati con una query per tipo, solo per gli id della pagina.
+    """
+    kinds = [kind for kind in (kinds or DOCUMENTS) if kind in DOCUMENTS]
+    if public_only:
+        kinds = [kind for kind in kinds if kind in PUBLIC_KINDS]
+    offset = decode_offset(cursor)
+
+    # Un risultato in più per sapere se esiste una pagina successiva
+    rows = search_ids(query, kinds, public_only, offset, limit + 1)
+    next_cursor = str(offset + limit) if len(rows) > limit else None
+    rows = rows[:limit]
+
+    loaded = {}
+    for kind in {kind for kind, _, _ in rows}:
+        model = DOCUMENTS[kind][0]
+        ids = [item_id for row_kind, item_id, _ in rows if row_kind == kind]
+        loaded.update({(kind, obj.id): obj for obj in model.query.filter(model.id.in_(ids))})
+
+    items = [
+        SearchResult(kind, loaded[(kind, item_id)], score)
+        for kind, item_id, score in rows if (kind, item_id) in loaded
+    ]
+    return KeysetPage(items, next_cursor, limit)
+
+
+if __name__ == '__main__':
+    from app import app
+
+    if '--rebuild' in sys.argv:
+        with app.app_context():
+            print("🔄 Ricostruzione indice di ricerca...")
+            with db.engine.begin() as conn:
+                count = rebuild_index(conn)
+            print(f"✅ Indicizzati {count} documenti")
+    else:
+        print(__doc__)
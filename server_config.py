@@ -0,0 +1,119 @@
+"""
+Profilo del server di produzione: worker gunicorn e pool di connessioni al database.
+
+Usato da gunicorn.conf.py per dimensionare i worker e da app.py per
+SQLALCHEMY_ENGINE_OPTIONS, così i due lati leggono le stesse variabili e il
+pool di ogni worker è grande quanto i suoi thread.
+
+Classi di worker (GUNICORN_WORKER_CLASS):
+    gthread  (default) ogni worker serve più richieste con un pool di thread:
+             un recupero lento da GitHub in /project/<id>/code occupa un
+             thread, non l'intero worker
+    sync     una richiesta alla volta per worker (il vecchio `gunicorn app:app`)
+    gevent   worker cooperativi, se il pacchetto gevent è installato
+             (altrimenti si ripiega su gthread). Il preload viene disattivato:
+             il monkey patching deve avvenire prima di importare l'app
+
+Worker di default in base ai core disponibili per il processo (anche con
+limiti di affinità del container): 2 * core + 1 per sync, core + 1 per
+gthread, core per gevent, al massimo GUNICORN_MAX_WORKERS.
+
+Configurazione tramite variabili d'ambiente:
+    WEB_CONCURRENCY              numero di worker (sostituisce il calcolo automatico)
+    GUNICORN_MAX_WORKERS         massimo per il calcolo automatico (default 8)
+    GUNICORN_WORKER_CLASS        gthread, sync o gevent (default gthread)
+    GUNICORN_THREADS             thread per worker gthread (default 4)
+    GUNICORN_WORKER_CONNECTIONS  connessioni per worker gevent (default 100)
+    GUNICORN_PRELOAD             0 per non caricare l'app prima del fork (default 1)
+    GUNICORN_TIMEOUT             secondi prima di riavviare un worker bloccato (default 30)
+    DB_POOL_SIZE                 connessioni tenute aperte per worker (default: i thread)
+    DB_MAX_OVERFLOW              connessioni aggiuntive nei picchi (default: i thread)
+    DB_POOL_TIMEOUT              secondi di attesa per una connessione libera (default 10)
+    DB_POOL_PRE_PING             1/0: verifica la connessione prima dell'uso
+                                 (default 1 su PostgreSQL, 0 su SQLite)
+    DB_POOL_RECYCLE              secondi dopo cui una connessione viene riaperta
+                                 (default 300 su PostgreSQL, -1 = mai, su SQLite)
+"""
+
+import os
+from collections import namedtuple
+
+WORKER_CLASSES = ('gthread', 'sync', 'gevent')
+
+ServerProfile = namedtuple('ServerProfile', ['worker_class', 'workers', 'threads', 'worker_connections', 'preload'])
+
+
+def cpu_count():
+    """Core utilizzabili dal processo (rispetta i limiti di affinità del container)"""
+    try:
+        return max(1, len(os.sched_getaffinity(0)))
+    except (AttributeError, OSError):
+        return os.cpu_count() or 1
+
+
+def _env_int(environ, name, default):
+    value = environ.get(name, '')
+    return int(value) if value.strip() else default
+
+
+def _env_bool(environ, name, default):
+    value = environ.get(name, '').strip().lower()
+    if not value:
+        return default
+    return value not in ('0', 'false', 'no', 'off')
+
+
+def gevent_available():
+    try:
+        import gevent  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def load_profile(environ=os.environ, cores=None):
+    """Classe, numero di worker e thread, connessioni e preload dalle variabili d'ambiente"""
+    cores = cores or cpu_count()
+    worker_class = environ.get('GUNICORN_WORKER_CLASS', 'gthread').strip().lower()
+    if worker_class not in WORKER_CLASSES:
+        raise ValueError(f"GUNICORN_WORKER_CLASS non valido: {worker_class}")
+    if worker_class == 'gevent' and not gevent_available():
+        print("⚠️ gevent non installato: uso dei worker gthread")
+        worker_class = 'gthread'
+
+    default_workers = {'sync': 2 * cores + 1, 'gthread': cores + 1, 'gevent': cores}[worker_class]
+    workers = _env_int(environ, 'WEB_CONCURRENCY', 0) or min(default_workers, _env_int(environ, 'GUNICORN_MAX_WORKERS', 8))
+    threads = _env_int(environ, 'GUNICORN_THREADS', 4) if worker_class == 'gthread' else 1
+    preload = _env_bool(environ, 'GUNICORN_PRELOAD', True) and worker_class != 'gevent'
+
+    return ServerProfile(
+        worker_class=worker_class,
+        workers=max(1, workers),
+        threads=max(1, threads),
+        worker_connections=_env_int(environ, 'GUNICORN_WORKER_CONNECTIONS', 100),
+        preload=preload
+    )
+
+
+def engine_options(database_url, environ=os.environ, profile=None):
+    """
+    SQLALCHEMY_ENGINE_OPTIONS per il backend del database. Il pool serve
+    le richieste di un solo worker: tante connessioni quante richieste
+    contemporanee (i thread, o le connessioni gevent).
+    """
+    profile = profile or load_profile(environ)
+    concurrency = profile.worker_connections if profile.worker_class == 'gevent' else profile.threads
+    postgres = database_url.startswith(('postgresql', 'postgres://'))
+
+    # SQLite in memoria usa un pool a connessione singola che non accetta queste opzioni
+    if database_url.startswith('sqlite') and (':memory:' in database_url or database_url in ('sqlite://', 'sqlite:///')):
+        return {}
+
+    return {
+        'pool_size': _env_int(environ, 'DB_POOL_SIZE', min(concurrency, 10)),
+        'max_overflow': _env_int(environ, 'DB_MAX_OVERFLOW', min(concurrency, 10)),
+        'pool_timeout': _env_int(environ, 'DB_POOL_TIMEOUT', 10),
+        # I PostgreSQL gestiti chiudono le connessioni inattive: verifica e riapertura periodica
+        'pool_pre_ping': _env_bool(environ, 'DB_POOL_PRE_PING', postgres),
+        'pool_recycle': _env_int(environ, 'DB_POOL_RECYCLE', 300 if postgres else -1),
+    }
@@ -3,8 +3,13 @@
 Test script per verificare che l'applicazione Flask funzioni correttamente
 """
 
-from app import app, db
-from models import Project
+import contextlib
+import io
+from flask_login import login_user
+from app import app, db, page_cache
+from models import Project, Technology, User, Review, ContactMessage
+import search
+from profiler import assert_max_queries, capture_queries, summarize, format_report, SQLProfiler
 
 def test_database_connection():
     """Testa la connessione al database e le query"""
@@ -67,6 +72,300 @@ def test_routes():
             print(f"❌ Errore nel test delle route: {e}")
             return False
 
+def test_health_endpoints():
+    """Testa gli endpoint di liveness e readiness"""
+    with app.test_client() as client:
+        try:
+            response = client.get('/healthz')
+            print(f"✅ /healthz status: {response.status_code}")
+            if response.status_code != 200:
+                return False
+
+            response = client.get('/readyz')
+            print(f"✅ /readyz status: {response.status_code} ({response.get_json()['status']})")
+            return response.status_code in (200, 503)
+
+        except Exception as e:
+            print(f"❌ Errore nel test degli endpoint di stato: {e}")
+            return False
+
+def test_project_filters():
+    """Testa i tag normalizzati e i filtri ?tech= e ?category= di /projects e /api/projects"""
+    with app.app_context():
+        # Crea le tabelle dei tag se il database locale è precedente alla migrazione
+        db.create_all()
+        projects = [
+            Project(title='Filtro Test A', description='Test', category='web'),
+            Project(title='Filtro Test B', description='Test', category='mobile'),
+        ]
+        projects[0].set_technologies_list(['ZzFlask', 'ZzPython', 'zzflask'])
+        projects[1].set_technologies_list(['ZzPython'])
+        db.session.add_all(projects)
+        db.session.commit()
+        page_cache.invalidate('index', 'projects')
+
+        try:
+            if projects[0].get_technologies_list() != ['ZzFlask', 'ZzPython']:
+                print(f"❌ Tag inattesi: {projects[0].get_technologies_list()}")
+                return False
+
+            with app.test_client() as client:
+                titles = lambda url: [item['title'] for item in client.get(url).get_json()['items']]
+                if titles('/api/projects?tech=zzpython') != ['Filtro Test B', 'Filtro Test A']:
+                    print("❌ Filtro per tecnologia non corretto")
+                    return False
+                if titles('/api/projects?tech=zzpython&category=web') != ['Filtro Test A']:
+                    print("❌ Filtro per tecnologia e categoria non corretto")
+                    return False
+
+                html = client.get('/projects?tech=zzflask').get_data(as_text=True)
+                if 'Filtro Test A' not in html or 'Filtro Test B' in html or 'ZzPython' not in html:
+                    print("❌ Pagina progetti filtrata non corretta")
+                    return False
+
+            print("✅ Filtri per tecnologia e categoria funzionanti")
+            return True
+        finally:
+            for project in projects:
+                db.session.delete(project)
+            Technology.query.filter(Technology.slug.in_(['zzflask', 'zzpython'])).delete()
+            db.session.commit()
+            page_cache.invalidate('index', 'projects')
+
+def test_query_counts():
+    """Testa il numero massimo di query SQL per route (un N+1 le farebbe crescere con i dati)"""
+    with app.app_context():
+        db.create_all()
+        admin = User.query.filter_by(username='Sterben').first()
+        created = []
+        if admin is None:
+            admin = User(username='Sterben', email='query-test@example.com', is_admin=True)
+            admin.set_password('query-test')
+            created.append(admin)
+        for i in range(6):
+            project = Project(title=f'Query Test {i}', description='Test', category='web')
+            project.set_technologies_list(['ZzQueryA', 'ZzQueryB'])
+            created.append(project)
+            created.append(Review(name=f'Query Test {i}', rating=5, comment='Test', approved=True))
+            created.append(ContactMessage(name=f'Query Test {i}', email='query@example.com', subject='Test', message='Test'))
+        db.session.add_all(created)
+        db.session.commit()
+        admin_id = admin.id
+        page_cache.invalidate('index', 'projects', 'reviews')
+
+    # Le richieste partono fuori dall'app context, come in produzione.
+    # Le pagine pubbliche includono la query di versione per ETag/Last-Modified
+    budgets = [
+        ('/', 4),
+        ('/projects', 5),
+        ('/projects?tech=zzquerya', 3),
+        ('/reviews', 3),
+        ('/api/projects', 3),
+        ('/api/search?q=query', 3),
+        # Pagine admin: una query in più per load_user
+        ('/admin/dashboard', 4),
+        ('/admin/messages', 3),
+        ('/admin/reviews', 3),
+        ('/admin/users', 2),
+    ]
+    try:
+        client = app.test_client()
+        for url, max_queries in budgets[:6]:
+            assert_max_queries(client, url, max_queries)
+
+        with client.session_transaction() as session:
+            session['_user_id'] = str(admin_id)
+        for url, max_queries in budgets[6:]:
+            response = assert_max_queries(client, url, max_queries)
+            if response.status_code != 200:
+                print(f"❌ {url} status: {response.status_code}")
+                return False
+
+        print(f"✅ Query entro i limiti su {len(budgets)} route")
+        return True
+    except AssertionError as e:
+        print(f"❌ Troppe query: {e}")
+        raise
+    finally:
+        with app.app_context():
+            for obj in created:
+                db.session.delete(db.session.merge(obj))
+            Technology.query.filter(Technology.slug.in_(['zzquerya', 'zzqueryb'])).delete()
+            db.session.commit()
+            page_cache.invalidate('index', 'projects', 'reviews')
+
+def test_repeated_query_detection():
+    """Testa la segnalazione delle query ripetute (possibili N+1) del profilatore"""
+    with app.app_context():
+        with capture_queries() as queries:
+            for project_id in range(1, 5):
+                db.session.get(Project, project_id + 10 ** 6)
+            Project.query.count()
+
+    summary = summarize(queries, threshold=3)
+    if summary['count'] != 5 or len(summary['repeated']) != 1 or summary['repeated'][0]['count'] != 4:
+        print(f"❌ Riepilogo inatteso: {format_report(summary)}")
+        return False
+    if not summary['repeated'][0]['locations'][0].startswith('test_app.py:'):
+        print(f"❌ Punto di chiamata inatteso: {summary['repeated'][0]['locations']}")
+        return False
+
+    print("✅ Query ripetute segnalate con il punto di chiamata")
+    return True
+
+def test_untrusted_proxy_warning():
+    """Testa l'avviso (una sola volta) per X-Forwarded-For ricevuto senza TRUSTED_PROXIES"""
+    import app as portfolio_app
+    if portfolio_app.TRUSTED_PROXIES:
+        return True
+    portfolio_app._proxy_warning['shown'] = False
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        client = app.test_client()
+        for _ in range(2):
+            client.get('/healthz', headers={'X-Forwarded-For': '203.0.113.7'})
+    if output.getvalue().count('TRUSTED_PROXIES=0') != 1:
+        print(f"❌ Avviso sul proxy non mostrato una sola volta: {output.getvalue()!r}")
+        return False
+    print("✅ Avviso per TRUSTED_PROXIES mancante")
+    return True
+
+def test_profiler_panel_admin_only():
+    """Testa che il pannello SQL del profilatore sia mostrato solo agli admin"""
+    with app.app_context():
+        user = User(username='panel-utente', email='panel-utente@example.com', is_admin=False)
+        admin = User(username='panel-admin', email='panel-admin@example.com', is_admin=True)
+        for account in (user, admin):
+            account.set_password('panel-test')
+        db.session.add_all([user, admin])
+        db.session.commit()
+        try:
+            profiler = SQLProfiler('panel')
+            visible = {}
+            for account in (user, admin):
+                with app.test_request_context('/'):
+                    login_user(account)
+                    visible[account.username] = profiler._show_panel(app.response_class('<html></html>', mimetype='text/html'))
+        finally:
+            db.session.delete(user)
+            db.session.delete(admin)
+            db.session.commit()
+
+    if visible != {'panel-utente': False, 'panel-admin': True}:
+        print(f"❌ Pannello SQL mostrato agli utenti sbagliati: {visible}")
+        return False
+    print("✅ Pannello SQL solo per gli admin")
+    return True
+
+def test_long_technology_rejected():
+    """Testa che un tag più lungo della colonna venga rifiutato con un messaggio all'admin"""
+    with app.app_context():
+        admin = User(username='tag-admin', email='tag-admin@example.com', is_admin=True)
+        admin.set_password('tag-test')
+        db.session.add(admin)
+        db.session.commit()
+        admin_id = admin.id
+
+    long_tag = 'Zz' + 'x' * Technology.MAX_LENGTH
+    try:
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['_user_id'] = str(admin_id)
+        response = client.post('/admin/projects/new', data={
+            'title': 'ZzTagLungo', 'description': 'Test', 'technologies': f'Flask, {long_tag}'
+        })
+        html = response.get_data(as_text=True)
+        with app.app_context():
+            created = Project.query.filter_by(title='ZzTagLungo').count()
+        if response.status_code != 200 or 'Tecnologie troppo lunghe' not in html or created:
+            print(f"❌ Tag troppo lungo non rifiutato: {response.status_code}, {created} progetti creati")
+            return False
+
+        # Fuori dalle route admin il tag viene troncato alla lunghezza della colonna
+        project = Project(title='ZzTagLungo', description='Test')
+        with app.app_context():
+            project.set_technologies_list([long_tag])
+            names = project.get_technologies_list()
+            db.session.expunge_all()
+        if names != [long_tag[:Technology.MAX_LENGTH]]:
+            print(f"❌ Tag non troncato: {names}")
+            return False
+
+        print("✅ Tag troppo lunghi rifiutati")
+        return True
+    finally:
+        with app.app_context():
+            db.session.delete(db.session.get(User, admin_id))
+            db.session.commit()
+
+def test_bulk_moderation():
+    """Testa le route di moderazione in blocco: form con id, JSON con filtro e selezione vuota"""
+    with app.app_context():
+        db.create_all()
+        admin = User.query.filter_by(username='Sterben').first()
+        created = []
+        if admin is None:
+            admin = User(username='Sterben', email='bulk-test@example.com', is_admin=True)
+            admin.set_password('bulk-test')
+            created.append(admin)
+        reviews = [Review(name=f'Bulk Test {i}', rating=1, comment='Test', approved=False) for i in range(5)]
+        messages = [ContactMessage(name=f'Bulk Test {i}', email='bulk@example.com', subject='ZzBulk', message='Test') for i in range(3)]
+        db.session.add_all(created + reviews + messages)
+        db.session.commit()
+        admin_id = admin.id
+        review_ids = [review.id for review in reviews]
+        message_ids = [message.id for message in messages]
+
+    try:
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['_user_id'] = str(admin_id)
+
+        # Form della pagina admin: caselle selezionate, messaggio con il conteggio
+        response = client.post('/admin/reviews/bulk', data={'action': 'approve', 'ids': review_ids[:3]}, follow_redirects=True)
+        if '3 recensioni approvate' not in response.get_data(as_text=True):
+            print("❌ Conteggio delle recensioni approvate non mostrato")
+            return False
+
+        # Corpo JSON: id combinati con il filtro di stato, risposta con il numero di righe
+        response = client.post('/admin/messages/bulk', json={'action': 'delete', 'ids': message_ids, 'status': 'unread'})
+        if response.get_json() != {'success': True, 'action': 'delete', 'affected': 3}:
+            print(f"❌ Risposta JSON inattesa: {response.get_json()}")
+            return False
+
+        response = client.post('/admin/reviews/bulk', json={'action': 'delete'})
+        if response.status_code != 400 or response.get_json()['success']:
+            print("❌ Selezione vuota accettata")
+            return False
+
+        # Tipi non validi nel corpo JSON: 400 senza modificare nulla
+        for body in [{'ids': '12', 'action': 'delete'}, {'status': ['pending'], 'action': 'delete'},
+                     {'status': 'pending', 'action': ['delete']}, ['delete']]:
+            response = client.post('/admin/reviews/bulk', json=body)
+            if response.status_code != 400:
+                print(f"❌ Corpo non valido accettato: {body} -> {response.status_code}")
+                return False
+
+        with app.app_context():
+            approved = Review.query.filter(Review.id.in_(review_ids), Review.approved == True).count()
+            remaining = ContactMessage.query.filter(ContactMessage.id.in_(message_ids)).count()
+        if approved != 3 or remaining != 0:
+            print(f"❌ Database non aggiornato: {approved} approvate, {remaining} messaggi rimasti")
+            return False
+
+        print("✅ Moderazione in blocco funzionante")
+        return True
+    finally:
+        with app.app_context():
+            Review.query.filter(Review.id.in_(review_ids)).delete()
+            ContactMessage.query.filter(ContactMessage.id.in_(message_ids)).delete()
+            search.remove('review', review_ids)
+            search.remove('message', message_ids)
+            for obj in created:
+                db.session.delete(db.session.merge(obj))
+            db.session.commit()
+            page_cache.invalidate('index', 'reviews')
+
 if __name__ == '__main__':
     print("🧪 Avvio test applicazione...")
     print("\n1. Test connessione database:")
@@ -75,7 +374,19 @@ if __name__ == '__main__':
     print("\n2. Test route:")
     routes_success = test_routes()
     
-    if db_success and routes_success:
+    print("\n3. Test endpoint di stato:")
+    health_success = test_health_endpoints() and test_untrusted_proxy_warning()
+
+    print("\n4. Test filtri progetti:")
+    filters_success = test_project_filters() and test_long_technology_rejected()
+
+    print("\n5. Test numero di query per route:")
+    queries_success = test_query_counts() and test_repeated_query_detection() and test_profiler_panel_admin_only()
+
+    print("\n6. Test moderazione in blocco:")
+    bulk_success = test_bulk_moderation()
+    
+    if db_success and routes_success and health_success and filters_success and queries_success and bulk_success:
         print("\n✅ Tutti i test sono passati!")
         print("🎉 L'applicazione dovrebbe funzionare correttamente.")
     else:
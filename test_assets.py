@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Test script per verificare la pipeline degli asset statici (minificazione, hash, precompressione)
+"""
+
+import gzip
+import os
+import shutil
+import tempfile
+from flask import Flask, render_template_string
+from assets import Assets, build, minify_css, minify_js, load_manifest
+
+def _make_static_folder():
+    static_folder = tempfile.mkdtemp()
+    os.makedirs(os.path.join(static_folder, 'css'))
+    os.makedirs(os.path.join(static_folder, 'js'))
+    with open(os.path.join(static_folder, 'css', 'style.css'), 'w') as f:
+        f.write('/* Stile principale */\n.card  >  .title {\n  color : red;\n  margin: 0 auto;\n}\n\n.link :hover { color: blue; }\n')
+    with open(os.path.join(static_folder, 'css', 'admin.css'), 'w') as f:
+        f.write("@import url('style.css');\n\n.admin {\n  display: none;\n}\n")
+    with open(os.path.join(static_folder, 'js', 'script.js'), 'w') as f:
+        f.write('// Menu\nfunction toggle() {\n    const menu = `${1}px`;\n    return menu\n}\n')
+    return static_folder
+
+def test_minify():
+    """Testa la minificazione prudente di CSS e JS"""
+    print("🧪 Test minificazione...")
+    css = minify_css('/* x */ .a  >  .b {\n  color : red;\n}\n.c :hover { margin: 0 auto; }')
+    if css != '.a>.b{color :red}.c :hover{margin:0 auto}':
+        print(f"❌ CSS minificato inatteso: {css!r}")
+        return False
+    js = minify_js('// commento\nfunction f() {\n    return 1\n}\n\n')
+    if js != 'function f() {\nreturn 1\n}\n':
+        print(f"❌ JS minificato inatteso: {js!r}")
+        return False
+    print("✅ Minificazione corretta")
+    return True
+
+def test_build():
+    """Testa nomi con hash, riferimenti @import riscritti, copie .gz e build idempotente"""
+    print("🧪 Test build degli asset...")
+    static_folder = _make_static_folder()
+    try:
+        manifest = build(static_folder)
+        if set(manifest) != {'css/style.css', 'css/admin.css', 'js/script.js'}:
+            print(f"❌ Manifest inatteso: {manifest}")
+            return False
+        if load_manifest(static_folder) != manifest:
+            print("❌ Manifest non salvato")
+            return False
+
+        dist = os.path.join(static_folder, 'dist')
+        style_name = os.path.basename(manifest['css/style.css'])
+        with open(os.path.join(dist, manifest['css/admin.css'])) as f:
+            admin = f.read()
+        if f"@import url('{style_name}')" not in admin:
+            print(f"❌ @import non riscritto: {admin}")
+            return False
+
+        with open(os.path.join(dist, manifest['js/script.js']), 'rb') as f:
+            original = f.read()
+        with gzip.open(os.path.join(dist, manifest['js/script.js'] + '.gz')) as f:
+            if f.read() != original:
+                print("❌ Copia .gz diversa dall'originale")
+                return False
+
+        # Una seconda build con gli stessi sorgenti non riscrive nulla
+        mtimes = {name: os.path.getmtime(os.path.join(dist, name)) for name in manifest.values()}
+        if build(static_folder) != manifest or any(
+            os.path.getmtime(os.path.join(dist, name)) != mtime for name, mtime in mtimes.items()
+        ):
+            print("❌ Build non idempotente")
+            return False
+
+        # Modificando style.css cambiano il suo nome e quello di admin.css che lo importa
+        with open(os.path.join(static_folder, 'css', 'style.css'), 'a') as f:
+            f.write('.nuova { color: green; }\n')
+        changed = build(static_folder)
+        if changed['css/style.css'] == manifest['css/style.css'] or changed['css/admin.css'] == manifest['css/admin.css']:
+            print("❌ Hash non aggiornati dopo la modifica")
+            return False
+
+        print("✅ Build degli asset corretta")
+        return True
+    finally:
+        shutil.rmtree(static_folder)
+
+def test_serving():
+    """Testa url_for con hash, cache immutabile e negoziazione di Content-Encoding"""
+    print("🧪 Test distribuzione degli asset...")
+    static_folder = _make_static_folder()
+    try:
+        app = Flask(__name__, static_folder=static_folder, static_url_path='/static')
+        Assets(app)
+        client = app.test_client()
+
+        with app.test_request_context():
+            url = render_template_string("{{ url_for('static', filename='css/style.css') }}")
+            other = render_template_string("{{ url_for('static', filename='images/logo.png') }}")
+        if not url.startswith('/static/dist/css/style.') or other != '/static/images/logo.png':
+            print(f"❌ URL inattesi: {url}, {other}")
+            return False
+
+        response = client.get(url, headers={'Accept-Encoding': 'gzip, deflate'})
+        if response.headers.get('Content-Encoding') != 'gzip' or gzip.decompress(response.data)[:5] != b'.card':
+            print("❌ Copia gzip non inviata")
+            return False
+        if 'immutable' not in response.headers['Cache-Control'] or 'max-age=31536000' not in response.headers['Cache-Control']:
+            print(f"❌ Cache-Control inatteso: {response.headers['Cache-Control']}")
+            return False
+        if response.mimetype != 'text/css' or 'Accept-Encoding' not in response.headers.get('Vary', ''):
+            print("❌ Content-Type o Vary non corretti")
+            return False
+
+        response = client.get(url, headers={'Accept-Encoding': 'identity'})
+        if 'Content-Encoding' in response.headers or not response.data.startswith(b'.card'):
+            print("❌ File originale non inviato senza Accept-Encoding")
+            return False
+
+        if client.get(url + '.gz').status_code != 404 or client.get('/static/dist/manifest.json').status_code != 404:
+            print("❌ File interni della build accessibili")
+            return False
+
+        print("✅ Asset serviti con hash, cache immutabile e compressione")
+        return True
+    finally:
+        shutil.rmtree(static_folder)
+
+if __name__ == '__main__':
+    print("🚀 Test della pipeline degli asset statici")
+    print("=" * 50)
+
+    results = [test_minify(), test_build(), test_serving()]
+
+    if all(results):
+        print("✅ Test completato!")
+    else:
+        print("❌ Alcuni test sono falliti")
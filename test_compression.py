@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Test script per verificare la compressione gzip/Brotli delle risposte
+"""
+
+import gzip
+from flask import Flask, Response, jsonify, request, stream_with_context
+import compression
+from compression import Compressor
+
+PAGE = '<html><body>' + '<p>Portfolio di progetti web</p>' * 200 + '</body></html>'
+
+def _create_app():
+    app = Flask(__name__)
+    Compressor(min_size=500).init_app(app)
+
+    @app.route('/page')
+    def page():
+        response = app.response_class(PAGE, mimetype='text/html')
+        response.add_etag()
+        return response.make_conditional(request)
+
+    @app.route('/small')
+    def small():
+        return jsonify({'status': 'ok'})
+
+    @app.route('/image')
+    def image():
+        return Response(b'\x89PNG' + b'\0' * 2000, mimetype='image/png')
+
+    @app.route('/stream')
+    def stream():
+        return Response(stream_with_context(iter([PAGE])), mimetype='text/html')
+
+    @app.route('/precompressed')
+    def precompressed():
+        return Response(gzip.compress(PAGE.encode()), mimetype='text/html', headers={'Content-Encoding': 'gzip'})
+
+    return app
+
+def test_compression():
+    """Testa negoziazione, soglia minima, tipi esclusi e risposte in streaming"""
+    print("🧪 Test compressione delle risposte...")
+    client = _create_app().test_client()
+    original_brotli = compression.brotli
+    # gzip è sempre disponibile: il test non dipende dal modulo brotli
+    compression.brotli = None
+    try:
+        response = client.get('/page', headers={'Accept-Encoding': 'gzip, deflate, br'})
+        if response.headers.get('Content-Encoding') != 'gzip' or gzip.decompress(response.data).decode() != PAGE:
+            print("❌ Pagina HTML non compressa con gzip")
+            return False
+        if 'Accept-Encoding' not in response.headers.get('Vary', '') or int(response.headers['Content-Length']) != len(response.data):
+            print("❌ Vary o Content-Length non corretti")
+            return False
+
+        # ETag debole sulla variante compressa, e il 304 funziona con il confronto debole
+        etag = response.headers['ETag']
+        if not etag.startswith('W/'):
+            print(f"❌ ETag della variante compressa non debole: {etag}")
+            return False
+        response = client.get('/page', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+        if response.status_code != 304:
+            print(f"❌ Richiesta condizionale con ETag debole: {response.status_code}")
+            return False
+
+        response = client.get('/page', headers={'Accept-Encoding': 'identity'})
+        if 'Content-Encoding' in response.headers or response.get_data(as_text=True) != PAGE:
+            print("❌ Pagina compressa senza Accept-Encoding")
+            return False
+        if response.headers['ETag'].startswith('W/'):
+            print("❌ ETag indebolito sulla variante non compressa")
+            return False
+
+        for url in ['/small', '/image', '/stream', '/precompressed']:
+            response = client.get(url, headers={'Accept-Encoding': 'gzip'})
+            expected = 'gzip' if url == '/precompressed' else None
+            if response.headers.get('Content-Encoding') != expected:
+                print(f"❌ {url}: Content-Encoding inatteso {response.headers.get('Content-Encoding')}")
+                return False
+        if gzip.decompress(client.get('/precompressed', headers={'Accept-Encoding': 'gzip'}).data).decode() != PAGE:
+            print("❌ Risposta già compressa compressa due volte")
+            return False
+
+        print("✅ Compressione delle risposte corretta")
+        return True
+    finally:
+        compression.brotli = original_brotli
+
+if __name__ == '__main__':
+    print("🚀 Test della compressione delle risposte")
+    print("=" * 50)
+
+    if test_compression():
+        print("✅ Test completato!")
+    else:
+        print("❌ Test fallito!")
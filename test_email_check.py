@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Test script per verificare la cache DNS delle email e la verifica asincrona
+"""
+
+import os
+import tempfile
+import time
+from flask import Flask
+from models import db, ContactMessage
+import email_check
+
+# Finto DNS: esiti per dominio e numero di interrogazioni
+FAKE_DOMAINS = {
+    'good.test': (email_check.DELIVERABLE, None),
+    'bad.test': (email_check.UNDELIVERABLE, 'The domain name bad.test does not exist.'),
+    'slow.test': (email_check.DELIVERABLE, None),
+}
+dns_queries = []
+
+def _fake_query_dns(domain):
+    dns_queries.append(domain)
+    if domain == 'slow.test':
+        time.sleep(0.5)
+    return FAKE_DOMAINS[domain]
+
+def test_domain_cache():
+    """Testa cache positiva e negativa e tempo massimo di attesa"""
+    original = email_check._query_dns
+    email_check._query_dns = _fake_query_dns
+    email_check.clear_cache()
+    dns_queries.clear()
+    try:
+        for _ in range(3):
+            if email_check.check_domain('GOOD.test')[0] != email_check.DELIVERABLE:
+                print("❌ Dominio valido rifiutato")
+                return False
+            if email_check.check_domain('bad.test')[0] != email_check.UNDELIVERABLE:
+                print("❌ Dominio inesistente accettato")
+                return False
+        if dns_queries != ['good.test', 'bad.test']:
+            print(f"❌ Interrogazioni DNS non in cache: {dns_queries}")
+            return False
+
+        # DNS lento: risposta entro il tempo massimo, la cache si aggiorna in background
+        start = time.perf_counter()
+        status, _ = email_check.check_domain('slow.test', timeout=0.1)
+        elapsed = time.perf_counter() - start
+        if status != email_check.UNKNOWN or elapsed > 0.3:
+            print(f"❌ Tempo massimo non rispettato: {status} in {elapsed:.2f}s")
+            return False
+        time.sleep(0.6)
+        if email_check.check_domain('slow.test', timeout=0.1)[0] != email_check.DELIVERABLE:
+            print("❌ Esito della risoluzione in background non salvato")
+            return False
+
+        print("✅ Cache DNS e tempo massimo funzionanti")
+        return True
+    finally:
+        email_check._query_dns = original
+        email_check.clear_cache()
+
+def test_async_message_status():
+    """Testa il salvataggio asincrono dell'esito sul messaggio di contatto"""
+    original = email_check._query_dns
+    email_check._query_dns = _fake_query_dns
+    email_check.clear_cache()
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{path}'
+    db.init_app(app)
+    try:
+        with app.app_context():
+            db.create_all()
+            message = ContactMessage(name='Test', email='someone@bad.test', subject='Ciao', message='Test')
+            db.session.add(message)
+            db.session.commit()
+            message_id = message.id
+
+        email_check.check_message_later(app, message_id, 'bad.test').result(timeout=5)
+
+        with app.app_context():
+            status = db.session.get(ContactMessage, message_id).email_status
+        if status != email_check.UNDELIVERABLE:
+            print(f"❌ Esito non salvato sul messaggio: {status}")
+            return False
+
+        print("✅ Verifica asincrona salvata sul messaggio")
+        return True
+    finally:
+        email_check._query_dns = original
+        email_check.clear_cache()
+        with app.app_context():
+            db.engine.dispose()
+        os.remove(path)
+
+if __name__ == '__main__':
+    print("🧪 Test verifica email...")
+    cache_success = test_domain_cache()
+    async_success = test_async_message_status()
+
+    if cache_success and async_success:
+        print("\n✅ Test completato!")
+    else:
+        print("\n❌ Test fallito!")
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Test script per verificare la cache persistente dei file GitHub
+"""
+
+import os
+import tempfile
+import time
+from github_cache import GitHubCache
+
+def _temp_cache(**kwargs):
+    """Crea una cache in un file temporaneo"""
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    return GitHubCache(path, **kwargs), path
+
+def test_cache_ttl():
+    """Testa il salvataggio, la scadenza e la rivalidazione delle voci"""
+    cache, path = _temp_cache(ttl=1)
+    try:
+        cache.set('contents:a/b/app.py@main', 200, 'print("ciao")', etag='"abc"')
+        entry = cache.get('contents:a/b/app.py@main')
+        if not entry or not entry['fresh'] or entry['body'] != 'print("ciao")':
+            print("❌ Voce appena salvata non trovata")
+            return False
+
+        time.sleep(1.1)
+        entry = cache.get('contents:a/b/app.py@main')
+        if entry['fresh'] or entry['etag'] != '"abc"':
+            print("❌ La voce scaduta dovrebbe mantenere l'ETag ed essere marcata come non fresca")
+            return False
+
+        cache.touch('contents:a/b/app.py@main')
+        if not cache.get('contents:a/b/app.py@main')['fresh']:
+            print("❌ touch() non ha rinnovato la voce")
+            return False
+
+        print("✅ TTL e rivalidazione funzionano")
+        return True
+    finally:
+        os.remove(path)
+
+def test_cache_lru_eviction():
+    """Testa che le voci meno usate vengano eliminate oltre il limite"""
+    cache, path = _temp_cache(max_entries=3)
+    try:
+        for i in range(5):
+            cache.set(f'key-{i}', 200, f'body-{i}')
+            time.sleep(0.01)
+
+        remaining = [i for i in range(5) if cache.get(f'key-{i}')]
+        if remaining != [2, 3, 4]:
+            print(f"❌ Voci rimaste inattese: {remaining}")
+            return False
+
+        print("✅ Eviction LRU funziona")
+        return True
+    finally:
+        os.remove(path)
+
+if __name__ == '__main__':
+    print("🧪 Test cache GitHub...")
+    ttl_success = test_cache_ttl()
+    lru_success = test_cache_lru_eviction()
+
+    if ttl_success and lru_success:
+        print("\n✅ Test completato!")
+    else:
+        print("\n❌ Test fallito!")
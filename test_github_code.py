@@ -3,7 +3,15 @@
 Test script per verificare la funzionalità di recupero codice da GitHub
 """
 
-from app import app, extract_github_info, get_github_file_content, get_project_code_files
+import os
+import tempfile
+import requests
+import app as portfolio_app
+import github_client
+from flask import stream_template
+from app import app, extract_github_info, get_github_file_content, get_project_code_files, iter_code_file_previews, truncate_code
+from fake_github import FakeGitHub
+from github_cache import GitHubCache
 from models import Project
 
 def test_github_info_extraction():
@@ -64,6 +72,179 @@ def test_project_code_files():
         else:
             print("⚠️ Nessun file di codice trovato (potrebbe essere normale se il repo non ha i file cercati)")
 
+def test_project_code_files_offline():
+    """Testa il recupero dei file contro la finta API GitHub locale (senza internet)"""
+    print("🧪 Test recupero file con finta API GitHub...")
+
+    fd, cache_path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    original_cache = portfolio_app.github_cache
+    original_url = github_client.GITHUB_API_URL
+    portfolio_app.github_cache = GitHubCache(cache_path)
+
+    try:
+        with FakeGitHub() as fake:
+            github_client.GITHUB_API_URL = fake.url
+            test_project = Project(
+                title="Web App",
+                description="Progetto di test",
+                github_repo="https://github.com/demo/web-app"
+            )
+
+            # Cache fredda: manifest (2 richieste) + un download per file mostrato
+            code_files = get_project_code_files(test_project)
+            expected = ['package.json', 'index.js', 'index.html', 'style.css', 'src/components/Header.jsx']
+            if list(code_files) != expected:
+                print(f"❌ File inattesi: {list(code_files)}")
+                return False
+            if fake.requests_total != 2 + len(expected):
+                print(f"❌ Richieste a GitHub inattese a cache fredda: {fake.requests_total}")
+                return False
+
+            # Cache calda: nessuna richiesta
+            fake.reset_stats()
+            get_project_code_files(test_project)
+            if fake.requests_total != 0:
+                print(f"❌ Richieste a GitHub con cache calda: {fake.requests_total}")
+                return False
+
+            # Branch 'master': fallback da 'main' quando si chiede un singolo file
+            content = get_github_file_content('octocat', 'Hello-World', 'README')
+            if content != 'Hello World!\n':
+                print("❌ Fallback su master non funzionante")
+                return False
+
+        print(f"✅ Trovati {len(code_files)} file senza accesso a internet")
+        return True
+    finally:
+        portfolio_app.github_cache = original_cache
+        github_client.GITHUB_API_URL = original_url
+        os.remove(cache_path)
+
+def test_code_page_budgets():
+    """Testa i limiti in byte della pagina del codice con file grandi"""
+    print("🧪 Test limiti di dimensione della pagina del codice...")
+
+    repos = {
+        'demo/big-files': {
+            'default_branch': 'main',
+            'files': {
+                'app.py': 'valore = "àèì"\n' * 2000,
+                'package.json': '{"name": "big-files"}\n',
+                'index.html': '<p>riga</p>\n' * 100000,
+                'style.css': 'body { margin: 0; }\n' * 500,
+            }
+        }
+    }
+
+    fd, cache_path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    original_cache = portfolio_app.github_cache
+    original_url = github_client.GITHUB_API_URL
+    original_limits = (portfolio_app.CODE_FILE_MAX_BYTES, portfolio_app.CODE_PAGE_MAX_BYTES,
+                       portfolio_app.CODE_FULL_FILE_MAX_BYTES)
+    portfolio_app.github_cache = GitHubCache(cache_path)
+    portfolio_app.CODE_FILE_MAX_BYTES = 4096
+    portfolio_app.CODE_PAGE_MAX_BYTES = 6000
+    portfolio_app.CODE_FULL_FILE_MAX_BYTES = 512 * 1024
+
+    try:
+        # Il taglio avviene a fine riga e non spezza i caratteri multibyte
+        text = truncate_code('àè\n' * 10, 11)
+        if text != 'àè\nàè\n':
+            print(f"❌ Troncamento inatteso: {text!r}")
+            return False
+
+        with FakeGitHub(repos=repos) as fake:
+            github_client.GITHUB_API_URL = fake.url
+            test_project = Project(
+                id=1,
+                title="Big Files",
+                description="Progetto di test",
+                github_repo="https://github.com/demo/big-files"
+            )
+
+            previews = dict(iter_code_file_previews(test_project))
+            if list(previews) != ['app.py', 'package.json', 'index.html', 'style.css']:
+                print(f"❌ File inattesi: {list(previews)}")
+                return False
+
+            # index.html supera il limite del file completo: non viene scaricato
+            if not previews['index.html']['too_large'] or fake.requests_total != 2 + 3:
+                print(f"❌ File troppo grande scaricato ({fake.requests_total} richieste)")
+                return False
+
+            app_py = previews['app.py']
+            if not app_py['truncated'] or app_py['shown'] > 4096 or not str(app_py['html']):
+                print(f"❌ Anteprima di app.py non limitata: {app_py['shown']} byte")
+                return False
+            if previews['package.json']['truncated']:
+                print("❌ File piccolo troncato")
+                return False
+
+            total = sum(preview['shown'] for preview in previews.values())
+            if total > 6000 or not previews['style.css']['truncated']:
+                print(f"❌ Limite della pagina non rispettato: {total} byte")
+                return False
+
+            # Il template viene generato a pezzi e i file scaricati solo quando servono
+            fake.reset_stats()
+            with app.test_request_context(f'/project/{test_project.id}/code'):
+                chunks = stream_template('project_code.html', project=test_project,
+                                         code_files=iter_code_file_previews(test_project))
+                first = next(chunks)
+                if fake.requests_total != 0:
+                    print("❌ File elaborati prima dell'invio della pagina")
+                    return False
+                html = first + ''.join(chunks)
+            if 'Mostra file completo' not in html or 'troppo grande' not in html:
+                print("❌ Pagina senza avvisi di troncamento")
+                return False
+
+        print(f"✅ Pagina del codice limitata a {total} byte di anteprima")
+        return True
+    finally:
+        portfolio_app.github_cache = original_cache
+        github_client.GITHUB_API_URL = original_url
+        (portfolio_app.CODE_FILE_MAX_BYTES, portfolio_app.CODE_PAGE_MAX_BYTES,
+         portfolio_app.CODE_FULL_FILE_MAX_BYTES) = original_limits
+        os.remove(cache_path)
+
+def test_github_retry_budget():
+    """Testa che i timeout di lettura non vengano ritentati e che i tentativi restino entro GITHUB_TOTAL_TIMEOUT"""
+    print("🧪 Test limiti dei tentativi verso GitHub...")
+    original_url = github_client.GITHUB_API_URL
+    original = (github_client.READ_TIMEOUT, github_client.TOTAL_TIMEOUT, github_client.BACKOFF)
+    try:
+        # GitHub lento: un solo tentativo, poi ReadTimeout
+        with FakeGitHub(latency=0.5) as fake:
+            github_client.GITHUB_API_URL = fake.url
+            github_client.READ_TIMEOUT, github_client.BACKOFF = 0.2, 0.01
+            try:
+                github_client.get('repos/demo/web-app')
+                print("❌ Nessun timeout di lettura")
+                return False
+            except requests.ReadTimeout:
+                pass
+            if fake.requests_total != 1:
+                print(f"❌ Timeout di lettura ritentato: {fake.requests_total} richieste")
+                return False
+
+        # Errori 5xx: nessun nuovo tentativo se non resta il tempo per una connessione
+        with FakeGitHub(error_rate=1.0, seed=1) as fake:
+            github_client.GITHUB_API_URL = fake.url
+            github_client.READ_TIMEOUT, github_client.TOTAL_TIMEOUT = 10, 1
+            response = github_client.get('repos/demo/web-app')
+            if response.status_code < 500 or fake.requests_total != 1:
+                print(f"❌ Tentativi oltre il tempo massimo: {fake.requests_total} richieste")
+                return False
+
+        print("✅ Tentativi verso GitHub limitati")
+        return True
+    finally:
+        github_client.GITHUB_API_URL = original_url
+        github_client.READ_TIMEOUT, github_client.TOTAL_TIMEOUT, github_client.BACKOFF = original
+
 def main():
     """Esegue tutti i test"""
     print("🚀 Test funzionalità GitHub Code Retrieval")
@@ -72,6 +253,9 @@ def main():
     test_github_info_extraction()
     test_github_file_retrieval()
     test_project_code_files()
+    test_project_code_files_offline()
+    test_code_page_budgets()
+    test_github_retry_budget()
     
     print("✅ Test completati!")
 
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Test script per verificare l'evidenziazione della sintassi lato server e la sua cache
+"""
+
+import os
+import tempfile
+import highlight
+from github_cache import GitHubCache
+from highlight import Highlighter
+
+def test_highlight_cached_by_content():
+    """Testa HTML colorato, escape del contenuto e riuso della cache per contenuto"""
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    original = highlight.pygments_highlight
+    calls = []
+
+    def counting_highlight(*args, **kwargs):
+        calls.append(args[0])
+        return original(*args, **kwargs)
+
+    highlight.pygments_highlight = counting_highlight
+    try:
+        highlighter = Highlighter(GitHubCache(path))
+        code = 'def saluta(nome):\n    return "<b>Ciao</b> " + nome\n'
+
+        html = highlighter.highlight(code, 'python', 'app.py')
+        if '<span class="k">def</span>' not in html or '<b>' in html:
+            print(f"❌ HTML colorato non corretto: {html[:120]}")
+            return False
+
+        # Stesso contenuto: nessuna nuova elaborazione; contenuto diverso: nuova elaborazione
+        highlighter.highlight(code, 'python', 'app.py')
+        Highlighter(GitHubCache(path)).highlight(code, 'python', 'app.py')
+        highlighter.highlight(code + '# fine\n', 'python', 'app.py')
+        if len(calls) != 2:
+            print(f"❌ Elaborazioni inattese: {len(calls)}")
+            return False
+
+        # Linguaggio sconosciuto: fallback sul nome del file e poi su testo semplice
+        if 'class=' not in highlighter.highlight('{"a": 1}', 'text', 'data.json'):
+            print("❌ Fallback sul nome del file non funzionante")
+            return False
+        if highlighter.highlight('a < b', 'text', 'NOTE') != 'a &lt; b\n':
+            print("❌ Fallback su testo semplice non funzionante")
+            return False
+
+        # Stesso contenuto con lexer diversi scelti dal nome del file: voci di cache distinte
+        source = 'x = 1\n'
+        as_text = highlighter.highlight(source, 'text', 'NOTE')
+        as_python = highlighter.highlight(source, 'text', 'script.py')
+        if as_text == as_python or 'class=' not in as_python:
+            print("❌ Cache condivisa tra lexer diversi")
+            return False
+
+        print("✅ Evidenziazione lato server con cache per contenuto")
+        return True
+    finally:
+        highlight.pygments_highlight = original
+        os.remove(path)
+
+if __name__ == '__main__':
+    print("🧪 Test evidenziazione sintassi...")
+    if test_highlight_cached_by_content():
+        print("\n✅ Test completato!")
+    else:
+        print("\n❌ Test fallito!")
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Test script per verificare le risposte condizionali (ETag / Last-Modified)
+"""
+
+import time
+from datetime import datetime
+from flask import Flask
+from flask_login import LoginManager
+from http_cache import conditional, FALLBACK_HEADER
+
+def _make_app(state):
+    """App minima con una view condizionale che conta i render"""
+    app = Flask(__name__)
+    app.secret_key = 'test'
+    login_manager = LoginManager(app)
+    login_manager.user_loader(lambda user_id: None)
+
+    @app.route('/items')
+    @conditional(lambda: (state['version'], state['modified']))
+    def items():
+        state['renders'] += 1
+        if state.get('fallback'):
+            return "<html>versione salvata</html>", 200, {FALLBACK_HEADER: 'stale'}
+        return f"<html>versione {state['version']}</html>"
+
+    return app
+
+def test_conditional_responses():
+    """Testa 304 con If-None-Match e If-Modified-Since, il cambio di versione e le pagine di fallback"""
+    state = {'version': 1, 'modified': datetime(2024, 1, 1, 12, 0, 0), 'renders': 0}
+    client = _make_app(state).test_client()
+
+    response = client.get('/items')
+    etag = response.headers.get('ETag')
+    last_modified = response.headers.get('Last-Modified')
+    if response.status_code != 200 or not etag or not last_modified:
+        print("❌ Validatori mancanti nella risposta 200")
+        return False
+
+    not_modified = client.get('/items', headers={'If-None-Match': etag})
+    since = client.get('/items', headers={'If-Modified-Since': last_modified})
+    if not_modified.status_code != 304 or since.status_code != 304 or not_modified.data:
+        print(f"❌ Atteso 304, ottenuto {not_modified.status_code}/{since.status_code}")
+        return False
+    if state['renders'] != 1:
+        print(f"❌ La view è stata eseguita {state['renders']} volte invece di 1")
+        return False
+
+    # Nuova versione dei dati: l'ETag del client non è più valido
+    state['version'] = 2
+    state['modified'] = datetime.utcfromtimestamp(time.time())
+    changed = client.get('/items', headers={'If-None-Match': etag})
+    if changed.status_code != 200 or changed.headers.get('ETag') == etag:
+        print("❌ Versione cambiata ma risposta non aggiornata")
+        return False
+
+    # Parametri diversi, ETag diverso
+    if client.get('/items?page=2').headers.get('ETag') == changed.headers.get('ETag'):
+        print("❌ ETag uguale per parametri diversi")
+        return False
+
+    # Pagina di fallback (database non raggiungibile): niente validatori e no-store
+    state['fallback'] = True
+    fallback = client.get('/items')
+    if fallback.headers.get('ETag') or fallback.headers.get('Last-Modified') or fallback.headers.get('Cache-Control') != 'no-store':
+        print(f"❌ Pagina di fallback con validatori o cache: {dict(fallback.headers)}")
+        return False
+
+    print("✅ Risposte condizionali corrette")
+    return True
+
+if __name__ == '__main__':
+    print("🧪 Test risposte condizionali...")
+    if test_conditional_responses():
+        print("\n✅ Test completato!")
+    else:
+        print("\n❌ Test fallito!")
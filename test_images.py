@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Test script per verificare le varianti ridimensionate delle immagini dei progetti
+"""
+
+import os
+import shutil
+import tempfile
+from flask import Flask, render_template
+import images
+from images import process_image
+from models import Project
+
+def _make_static_folder():
+    static_folder = tempfile.mkdtemp()
+    source_dir = os.path.join(static_folder, 'images', 'projects')
+    os.makedirs(source_dir)
+    images.Image.new('RGB', (1600, 1000), (40, 120, 200)).save(os.path.join(source_dir, 'foto.jpg'), 'JPEG')
+    images.Image.new('RGBA', (300, 200), (255, 0, 0, 128)).save(os.path.join(source_dir, 'logo.png'), 'PNG')
+    return static_folder
+
+def test_variants():
+    """Testa larghezze, formati, cache su disco per hash e casi senza varianti"""
+    print("🧪 Test generazione delle varianti...")
+    if images.Image is None:
+        print("⚠️ Pillow non installato, test saltato")
+        return True
+    static_folder = _make_static_folder()
+    try:
+        info = process_image(static_folder, 'foto.jpg')
+        if (info['width'], info['height']) != (1600, 1000):
+            print(f"❌ Dimensioni originali inattese: {info}")
+            return False
+        if [(v['width'], v['height']) for v in info['variants']] != [(400, 250), (800, 500), (1200, 750)]:
+            print(f"❌ Varianti inattese: {info['variants']}")
+            return False
+
+        derived = os.path.join(static_folder, images.DERIVED_DIR)
+        for variant in info['variants']:
+            with images.Image.open(os.path.join(derived, variant['webp'])) as webp:
+                if webp.format != 'WEBP' or webp.width != variant['width']:
+                    print(f"❌ Variante WebP non valida: {variant['webp']}")
+                    return False
+            if not variant['fallback'].endswith('.jpg'):
+                print(f"❌ Fallback JPEG atteso per un'immagine opaca: {variant['fallback']}")
+                return False
+
+        # Stessa sorgente: nessun file riscritto
+        card = os.path.join(derived, info['variants'][0]['webp'])
+        mtime = os.path.getmtime(card)
+        if process_image(static_folder, 'foto.jpg') != info or os.path.getmtime(card) != mtime:
+            print("❌ Varianti rigenerate per una sorgente invariata")
+            return False
+
+        # Sorgente modificata: nuova cartella
+        images.Image.new('RGB', (1600, 1000), (200, 40, 40)).save(
+            os.path.join(static_folder, 'images', 'projects', 'foto.jpg'), 'JPEG')
+        if process_image(static_folder, 'foto.jpg')['variants'][0]['webp'] == info['variants'][0]['webp']:
+            print("❌ Hash non aggiornato dopo la modifica della sorgente")
+            return False
+
+        # Trasparenza: fallback PNG e nessun ingrandimento oltre l'originale
+        logo = process_image(static_folder, 'logo.png')
+        if [(v['width'], v['fallback'][-4:]) for v in logo['variants']] != [(300, '.png')]:
+            print(f"❌ Varianti inattese per il PNG trasparente: {logo['variants']}")
+            return False
+
+        if any(process_image(static_folder, name) is not None for name in ['manca.jpg', '../../secret.jpg', '', None]):
+            print("❌ Varianti restituite per un file mancante o fuori dalla cartella")
+            return False
+
+        print("✅ Varianti generate e riusate correttamente")
+        return True
+    finally:
+        shutil.rmtree(static_folder)
+
+def test_template():
+    """Testa picture/srcset/width/height nel template e la cache immutabile dei derivati"""
+    print("🧪 Test template delle immagini...")
+    if images.Image is None:
+        print("⚠️ Pillow non installato, test saltato")
+        return True
+    static_folder = _make_static_folder()
+    try:
+        app = Flask(__name__, static_folder=static_folder, static_url_path='/static')
+        images.init_app(app)
+
+        project = Project(title='Portfolio', image='foto.jpg')
+        with app.test_request_context():
+            html = render_template('_project_image.html', project=project)
+            if '<picture>' in html or 'src="/static/images/projects/foto.jpg"' not in html:
+                print("❌ Senza varianti deve essere mostrata l'immagine originale")
+                return False
+
+            project.set_image_info(process_image(static_folder, 'foto.jpg'))
+            html = render_template('_project_image.html', project=project)
+        for expected in ['type="image/webp"', ' 400w, ', ' 1200w"', 'width="400" height="250"', 'loading="lazy"', 'card.jpg"']:
+            if expected not in html:
+                print(f"❌ '{expected}' mancante nel template: {html}")
+                return False
+        if project.to_dict()['image_width'] != 1600:
+            print("❌ Dimensioni mancanti in to_dict")
+            return False
+
+        client = app.test_client()
+        response = client.get('/static/images/derived/' + project.get_image_variants()[0]['webp'])
+        if response.status_code != 200 or response.mimetype != 'image/webp' or 'immutable' not in response.headers['Cache-Control']:
+            print(f"❌ Variante servita senza cache immutabile: {response.status_code} {response.headers.get('Cache-Control')}")
+            return False
+        digest = project.get_image_variants()[0]['webp'].split('/')[0]
+        if client.get(f'/static/images/derived/{digest}/variants.json').status_code != 404:
+            print("❌ File interno delle varianti accessibile")
+            return False
+
+        project.set_image_info(None)
+        if project.image_variants or project.image_width:
+            print("❌ Varianti non rimosse")
+            return False
+
+        print("✅ Template e distribuzione delle varianti corretti")
+        return True
+    finally:
+        shutil.rmtree(static_folder)
+
+if __name__ == '__main__':
+    print("🚀 Test delle varianti delle immagini dei progetti")
+    print("=" * 50)
+
+    results = [test_variants(), test_template()]
+
+    if all(results):
+        print("✅ Test completato!")
+    else:
+        print("❌ Alcuni test sono falliti")
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Test script per verificare che le query delle liste usino gli indici (EXPLAIN QUERY PLAN)
+"""
+
+import os
+import tempfile
+from sqlalchemy import create_engine, select, text
+from models import db, Project, Technology, ProjectTechnology, ContactMessage, Review
+from migrate_schema import add_list_indexes, convert_technology_tags
+
+# Query usate dalle pagine, con l'indice che dovrebbero usare
+LIST_QUERIES = [
+    ('Progetti in evidenza (homepage)', 'ix_project_featured_created_at',
+     select(Project).where(Project.featured == True).order_by(Project.created_at.desc()).limit(3)),
+    ('Recensioni approvate (pagina recensioni)', 'ix_review_approved_created_at',
+     select(Review).where(Review.approved == True).order_by(Review.created_at.desc(), Review.id.desc()).limit(21)),
+    ('Messaggi non letti (admin)', 'ix_contact_message_read_created_at',
+     select(ContactMessage).where(ContactMessage.read == False).order_by(ContactMessage.created_at.desc()).limit(21)),
+    ('Tutti i messaggi (admin, API)', 'ix_contact_message_created_at',
+     select(ContactMessage).order_by(ContactMessage.created_at.desc(), ContactMessage.id.desc()).limit(21)),
+    ('Tutti i progetti (pagina progetti)', 'ix_project_created_at',
+     select(Project).order_by(Project.created_at.desc()).limit(21)),
+    ('Progetti per categoria (filtro ?category=)', 'ix_project_category_created_at',
+     select(Project).where(Project.category == 'web').order_by(Project.created_at.desc())),
+]
+
+# Filtro ?tech=: slug del tag e tabella di collegamento devono usare un indice
+TECH_FILTER_QUERY = select(Project).where(Project.id.in_(
+    select(ProjectTechnology.project_id)
+    .join(Technology, Technology.id == ProjectTechnology.technology_id)
+    .where(Technology.slug == 'flask')
+)).order_by(Project.created_at.desc())
+
+def _temp_engine():
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    return create_engine(f'sqlite:///{path}'), path
+
+def explain(conn, query):
+    """Restituisce il piano di esecuzione SQLite di una query"""
+    sql = str(query.compile(conn, compile_kwargs={'literal_binds': True}))
+    return ' | '.join(row[-1] for row in conn.execute(text(f'EXPLAIN QUERY PLAN {sql}')))
+
+def test_list_queries_use_indexes():
+    """Testa che ogni query di lista usi il suo indice senza ordinamento temporaneo"""
+    engine, path = _temp_engine()
+    try:
+        db.metadata.create_all(engine)
+        success = True
+        with engine.connect() as conn:
+            for name, index, query in LIST_QUERIES:
+                plan = explain(conn, query)
+                if index in plan and 'TEMP B-TREE' not in plan:
+                    print(f"✅ {name}: {plan}")
+                else:
+                    print(f"❌ {name}: atteso {index}, piano: {plan}")
+                    success = False
+        return success
+    finally:
+        engine.dispose()
+        os.remove(path)
+
+def test_tech_filter_uses_indexes():
+    """Testa che il filtro per tecnologia non scorra le tabelle dei tag"""
+    engine, path = _temp_engine()
+    try:
+        db.metadata.create_all(engine)
+        with engine.connect() as conn:
+            plan = explain(conn, TECH_FILTER_QUERY)
+        if 'ix_project_technology_technology_id' in plan and 'SCAN' not in plan:
+            print(f"✅ Filtro per tecnologia: {plan}")
+            return True
+        print(f"❌ Filtro per tecnologia senza indici: {plan}")
+        return False
+    finally:
+        engine.dispose()
+        os.remove(path)
+
+def test_index_migration_repeatable():
+    """Testa che la migrazione crei gli indici su un database esistente e sia ripetibile"""
+    engine, path = _temp_engine()
+    try:
+        db.metadata.create_all(engine)
+        with engine.begin() as conn:
+            # Simula un database creato prima degli indici
+            for (name,) in conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'ix_%'")).fetchall():
+                conn.execute(text(f'DROP INDEX "{name}"'))
+            # Progetto con un tag più lungo della colonna Technology.name
+            conn.execute(text("INSERT INTO project (title, description, technologies) VALUES ('Lungo', 'Test', :tags)"),
+                         {'tags': 'Flask,' + 'x' * 80})
+
+        for _ in range(2):
+            with engine.begin() as conn:
+                add_list_indexes(conn)
+                convert_technology_tags(conn)
+
+        with engine.connect() as conn:
+            indexes = {row[0] for row in conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'ix_%'"))}
+            longest = conn.execute(text('SELECT MAX(LENGTH(name)) FROM technology')).scalar()
+        if longest != Technology.MAX_LENGTH:
+            print(f"❌ Tag non troncato dalla migrazione: {longest} caratteri")
+            return False
+        expected = {index for _, index, _ in LIST_QUERIES} | {'ix_project_technology_technology_id'}
+        if expected <= indexes:
+            print(f"✅ Migrazione ripetibile: {len(indexes)} indici presenti")
+            return True
+        print(f"❌ Indici mancanti dopo la migrazione: {expected - indexes}")
+        return False
+    finally:
+        engine.dispose()
+        os.remove(path)
+
+if __name__ == '__main__':
+    print("🧪 Test utilizzo indici...")
+    plan_success = test_list_queries_use_indexes()
+    tech_success = test_tech_filter_uses_indexes()
+    migration_success = test_index_migration_repeatable()
+
+    if plan_success and tech_success and migration_success:
+        print("\n✅ Test completato!")
+    else:
+        print("\n❌ Test fallito!")
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Test script per verificare le metriche Prometheus e l'endpoint /metrics
+"""
+
+import json
+import os
+import shutil
+import tempfile
+from flask import Flask, abort
+from models import db, Project, User
+from metrics import Metrics
+import github_client
+import app as portfolio_app
+
+def test_request_metrics():
+    """Testa latenza, status e query SQL per endpoint su un'app isolata"""
+    print("🧪 Test metriche delle richieste...")
+
+    fd, db_path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    directory = tempfile.mkdtemp()
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
+    db.init_app(app)
+    metrics = Metrics(directory, flush_interval=0)
+    metrics.init_app(app)
+
+    @app.route('/projects')
+    def projects():
+        return str(len(Project.query.all()) + len(Project.query.all()))
+
+    @app.route('/missing')
+    def missing():
+        abort(404)
+
+    try:
+        with app.app_context():
+            db.create_all()
+
+        client = app.test_client()
+        for _ in range(3):
+            client.get('/projects')
+        client.get('/missing')
+        text = metrics.render()
+
+        expected = [
+            'portfolio_http_requests_total{endpoint="projects",method="GET",status="200"} 3',
+            'portfolio_http_requests_total{endpoint="missing",method="GET",status="404"} 1',
+            'portfolio_http_request_duration_seconds_count{endpoint="projects"} 3',
+            # Due query per richiesta: tutte nel bucket le="2", nessuna in le="1"
+            'portfolio_db_queries_per_request_bucket{endpoint="projects",le="1"} 0',
+            'portfolio_db_queries_per_request_bucket{endpoint="projects",le="2"} 3',
+            'portfolio_db_queries_per_request_sum{endpoint="projects"} 6',
+            'portfolio_http_requests_in_progress 0',
+        ]
+        for line in expected:
+            if line not in text:
+                print(f"❌ Riga mancante: {line}")
+                return False
+
+        # Il salvataggio è avvenuto dopo ogni richiesta
+        if not os.path.exists(metrics.snapshot_path()):
+            print("❌ Copia del worker non salvata")
+            return False
+
+        print("✅ Metriche delle richieste corrette")
+        return True
+    finally:
+        shutil.rmtree(directory)
+        os.remove(db_path)
+
+def test_worker_aggregation():
+    """Testa la somma delle copie dei worker, anche terminati"""
+    print("🧪 Test aggregazione tra worker...")
+
+    directory = tempfile.mkdtemp()
+    try:
+        metrics = Metrics(directory)
+        metrics.record_github_request(200, 0.02)
+        metrics.registry.set('portfolio_http_requests_in_progress', 1)
+
+        # Copia di un worker terminato (pid inesistente)
+        dead_worker = {
+            'pid': 2 ** 22 + 1,
+            'values': [
+                ['portfolio_github_requests_total', [['status', '200']], 4],
+                ['portfolio_http_requests_in_progress', [], 3],
+            ],
+            'histograms': [
+                ['portfolio_github_request_duration_seconds', [], [0, 0, 4, 0, 0, 0, 0, 0, 0, 0, 0, 0.08, 4]],
+            ],
+        }
+        with open(os.path.join(directory, f"{dead_worker['pid']}.json"), 'w') as f:
+            json.dump(dead_worker, f)
+
+        text = metrics.render()
+        for line in [
+            'portfolio_github_requests_total{status="200"} 5',
+            'portfolio_github_request_duration_seconds_count 5',
+            'portfolio_github_request_duration_seconds_bucket{le="0.025"} 5',
+            # Le richieste in corso del worker terminato non contano
+            'portfolio_http_requests_in_progress 1',
+        ]:
+            if line not in text:
+                print(f"❌ Riga mancante: {line}")
+                return False
+
+        print("✅ Metriche dei worker sommate correttamente")
+        return True
+    finally:
+        shutil.rmtree(directory)
+
+def test_metrics_endpoint_protected():
+    """Testa che /metrics richieda il login admin oppure il token"""
+    print("🧪 Test protezione di /metrics...")
+
+    client = portfolio_app.app.test_client()
+    original_token = portfolio_app.METRICS_TOKEN
+    portfolio_app.METRICS_TOKEN = 'segreto'
+    try:
+        response = client.get('/metrics')
+        if response.status_code != 302:
+            print(f"❌ /metrics accessibile senza autenticazione: {response.status_code}")
+            return False
+
+        response = client.get('/metrics', headers={'Authorization': 'Bearer sbagliato'})
+        if response.status_code != 302:
+            print("❌ /metrics accessibile con un token errato")
+            return False
+
+        # Un utente autenticato ma non admin non vede le metriche
+        with portfolio_app.app.app_context():
+            user = User(username='metrics-utente', email='metrics-utente@example.com', is_admin=False)
+            user.set_password('password')
+            db.session.add(user)
+            db.session.commit()
+            user_id = user.id
+        try:
+            with client.session_transaction() as session:
+                session['_user_id'] = str(user_id)
+            response = client.get('/metrics')
+            with client.session_transaction() as session:
+                session.clear()
+        finally:
+            with portfolio_app.app.app_context():
+                db.session.delete(db.session.get(User, user_id))
+                db.session.commit()
+        if response.status_code != 302:
+            print(f"❌ /metrics accessibile a un utente non admin: {response.status_code}")
+            return False
+
+        response = client.get('/metrics', headers={'Authorization': 'Bearer segreto'})
+        body = response.get_data(as_text=True)
+        if response.status_code != 200 or '# TYPE portfolio_http_requests_total counter' not in body:
+            print(f"❌ /metrics non disponibile con il token: {response.status_code}")
+            return False
+
+        # Le richieste a GitHub passano dagli osservatori di github_client
+        if portfolio_app.metrics.record_github_request not in github_client.request_observers:
+            print("❌ Richieste GitHub non misurate")
+            return False
+
+        print("✅ /metrics protetto correttamente")
+        return True
+    finally:
+        portfolio_app.METRICS_TOKEN = original_token
+
+if __name__ == '__main__':
+    print("🚀 Test delle metriche")
+    print("=" * 50)
+
+    results = [
+        test_request_metrics(),
+        test_worker_aggregation(),
+        test_metrics_endpoint_protected(),
+    ]
+
+    if all(results):
+        print("✅ Test completato!")
+    else:
+        print("❌ Alcuni test sono falliti")
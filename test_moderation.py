@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Test script per verificare la moderazione in blocco di recensioni e messaggi
+"""
+
+import os
+import tempfile
+from datetime import datetime, timedelta
+from flask import Flask
+from models import db, ContactMessage, Review
+from profiler import capture_queries
+import moderation
+import search
+
+def _make_app(path):
+    """App minima con un database SQLite temporaneo"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{path}'
+    db.init_app(app)
+    return app
+
+def _seed():
+    old = datetime.utcnow() - timedelta(days=60)
+    reviews = [Review(name=f'Spam {i}', rating=1, comment=f'Offerta spam {i}', approved=False, created_at=old) for i in range(150)]
+    reviews += [Review(name='Luca', rating=5, comment='Ottimo lavoro', approved=False),
+                Review(name='Anna', rating=4, comment='Sito veloce', approved=True, created_at=old)]
+    messages = [ContactMessage(name=f'Spam {i}', email='spam@example.com', subject='Offerta', message='Spam',
+                               created_at=old) for i in range(100)]
+    messages += [ContactMessage(name='Marco', email='marco@example.com', subject='Preventivo', message='Un sito')]
+    db.session.add_all(reviews + messages)
+    db.session.commit()
+    return reviews, messages
+
+def test_selection():
+    """Testa la validazione della selezione: id, stato, giorni, azione, tipi non validi e selezione vuota"""
+    print("🧪 Test selezione...")
+    invalid = [
+        {},
+        {'ids': ['abc']},
+        {'status': 'cancellate'},
+        {'older_than': '-1'},
+        {'ids': list(range(moderation.MAX_IDS + 1))},
+        # Tipi non previsti da un corpo JSON: mai iterare una stringa carattere per carattere
+        {'ids': '105'},
+        {'ids': 12},
+        {'ids': [1.5]},
+        {'ids': [True]},
+        {'status': ['pending']},
+        {'status': {'pending': 1}},
+        {'older_than': [7]},
+    ]
+    for kwargs in invalid:
+        try:
+            moderation.selection_criteria('review', **kwargs)
+        except moderation.InvalidSelection:
+            continue
+        print(f"❌ Selezione accettata: {kwargs}")
+        return False
+    if len(moderation.selection_criteria('message', ids=['3', '3', 4], status='unread', older_than='7')) != 3:
+        print("❌ Criteri non combinati")
+        return False
+    if moderation.selection_criteria('review', status='all') != []:
+        print("❌ status=all deve selezionare tutto")
+        return False
+    for action in (['delete'], None, 5):
+        try:
+            moderation.apply('review', action, [])
+        except moderation.InvalidSelection:
+            continue
+        print(f"❌ Azione accettata: {action!r}")
+        return False
+    print("✅ Selezione validata correttamente")
+    return True
+
+def test_bulk_actions():
+    """Testa conteggi, filtri, istruzioni set-based e allineamento dell'indice di ricerca"""
+    print("🧪 Test azioni in blocco...")
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    app = _make_app(path)
+    try:
+        with app.app_context():
+            db.create_all()
+            reviews, messages = _seed()
+            spam_ids = [review.id for review in reviews[:150]]
+            db.session.expire_all()
+
+            # 150 recensioni selezionate per id: una UPDATE più l'aggiornamento dell'indice
+            with capture_queries() as queries:
+                count, message = moderation.apply('review', 'approve', moderation.selection_criteria('review', ids=spam_ids))
+                db.session.commit()
+            if count != 150 or message != '150 recensioni approvate.':
+                print(f"❌ Approvazione inattesa: {count}, {message}")
+                return False
+            if len(queries) > 3:
+                print(f"❌ Troppe query per l'approvazione in blocco: {len(queries)}")
+                return False
+            if len(search.search('offerta', limit=50).items) != 50:
+                print("❌ Recensioni approvate non visibili nella ricerca")
+                return False
+
+            # Già approvate: nessuna riga modificata
+            count, _ = moderation.apply('review', 'approve', moderation.selection_criteria('review', ids=spam_ids))
+            if count != 0:
+                print(f"❌ Recensioni già approvate contate di nuovo: {count}")
+                return False
+
+            # Filtro: solo le recensioni più vecchie di 30 giorni (la recensione recente resta)
+            count, _ = moderation.apply('review', 'delete', moderation.selection_criteria('review', status='all', older_than=30))
+            db.session.commit()
+            if count != 151 or Review.query.count() != 1 or search.search('offerta', kinds=['review'], public_only=False).items:
+                print(f"❌ Eliminazione per filtro inattesa: {count}, {Review.query.count()} rimaste")
+                return False
+
+            # Messaggi: letti per filtro, poi eliminati per stato
+            count, _ = moderation.apply('message', 'read', moderation.selection_criteria('message', status='unread', older_than=30))
+            db.session.commit()
+            if count != 100 or ContactMessage.query.filter_by(read=False).count() != 1:
+                print(f"❌ Messaggi segnati come letti inattesi: {count}")
+                return False
+            with capture_queries() as queries:
+                count, _ = moderation.apply('message', 'delete', moderation.selection_criteria('message', status='read'))
+                db.session.commit()
+            if count != 100 or len(queries) > 3:
+                print(f"❌ Eliminazione messaggi inattesa: {count} righe, {len(queries)} query")
+                return False
+            if search.search('offerta', kinds=['message'], public_only=False).items or \
+                    len(search.search('preventivo', public_only=False).items) != 1:
+                print("❌ Indice dei messaggi non allineato")
+                return False
+
+            try:
+                moderation.apply('message', 'approve', [])
+                print("❌ Azione non valida accettata")
+                return False
+            except moderation.InvalidSelection:
+                pass
+
+        print("✅ Azioni in blocco corrette")
+        return True
+    finally:
+        with app.app_context():
+            db.engine.dispose()
+        os.remove(path)
+
+if __name__ == '__main__':
+    print("🚀 Test della moderazione in blocco")
+    print("=" * 50)
+
+    results = [test_selection(), test_bulk_actions()]
+
+    if all(results):
+        print("✅ Test completato!")
+    else:
+        print("❌ Alcuni test sono falliti")
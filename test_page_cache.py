@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Test script per verificare i backend della cache delle pagine
+"""
+
+import os
+import tempfile
+from page_cache import MemoryBackend, SQLiteBackend
+
+def _check_backend(name, backend):
+    """Verifica LRU, scadenza e invalidazione per prefisso di un backend"""
+    backend.set('projects:/projects?', '<html>progetti</html>', ttl=60)
+    backend.set('projects:/projects?tech=Flask', '<html>flask</html>', ttl=60)
+    backend.set('reviews:/reviews?', '<html>recensioni</html>', ttl=60)
+    backend.set('index:/?', '<html>home</html>', ttl=-1)
+
+    if backend.get('projects:/projects?') != '<html>progetti</html>':
+        print(f"❌ {name}: voce non trovata")
+        return False
+    if backend.get('index:/?') is not None:
+        print(f"❌ {name}: voce scaduta restituita")
+        return False
+
+    backend.delete_prefix('projects:')
+    if backend.get('projects:/projects?tech=Flask') is not None or backend.get('reviews:/reviews?') is None:
+        print(f"❌ {name}: invalidazione per gruppo non corretta")
+        return False
+
+    # Limite di voci: la meno usata di recente viene eliminata
+    backend.clear()
+    for i in range(backend.max_entries + 1):
+        backend.set(f'projects:/p{i}', str(i), ttl=60)
+    if backend.get('projects:/p0') is not None or backend.get(f'projects:/p{backend.max_entries}') is None:
+        print(f"❌ {name}: eviction LRU non corretta")
+        return False
+
+    print(f"✅ Backend {name} funzionante")
+    return True
+
+def test_memory_backend():
+    """Testa la cache LRU in memoria"""
+    return _check_backend('memory', MemoryBackend(max_entries=5))
+
+def test_sqlite_backend():
+    """Testa la cache condivisa su SQLite"""
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    try:
+        return _check_backend('sqlite', SQLiteBackend(path, max_entries=5))
+    finally:
+        os.remove(path)
+
+if __name__ == '__main__':
+    print("🧪 Test cache pagine...")
+    memory_success = test_memory_backend()
+    sqlite_success = test_sqlite_backend()
+
+    if memory_success and sqlite_success:
+        print("\n✅ Test completato!")
+    else:
+        print("\n❌ Test fallito!")
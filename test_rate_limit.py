@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Test script per verificare la limitazione delle richieste di scrittura
+"""
+
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import requests
+from flask import Flask, abort
+from rate_limit import MemoryBackend, SQLiteBackend, WriteLimiter, WriteBusy
+
+def _check_backend(name, backend):
+    """Verifica burst, ricarica e isolamento tra client di un backend"""
+    # 3 richieste consecutive, poi una ogni 10 secondi
+    capacity, refill_rate = 3, 0.1
+    waits = [backend.take('contact:1.1.1.1', capacity, refill_rate, now=1000) for _ in range(4)]
+    if waits[:3] != [0, 0, 0] or round(waits[3]) != 10:
+        print(f"❌ {name}: burst non corretto {waits}")
+        return False
+    if backend.take('contact:2.2.2.2', capacity, refill_rate, now=1000) != 0:
+        print(f"❌ {name}: un client limita anche gli altri")
+        return False
+    if backend.take('contact:1.1.1.1', capacity, refill_rate, now=1010) != 0:
+        print(f"❌ {name}: token non ricaricato dopo l'attesa")
+        return False
+
+    # Posti di scrittura: al massimo 2 occupati, liberati dal rilascio
+    tokens = [backend.acquire_slot('write', 2, ttl=60, now=1000) for _ in range(3)]
+    if None in tokens[:2] or tokens[2] is not None:
+        print(f"❌ {name}: posti di scrittura non limitati {tokens}")
+        return False
+    backend.release_slot('write', tokens[0])
+    if backend.acquire_slot('write', 2, ttl=60, now=1000) is None:
+        print(f"❌ {name}: posto di scrittura non rilasciato")
+        return False
+
+    # Limite di client: i meno recenti vengono dimenticati
+    backend.clear()
+    for i in range(backend.max_keys + 1):
+        backend.take(f'contact:10.0.0.{i}', capacity, refill_rate, now=2000 + i)
+    print(f"✅ Backend {name} funzionante")
+    return True
+
+def test_memory_backend():
+    """Testa i token bucket in memoria"""
+    backend = MemoryBackend(max_keys=5)
+    if not _check_backend('memory', backend):
+        return False
+    return len(backend._buckets) == backend.max_keys
+
+def test_sqlite_backend():
+    """Testa i token bucket condivisi su SQLite"""
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    try:
+        return _check_backend('sqlite', SQLiteBackend(path, max_keys=5))
+    finally:
+        os.remove(path)
+
+def test_write_limiter():
+    """Testa 429 per client, 503 per concorrenza (solo WriteBusy) e richieste GET libere"""
+    app = Flask(__name__)
+    limiter = WriteLimiter(MemoryBackend(), requests=2, period=60, concurrency=1)
+    release = threading.Event()
+    started = threading.Event()
+
+    @app.route('/form', methods=['GET', 'POST'])
+    @limiter.limit('form')
+    def form():
+        return 'ok'
+
+    @app.route('/slow', methods=['POST'])
+    @WriteLimiter(None, concurrency=1).limit('slow')
+    def slow():
+        started.set()
+        release.wait(5)
+        return 'ok'
+
+    @app.route('/down')
+    def down():
+        abort(503)
+
+    @app.errorhandler(WriteBusy)
+    def busy_handler(error):
+        return 'busy', error.code, {'Retry-After': str(error.retry_after)}
+
+    client = app.test_client()
+    statuses = [client.post('/form').status_code for _ in range(3)]
+    limited = client.post('/form')
+    other_client = client.post('/form', environ_base={'REMOTE_ADDR': '10.1.1.1'})
+    if statuses != [200, 200, 429] or 'Retry-After' not in limited.headers or other_client.status_code != 200:
+        print(f"❌ Limite per client non corretto: {statuses}")
+        return False
+    if client.get('/form').status_code != 200:
+        print("❌ Richiesta GET limitata")
+        return False
+
+    # Una scrittura in corso occupa l'unico posto disponibile
+    worker = threading.Thread(target=lambda: app.test_client().post('/slow'))
+    worker.start()
+    started.wait(5)
+    busy = client.post('/slow')
+    release.set()
+    worker.join()
+    if busy.status_code != 503 or 'Retry-After' not in busy.headers or busy.data != b'busy':
+        print(f"❌ Limite di concorrenza non applicato: {busy.status_code}")
+        return False
+    # Gli altri 503 non passano dal gestore del limitatore
+    if client.get('/down').data == b'busy':
+        print("❌ Un 503 qualsiasi gestito come limite di concorrenza")
+        return False
+
+    print("✅ Limiti per client e di concorrenza funzionanti")
+    return True
+
+# App minima per test_write_limiter_gunicorn: il limitatore è configurato dall'ambiente come in app.py
+GUNICORN_APP = """
+import os, time
+from flask import Flask
+from rate_limit import create_write_limiter_from_env
+
+app = Flask(__name__)
+limiter = create_write_limiter_from_env(os.path.join(os.environ['WORK_DIR'], 'rate_limit.db'))
+
+@app.route('/slow', methods=['POST'])
+@limiter.limit('slow')
+def slow():
+    open(os.path.join(os.environ['WORK_DIR'], 'started'), 'w').close()
+    release = os.path.join(os.environ['WORK_DIR'], 'release')
+    deadline = time.time() + 10
+    while not os.path.exists(release) and time.time() < deadline:
+        time.sleep(0.05)
+    return 'ok'
+
+@app.route('/ping')
+def ping():
+    return 'ok'
+"""
+
+def test_write_limiter_gunicorn():
+    """Testa il limite di concorrenza con due worker sync di gunicorn.conf.py (posti condivisi tra i processi)"""
+    print("🧪 Test limite di concorrenza su gunicorn...")
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    work_dir = tempfile.mkdtemp()
+    with open(os.path.join(work_dir, 'limited_app.py'), 'w') as f:
+        f.write(GUNICORN_APP)
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+
+    env = dict(os.environ, WORK_DIR=work_dir, PORT=str(port), GUNICORN_WORKER_CLASS='sync', WEB_CONCURRENCY='2',
+               WRITE_CONCURRENCY='1', RATE_LIMIT_REQUESTS='100', METRICS_DIR=os.path.join(work_dir, 'metrics'))
+    env.pop('RATE_LIMIT_BACKEND', None)
+    log = open(os.path.join(work_dir, 'gunicorn.log'), 'w')
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', 'limited_app:app', '--config', os.path.join(base_dir, 'gunicorn.conf.py'),
+         '--pythonpath', f'{work_dir},{base_dir}'],
+        cwd=base_dir, env=env, stdout=log, stderr=subprocess.STDOUT
+    )
+    base_url = f'http://127.0.0.1:{port}'
+    try:
+        for _ in range(100):
+            try:
+                requests.get(f'{base_url}/ping', timeout=1)
+                break
+            except requests.ConnectionError:
+                time.sleep(0.1)
+
+        # Una scrittura lenta occupa l'unico posto in un worker; la seconda arriva all'altro worker
+        first = {}
+        worker = threading.Thread(target=lambda: first.update(response=requests.post(f'{base_url}/slow', timeout=15)))
+        worker.start()
+        for _ in range(100):
+            if os.path.exists(os.path.join(work_dir, 'started')):
+                break
+            time.sleep(0.05)
+        busy = requests.post(f'{base_url}/slow', timeout=15)
+        open(os.path.join(work_dir, 'release'), 'w').close()
+        worker.join()
+
+        if busy.status_code != 503 or first['response'].status_code != 200:
+            print(f"❌ Limite non condiviso tra i worker: {first['response'].status_code}, {busy.status_code}")
+            return False
+        # Il posto viene rilasciato alla fine della richiesta
+        if requests.post(f'{base_url}/slow', timeout=15).status_code != 200:
+            print("❌ Posto di scrittura non rilasciato")
+            return False
+
+        print("✅ Limite di concorrenza condiviso tra i worker gunicorn")
+        return True
+    finally:
+        process.terminate()
+        process.wait(10)
+        log.close()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+if __name__ == '__main__':
+    print("🧪 Test limitazione richieste...")
+    memory_success = test_memory_backend()
+    sqlite_success = test_sqlite_backend()
+    limiter_success = test_write_limiter() and test_write_limiter_gunicorn()
+
+    if memory_success and sqlite_success and limiter_success:
+        print("\n✅ Test completato!")
+    else:
+        print("\n❌ Test fallito!")
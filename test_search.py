@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Test script per verificare la ricerca full-text e la sincronizzazione dell'indice
+"""
+
+import os
+import tempfile
+from flask import Flask
+from models import db, Project, ContactMessage, Review
+import search
+
+def _make_app(path):
+    """App minima con un database SQLite temporaneo"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{path}'
+    db.init_app(app)
+    return app
+
+def _ids(page):
+    return [(result.kind, result.item.id) for result in page.items]
+
+def test_search_sync_and_ranking():
+    """Testa indicizzazione automatica, visibilità, ranking e paginazione"""
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    app = _make_app(path)
+    try:
+        with app.app_context():
+            db.create_all()
+            flask_project = Project(title='Portfolio Flask', description='Sito personale')
+            other_project = Project(title='Blog', description='Un blog scritto con Flask e Jinja')
+            message = ContactMessage(name='Anna', email='anna@example.com', subject='Preventivo', message='Un sito in Flask?')
+            review = Review(name='Luca', rating=5, comment='Ottimo sito Flask', approved=False)
+            db.session.add_all([flask_project, other_project, message, review])
+            db.session.commit()
+
+            # Il titolo pesa più del testo; messaggi e recensioni non approvate non sono pubblici
+            public = _ids(search.search('flask'))
+            if public != [('project', flask_project.id), ('project', other_project.id)]:
+                print(f"❌ Risultati pubblici inattesi: {public}")
+                return False
+            if len(search.search('flask', public_only=False).items) != 4:
+                print("❌ La ricerca admin non trova tutti i documenti")
+                return False
+
+            # Aggiornamenti e cancellazioni mantengono l'indice allineato
+            review.approved = True
+            flask_project.title = 'Portfolio'
+            db.session.delete(other_project)
+            db.session.commit()
+            public = _ids(search.search('flask'))
+            if public != [('review', review.id)] or _ids(search.search('portfolio')) != [('project', flask_project.id)]:
+                print(f"❌ Indice non aggiornato dopo le modifiche: {public}")
+                return False
+
+            # Ricerca per prefisso e paginazione (recensione e messaggio)
+            first = search.search('fla', public_only=False, limit=1)
+            second = search.search('fla', public_only=False, cursor=first.next_cursor, limit=1)
+            if not first.has_next or _ids(first) == _ids(second):
+                print("❌ Paginazione dei risultati non corretta")
+                return False
+
+            # Ricostruzione completa: stesso numero di documenti
+            with db.engine.begin() as conn:
+                count = search.rebuild_index(conn)
+            if count != 3:
+                print(f"❌ Documenti ricostruiti inattesi: {count}")
+                return False
+
+        print("✅ Ricerca full-text funzionante")
+        return True
+    finally:
+        with app.app_context():
+            db.engine.dispose()
+        os.remove(path)
+
+if __name__ == '__main__':
+    print("🧪 Test ricerca full-text...")
+    if test_search_sync_and_ranking():
+        print("\n✅ Test completato!")
+    else:
+        print("\n❌ Test fallito!")
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Test script per verificare il profilo del server (worker gunicorn e pool del database)
+"""
+
+import os
+import runpy
+import shutil
+import tempfile
+from unittest import mock
+from flask import Flask
+from metrics import Metrics
+import server_config
+from server_config import load_profile, engine_options
+
+def test_profile():
+    """Testa il dimensionamento dei worker per classe, le variabili d'ambiente e il ripiego da gevent"""
+    print("🧪 Test profilo dei worker...")
+    profile = load_profile({}, cores=2)
+    if (profile.worker_class, profile.workers, profile.threads, profile.preload) != ('gthread', 3, 4, True):
+        print(f"❌ Profilo di default inatteso: {profile}")
+        return False
+    if load_profile({'GUNICORN_WORKER_CLASS': 'sync'}, cores=2)[:3] != ('sync', 5, 1):
+        print("❌ Profilo sync inatteso")
+        return False
+    if load_profile({'GUNICORN_WORKER_CLASS': 'sync'}, cores=16).workers != 8:
+        print("❌ GUNICORN_MAX_WORKERS non applicato")
+        return False
+    custom = load_profile({'WEB_CONCURRENCY': '12', 'GUNICORN_THREADS': '8', 'GUNICORN_PRELOAD': '0'}, cores=2)
+    if (custom.workers, custom.threads, custom.preload) != (12, 8, False):
+        print(f"❌ Variabili d'ambiente ignorate: {custom}")
+        return False
+
+    with mock.patch.object(server_config, 'gevent_available', return_value=False):
+        if load_profile({'GUNICORN_WORKER_CLASS': 'gevent'}, cores=2).worker_class != 'gthread':
+            print("❌ Nessun ripiego su gthread senza gevent")
+            return False
+    with mock.patch.object(server_config, 'gevent_available', return_value=True):
+        gevent = load_profile({'GUNICORN_WORKER_CLASS': 'gevent'}, cores=2)
+        if (gevent.workers, gevent.threads, gevent.preload) != (2, 1, False):
+            print(f"❌ Profilo gevent inatteso (il preload va disattivato): {gevent}")
+            return False
+
+    try:
+        load_profile({'GUNICORN_WORKER_CLASS': 'tornado'})
+        print("❌ Classe di worker non valida accettata")
+        return False
+    except ValueError:
+        pass
+
+    print("✅ Profilo dei worker corretto")
+    return True
+
+def test_engine_options():
+    """Testa le opzioni del pool per SQLite e PostgreSQL e le variabili DB_*"""
+    print("🧪 Test opzioni del pool...")
+    profile = load_profile({}, cores=2)
+    sqlite = engine_options('sqlite:///portfolio.db', {}, profile)
+    if sqlite != {'pool_size': 4, 'max_overflow': 4, 'pool_timeout': 10, 'pool_pre_ping': False, 'pool_recycle': -1}:
+        print(f"❌ Opzioni SQLite inattese: {sqlite}")
+        return False
+    if engine_options('sqlite://', {}, profile) != {} or engine_options('sqlite:///:memory:', {}, profile) != {}:
+        print("❌ Opzioni di pool per SQLite in memoria")
+        return False
+
+    postgres = engine_options('postgresql://user@host/db', {}, profile)
+    if not postgres['pool_pre_ping'] or postgres['pool_recycle'] != 300:
+        print(f"❌ Opzioni PostgreSQL inattese: {postgres}")
+        return False
+    environ = {'DB_POOL_SIZE': '2', 'DB_MAX_OVERFLOW': '0', 'DB_POOL_PRE_PING': '0', 'DB_POOL_RECYCLE': '1800'}
+    custom = engine_options('postgresql://user@host/db', environ, profile)
+    if (custom['pool_size'], custom['max_overflow'], custom['pool_pre_ping'], custom['pool_recycle']) != (2, 0, False, 1800):
+        print(f"❌ Variabili DB_* ignorate: {custom}")
+        return False
+
+    print("✅ Opzioni del pool corrette")
+    return True
+
+def test_gunicorn_conf():
+    """Testa gunicorn.conf.py: profilo applicato, backend condivisi e metriche svuotate all'avvio"""
+    print("🧪 Test gunicorn.conf.py...")
+    metrics_dir = os.path.join(tempfile.mkdtemp(), 'metrics')
+    environ = {'GUNICORN_WORKER_CLASS': 'sync', 'WEB_CONCURRENCY': '3', 'PORT': '9000', 'METRICS_DIR': metrics_dir}
+    with mock.patch.dict(os.environ, environ):
+        config = runpy.run_path('gunicorn.conf.py')
+        # Con il preload l'app (e la cartella delle metriche) esiste prima di on_starting
+        metrics = Metrics(metrics_dir)
+        metrics.init_app(Flask(__name__))
+        open(os.path.join(metrics_dir, '123.json'), 'w').close()
+        config['on_starting'](mock.Mock())
+        shared_backends = (os.environ.get('PAGE_CACHE_BACKEND'), os.environ.get('RATE_LIMIT_BACKEND'))
+    # Salvataggio di un worker dopo l'avvio
+    metrics.flush()
+
+    if (config['workers'], config['worker_class'], config['bind'], config['preload_app']) != (3, 'sync', '0.0.0.0:9000', True):
+        print("❌ Profilo non applicato da gunicorn.conf.py")
+        return False
+    if shared_backends != ('sqlite', 'sqlite'):
+        print(f"❌ Backend condivisi non impostati con più worker: {shared_backends}")
+        return False
+    if os.listdir(metrics_dir) != [f'{os.getpid()}.json']:
+        print(f"❌ Copie delle metriche non gestite all'avvio: {os.listdir(metrics_dir)}")
+        return False
+    shutil.rmtree(os.path.dirname(metrics_dir))
+
+    print("✅ gunicorn.conf.py corretto")
+    return True
+
+if __name__ == '__main__':
+    print("🚀 Test del profilo del server")
+    print("=" * 50)
+
+    results = [test_profile(), test_engine_options(), test_gunicorn_conf()]
+
+    if all(results):
+        print("✅ Test completato!")
+    else:
+        print("❌ Alcuni test sono falliti")